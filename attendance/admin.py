@@ -1,52 +1,184 @@
 # attendance/admin.py
+# The admin is built to stay fast on tables with millions of rows:
+# - list pages join the related rows their columns show (list_select_related) instead of a query per row;
+# - foreign keys are edited with autocomplete or raw id widgets, never a <select> of the whole table;
+# - owners and subjects are filtered by typing a username or subject id, not from a list of them all;
+# - searches are prefix matches on columns indexed for them (models.SEARCH_COLLATION);
+# - an unfiltered list is counted from its highest id rather than COUNT(*), and filtered lists
+#   aren't counted twice to show the unfiltered total, nor counted per filter choice (facets).
 from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.core.paginator import Paginator
+from django.db.models import Max
+from django.utils.functional import cached_property
+
 from .models import (
-    AcademicSession, Subject, AttendanceRecord, ExamDate, Holiday # Make sure Holiday is imported
+    AcademicSession, Subject, AttendanceRecord, BackgroundJob, ExamDate, Holiday # Make sure Holiday is imported
 )
 
+# Tables whose highest id is at most this are counted exactly
+ESTIMATED_COUNT_THRESHOLD = 10000
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Counts an unfiltered changelist by its table's highest id, one index lookup, instead of a
+    COUNT(*) reading the whole table. The estimate is high by the rows deleted, so the last pages
+    may come up short. Filtered changelists are counted exactly.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            highest = queryset.order_by().aggregate(highest=Max('pk'))['highest'] or 0
+            if highest > ESTIMATED_COUNT_THRESHOLD:
+                return highest
+        return super().count
+
+
+class InputFilter(admin.SimpleListFilter):
+    """
+    A list filter with a text box instead of a link per value, for fields with too many values to
+    list. Shows the rows whose `lookup` equals the typed value, as converted by clean().
+    """
+    template = 'admin/attendance/input_filter.html'
+    lookup = None
+
+    def lookups(self, request, model_admin):
+        return ()
+
+    def has_output(self):
+        return True
+
+    def clean(self, value):
+        """Returns the value to filter with; raises ValueError if it is malformed."""
+        return value.strip()
+
+    def queryset(self, request, queryset):
+        if not self.value():
+            return queryset
+        try:
+            return queryset.filter(**{self.lookup: self.clean(self.value())})
+        except ValueError as e:
+            raise IncorrectLookupParameters(e)
+
+    def choices(self, changelist):
+        # Only "All"; the other filters are kept by the text box's form as hidden fields
+        yield {
+            'selected': self.value() is None,
+            'query_string': changelist.get_query_string(remove=[self.parameter_name]),
+            'display': 'All',
+            'hidden_params': [
+                (name, value) for name, values in changelist.filter_params.items() if name != self.parameter_name for value in values
+            ],
+        }
+
+
+class OwnerFilter(InputFilter):
+    """Filters by the username of the user owning the rows, through the admin's `owner_lookup`."""
+    title = 'owner (username)'
+    parameter_name = 'owner'
+
+    def __init__(self, request, params, model, model_admin):
+        self.lookup = f'{model_admin.owner_lookup}__username'
+        super().__init__(request, params, model, model_admin)
+
+
+class SubjectIdFilter(InputFilter):
+    title = 'subject (id)'
+    parameter_name = 'subject'
+    lookup = 'subject_id'
+
+    def clean(self, value):
+        return int(value)
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+
+
 # Register your models here.
 
 # Academic Session Admin
-class AcademicSessionAdmin(admin.ModelAdmin):
+class AcademicSessionAdmin(LargeTableAdmin):
     list_display = ('name', 'start_date', 'end_date', 'is_current', 'user')
-    list_filter = ('is_current', 'start_date', 'end_date', 'user')
-    search_fields = ('name',)
+    list_select_related = ('user',)
+    list_filter = ('is_current', 'start_date', 'end_date', OwnerFilter)
+    owner_lookup = 'user'
+    search_fields = ('^name',)
+    autocomplete_fields = ('user',)
 
 admin.site.register(AcademicSession, AcademicSessionAdmin)
 
 
 # Subject Admin
-class SubjectAdmin(admin.ModelAdmin):
+class SubjectAdmin(LargeTableAdmin):
     list_display = ('name', 'session', 'minimum_attendance_percentage', 'classes_per_week')
-    list_filter = ('session',)
-    search_fields = ('name',)
+    list_filter = (OwnerFilter,)
+    owner_lookup = 'session__user'
+    search_fields = ('^name', '^code')
+    autocomplete_fields = ('session',)
+    readonly_fields = ('total_conducted', 'total_attended', 'last_record_date')
+    ordering = ('-pk',) # Subject has no order of its own, and an unordered page can repeat or skip rows
+
+    def get_queryset(self, request):
+        # A subject's name includes its session's, on list pages and in the records' autocomplete results alike
+        return super().get_queryset(request).select_related('session')
 
 admin.site.register(Subject, SubjectAdmin)
 
 
 # Attendance Record Admin
-class AttendanceRecordAdmin(admin.ModelAdmin):
+class AttendanceRecordAdmin(LargeTableAdmin):
     list_display = ('subject', 'date', 'classes_conducted', 'classes_attended')
-    list_filter = ('subject', 'date')
-    search_fields = ('subject__name', 'date',)
-    date_hierarchy = 'date'
+    list_select_related = ('subject__session',)
+    list_filter = (OwnerFilter, SubjectIdFilter, 'date')
+    owner_lookup = 'subject__session__user'
+    search_fields = ('^subject__name', '^subject__code')
+    autocomplete_fields = ('subject',)
 
 admin.site.register(AttendanceRecord, AttendanceRecordAdmin)
 
 
 # Exam Date Admin
-class ExamDateAdmin(admin.ModelAdmin):
+class ExamDateAdmin(LargeTableAdmin):
     list_display = ('session', 'exam_type', 'start_date', 'end_date')
-    list_filter = ('session', 'exam_type')
-    search_fields = ('exam_type',)
+    list_select_related = ('session',)
+    list_filter = (OwnerFilter, 'start_date')
+    owner_lookup = 'session__user'
+    search_fields = ('^exam_type',)
+    autocomplete_fields = ('session',)
+    ordering = ('-pk',) # by start date, the model's order, would sort the whole table
 
 admin.site.register(ExamDate, ExamDateAdmin)
 
 
 # Holiday Admin (This is the one we're focusing on)
-class HolidayAdmin(admin.ModelAdmin):
+class HolidayAdmin(LargeTableAdmin):
     list_display = ('name', 'date', 'session') # Added 'session' to list_display
-    list_filter = ('session', 'date')
-    search_fields = ('name',)
+    list_select_related = ('session',)
+    list_filter = (OwnerFilter, 'date')
+    owner_lookup = 'session__user'
+    search_fields = ('^name',)
+    autocomplete_fields = ('session',)
+    ordering = ('-pk',) # by date, the model's order, would sort the whole table
+
+admin.site.register(Holiday, HolidayAdmin) # Only one registration for Holiday, and pass HolidayAdmin
+
+
+# Background Job Admin
+class BackgroundJobAdmin(LargeTableAdmin):
+    list_display = ('id', 'kind', 'status', 'user', 'session', 'rows_processed', 'error_count', 'created_at')
+    list_select_related = ('user', 'session')
+    list_filter = ('status', OwnerFilter)
+    owner_lookup = 'user'
+    raw_id_fields = ('user', 'session')
+
+    def get_queryset(self, request):
+        # Queued jobs hold whole uploaded files
+        return super().get_queryset(request).defer('payload')
 
-admin.site.register(Holiday, HolidayAdmin) # Only one registration for Holiday, and pass HolidayAdmin
\ No newline at end of file
+admin.site.register(BackgroundJob, BackgroundJobAdmin)
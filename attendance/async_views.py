@@ -0,0 +1,77 @@
+# attendance/async_views.py
+# Native async versions of the read-heavy views, served in place of the sync ones under ASGI
+# (see attendance_eligibility_project/asgi_urls.py). They produce the same pages as their
+# counterparts in views.py, sharing the code that builds the template context.
+#
+# Queries go through the async ORM and independent ones are awaited together. Django still runs
+# each query on the request's database thread, so they don't execute in parallel; what changes is
+# that the event loop serves other requests while they run instead of parking a worker thread.
+# Templates are rendered through sync_to_async, as rendering may load the session and user.
+import asyncio
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.shortcuts import aget_object_or_404, redirect, render
+
+from .conditional import conditional_on_session_data
+from .db_routers import read_only_view
+from .models import AcademicSession, AttendanceRecord, ExamDate, Subject
+from .views import (
+    _dashboard_context, _subject_detail_context, _subject_eligibility, current_session_stamp, parse_history_cursor, subject_session_stamp,
+)
+
+arender = sync_to_async(render)
+
+
+async def _alist(queryset):
+    return [obj async for obj in queryset]
+
+
+@login_required
+@read_only_view
+@conditional_on_session_data(current_session_stamp)
+async def dashboard_view(request):
+    user = await request.auser()
+    try:
+        current_session = await AcademicSession.objects.aget(user=user, is_current=True)
+    except AcademicSession.DoesNotExist:
+        messages.info(request, "Please set up your current academic session to get started.")
+        return redirect('add_academic_session')
+
+    subjects, exam_dates = await asyncio.gather(
+        _alist(Subject.objects.filter(session=current_session).order_by('name')),
+        _alist(ExamDate.objects.filter(session=current_session).order_by('start_date')),
+    )
+    # Compiling the calendar and the eligibility cache are sync code
+    context = await sync_to_async(_dashboard_context)(current_session, subjects, exam_dates)
+    return await arender(request, 'attendance/dashboard.html', context)
+
+
+@login_required
+@read_only_view
+async def academic_session_list(request):
+    user = await request.auser()
+    sessions = await _alist(AcademicSession.objects.filter(user=user).order_by('-start_date'))
+    return await arender(request, 'attendance/academic_session_list.html', {'sessions': sessions})
+
+
+@login_required
+@read_only_view
+@conditional_on_session_data(subject_session_stamp)
+async def subject_detail(request, pk):
+    user = await request.auser()
+    subject = await aget_object_or_404(Subject.objects.select_related('session'), pk=pk, session__user=user)
+    try:
+        before = parse_history_cursor(request.GET.get('before'))
+    except ValueError:
+        before = None
+    today = datetime.today().date()
+    # The history page (records) and the eligibility (exams, holidays via the calendar) are independent
+    (attendance_records, next_cursor), eligibility_info = await asyncio.gather(
+        sync_to_async(AttendanceRecord.objects.filter(subject=subject).history_page)(before),
+        sync_to_async(_subject_eligibility)(subject, today),
+    )
+    context = _subject_detail_context(subject, attendance_records, next_cursor, eligibility_info)
+    return await arender(request, 'attendance/subject_detail.html', context)
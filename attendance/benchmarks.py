@@ -0,0 +1,403 @@
+# attendance/benchmarks.py
+# Microbenchmarks for the hot paths of the app. Run them with `python manage.py benchmark`.
+import csv
+import io
+import random
+import tempfile
+import timeit
+import tracemalloc
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Sum
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.urls import resolve
+
+from .eligibility import evaluate_eligibility, evaluate_pair_reference, project_class_totals, what_if_curves
+from .exporters import RECORD_COLUMNS, csv_chunks, record_rows
+from .importers import import_holidays_csv
+from .metrics import MetricsMiddleware, get_recorder, reset_recorder
+from .models import AcademicSession, AttendanceRecord, ExamDate, Holiday, MonthlyAttendance, Subject, WeeklyAttendance, aggregate_rollups
+from .query_audit import hot_queries
+from .synthetic import generate_dataset
+from .workdays import DEFAULT_RULES, CompiledCalendar, get_working_days_count, get_working_days_count_by_loop, is_working_day
+
+BENCHMARKS = {}
+
+
+def benchmark(name, needs_db=False):
+    """
+    Registers a benchmark function under `name`. The function takes the command's
+    `stdout` writer and returns a dict of measured numbers. Benchmarks with `needs_db`
+    are run against a throwaway test database.
+    """
+    def decorator(func):
+        func.needs_db = needs_db
+        BENCHMARKS[name] = func
+        return func
+    return decorator
+
+
+def best_of(func, repeat=5, number=1):
+    """Returns the fastest time (in seconds) for one call of `func`."""
+    return min(timeit.repeat(func, repeat=repeat, number=number)) / number
+
+
+@benchmark('working_days')
+def bench_working_days(write):
+    results = {}
+    rng = random.Random(42)
+    start = date(2024, 7, 1)
+    for years in (0.5, 1, 5, 20):
+        end = start + timedelta(days=int(365 * years))
+        span = (end - start).days
+        holidays = sorted({start + timedelta(days=rng.randrange(span)) for _ in range(int(15 * years) + 1)})
+        holiday_set = set(holidays)
+
+        loop_time = best_of(lambda: get_working_days_count_by_loop(start, end, holiday_set), number=20)
+        closed_time = best_of(lambda: get_working_days_count(start, end, holidays), number=200)
+        assert get_working_days_count(start, end, holidays) == get_working_days_count_by_loop(start, end, holiday_set)
+
+        results[f'{years}y'] = {'loop_us': loop_time * 1e6, 'closed_form_us': closed_time * 1e6}
+        write(f"{span + 1:>6} days: loop {loop_time * 1e6:10.1f} us | closed form {closed_time * 1e6:8.1f} us | x{loop_time / closed_time:.0f}")
+    return results
+
+
+def _scheduled_classes_by_loop(start, end, holiday_set, rules, timetable):
+    classes = 0
+    day = start
+    while day <= end:
+        if is_working_day(day, rules) and day not in holiday_set:
+            classes += timetable[day.weekday()]
+        day += timedelta(days=1)
+    return classes
+
+
+@benchmark('timetable')
+def bench_timetable(write):
+    """Counts the classes a weekly timetable holds between two dates: day loop vs compiled per-weekday prefix sums."""
+    results = {}
+    rng = random.Random(42)
+    timetable = [1, 0, 2, 0, 1, 1, 0]
+    start = date(2024, 7, 1)
+    for years in (0.5, 1, 5):
+        end = start + timedelta(days=int(365 * years))
+        span = (end - start).days
+        holidays = sorted({start + timedelta(days=rng.randrange(span)) for _ in range(int(15 * years) + 1)})
+        holiday_set = set(holidays)
+        calendar = CompiledCalendar.compile(start, end, holidays, DEFAULT_RULES)
+
+        def lookup():
+            return sum(classes * days for classes, days in zip(timetable, calendar.working_days_by_weekday(start, end)))
+
+        loop_time = best_of(lambda: _scheduled_classes_by_loop(start, end, holiday_set, DEFAULT_RULES, timetable), number=20)
+        lookup_time = best_of(lookup, number=200)
+        assert lookup() == _scheduled_classes_by_loop(start, end, holiday_set, DEFAULT_RULES, timetable)
+
+        results[f'{years}y'] = {'loop_us': loop_time * 1e6, 'lookup_us': lookup_time * 1e6}
+        write(f"{span + 1:>6} days: loop {loop_time * 1e6:10.1f} us | prefix lookup {lookup_time * 1e6:8.1f} us | x{loop_time / lookup_time:.0f}")
+    return results
+
+
+@benchmark('eligibility')
+def bench_eligibility(write):
+    """Evaluates 100k subject x exam pairs (20k subjects x 5 exams) in one batch vs one pair at a time."""
+    rng = np.random.default_rng(42)
+    subjects, exams = 20_000, 5
+    conducted = rng.integers(0, 150, subjects)
+    attended = (conducted * rng.uniform(0.4, 1.0, subjects)).astype(np.int64)
+    per_week = rng.integers(1, 8, subjects)
+    minimum_bp = rng.choice([6000, 7500, 8000, 8550], subjects)
+    elapsed = 60
+    to_exam = np.array([40, 70, 90, 110, 140])
+    exam_past = to_exam < elapsed
+
+    def batch():
+        projected, _ = project_class_totals(conducted[:, None], per_week[:, None], elapsed, to_exam)
+        return evaluate_eligibility(conducted[:, None], attended[:, None], minimum_bp[:, None], projected, exam_past)
+
+    pairs = [
+        (int(conducted[i]), int(attended[i]), Decimal(int(minimum_bp[i])) / 100, int(per_week[i]), elapsed, int(to_exam[j]), bool(exam_past[j]))
+        for i in range(subjects) for j in range(exams)
+    ]
+
+    def per_pair():
+        return [evaluate_pair_reference(*pair) for pair in pairs]
+
+    batch_time = best_of(batch, repeat=5)
+    loop_time = best_of(per_pair, repeat=1)
+    write(f"{subjects * exams} pairs: per-pair {loop_time * 1e3:8.1f} ms | batch {batch_time * 1e3:6.1f} ms | x{loop_time / batch_time:.0f}")
+    return {'pairs': subjects * exams, 'per_pair_ms': loop_time * 1e3, 'batch_ms': batch_time * 1e3}
+
+
+@benchmark('what_if')
+def bench_what_if(write):
+    """
+    What-if curves (every number of misses) and 3 target solves for 200 subjects x 4 exams: one vectorized
+    call vs evaluating each what-if separately, as reloading the subject page per guess does.
+    """
+    rng = np.random.default_rng(42)
+    subjects, exams = 200, 4
+    conducted = rng.integers(10, 80, subjects)[:, None]
+    attended = (conducted * rng.uniform(0.5, 1.0, (subjects, 1))).astype(np.int64)
+    minimum_bp = rng.choice([6000, 7500, 8000], subjects)[:, None]
+    projected = conducted + np.array([15, 30, 45, 60])
+    targets = [7000, 8000, 9000]
+
+    def batch():
+        return what_if_curves(conducted, attended, minimum_bp, projected, targets)
+
+    def per_what_if():
+        results = []
+        for i in range(subjects):
+            for j in range(exams):
+                remaining = int(projected[i, j] - conducted[i, 0])
+                # Each point: the eligibility once the remaining classes are held, m of them missed
+                results.append([
+                    int(evaluate_eligibility(projected[i, j], attended[i, 0] + remaining - m, minimum_bp[i, 0], projected[i, j]).status)
+                    for m in range(remaining + 1)
+                ])
+                results.append([int(evaluate_eligibility(conducted[i, 0], attended[i, 0], target, projected[i, j]).classes_can_miss) for target in targets])
+        return results
+
+    batch_time = best_of(batch, repeat=5)
+    loop_time = best_of(per_what_if, repeat=1)
+    points = int((projected - conducted + 1).sum())
+    write(f"{points} curve points: one at a time {loop_time * 1e3:8.1f} ms | vectorized {batch_time * 1e3:6.2f} ms | x{loop_time / batch_time:.0f}")
+    return {'points': points, 'per_what_if_ms': loop_time * 1e3, 'batch_ms': batch_time * 1e3}
+
+
+def _import_holidays_by_row(session, rows):
+    """The original upload_holidays loop: every format tried per row, one INSERT per holiday."""
+    added = 0
+    for date_str, name in rows:
+        holiday_date = None
+        for fmt in ('%Y-%m-%d', '%d-%m-%Y', '%m/%d/%Y', '%d/%m/%Y', '%Y/%m/%d'):
+            try:
+                holiday_date = datetime.strptime(date_str, fmt).date()
+                break
+            except ValueError:
+                continue
+        if holiday_date is None or not (session.start_date <= holiday_date <= session.end_date):
+            continue
+        try:
+            with transaction.atomic():
+                Holiday.objects.create(session=session, date=holiday_date, name=name)
+            added += 1
+        except IntegrityError:
+            pass
+    return added
+
+
+@benchmark('holiday_import', needs_db=True)
+def bench_holiday_import(write):
+    """Imports 10k holidays (DD/MM/YYYY, with 10% duplicates) per row vs set-based."""
+    start = date(2000, 1, 1)
+    rows = [((start + timedelta(days=i)).strftime('%d/%m/%Y'), f'Holiday {i}') for i in range(9_000)]
+    rows += rows[:1_000]
+    lines = [f'{date_str},{name}' for date_str, name in rows]
+
+    results = {}
+    for label, run in (('per_row', lambda session: _import_holidays_by_row(session, rows)),
+                       ('set_based', lambda session: import_holidays_csv(session, lines).created)):
+        user = User.objects.create_user(f'holiday-benchmark-{label}')
+        session = AcademicSession.objects.create(user=user, name=label, start_date=start, end_date=date(2029, 12, 31))
+        elapsed = best_of(lambda: run(session), repeat=1)
+        assert Holiday.objects.filter(session=session).count() == 9_000
+        results[f'{label}_ms'] = elapsed * 1e3
+    write(f"{len(rows)} rows: per-row {results['per_row_ms']:8.1f} ms | set-based {results['set_based_ms']:6.1f} ms | x{results['per_row_ms'] / results['set_based_ms']:.0f}")
+    return results
+
+
+def _build_hot_query_dataset(users=20_000, sessions_per_user=3, subjects=200, days=1_000):
+    """
+    Many users with a few sessions each, plus one heavy user whose current session has
+    `subjects` subjects with `days` attendance records each. Returns the heavy user, session and subject.
+    """
+    rng = random.Random(42)
+    User.objects.bulk_create(
+        (User(username=f'user{i}', email=f'user{i}@example.com', password='!') for i in range(users)), batch_size=5_000
+    )
+    user_ids = list(User.objects.values_list('id', flat=True))
+    AcademicSession.objects.bulk_create(
+        (AcademicSession(user_id=user_id, name=f'Term {n}', start_date=date(2000 + n, 1, 1), end_date=date(2000 + n, 6, 30))
+         for user_id in user_ids for n in range(sessions_per_user)),
+        batch_size=5_000,
+    )
+    session_ids = list(AcademicSession.objects.values_list('id', flat=True))
+    ExamDate.objects.bulk_create(
+        (ExamDate(session_id=session_id, exam_type=exam_type, start_date=date(2000, 1, 1) + timedelta(days=rng.randrange(9_000)))
+         for session_id in session_ids for exam_type in ('Mid Term', 'End Term')),
+        batch_size=5_000,
+    )
+
+    heavy_user = User.objects.create_user('heavy', email='heavy@example.com')
+    start = date(2020, 1, 1)
+    session = AcademicSession.objects.create(user=heavy_user, name='Long', start_date=start, end_date=start + timedelta(days=days), is_current=True)
+    subject_list = Subject.objects.bulk_create(Subject(session=session, name=f'Subject {i}', classes_per_week=4) for i in range(subjects))
+    AttendanceRecord.objects.bulk_create(
+        (AttendanceRecord(subject=subject, date=start + timedelta(days=day), classes_conducted=2, classes_attended=rng.randint(0, 2))
+         for subject in subject_list for day in range(days)),
+        batch_size=5_000,
+    )
+    return heavy_user, session, subject_list[subjects // 2]
+
+
+# Indexes added for the hot queries by migration 0009, which the benchmark drops to time the "before" plans
+HOT_QUERY_INDEXES = (
+    (AcademicSession, 'session_user_start_idx'),
+    (AttendanceRecord, 'record_subject_date_cover_idx'),
+    (ExamDate, 'exam_session_start_idx'),
+)
+
+
+@benchmark('hot_queries', needs_db=True)
+def bench_hot_queries(write):
+    """Times each hot query on a large synthetic dataset with the hot-query indexes, then without them."""
+    user, session, subject = _build_hot_query_dataset()
+    AcademicSession.objects.bulk_create(
+        AcademicSession(user=user, name=f'Old term {n}', start_date=date(1990 + n, 1, 1), end_date=date(1990 + n, 6, 30)) for n in range(25)
+    )
+    queries = hot_queries(user.pk, session.pk, subject.pk)
+    queries['signup_email'] = User.objects.filter(email='user12345@example.com').values('pk')[:1]
+
+    def time_all():
+        # Timed as raw SQL so the ORM's row building doesn't drown out the plan differences
+        timings = {}
+        with connection.cursor() as cursor:
+            for name, queryset in queries.items():
+                sql, params = queryset.query.sql_with_params()
+                timings[name] = best_of(lambda: cursor.execute(sql, params).fetchall(), number=50)
+        return timings
+
+    indexes = [(model, next(index for index in model._meta.indexes if index.name == name)) for model, name in HOT_QUERY_INDEXES]
+    with connection.schema_editor() as editor:
+        for model, index in indexes:
+            editor.remove_index(model, index)
+        editor.execute('DROP INDEX IF EXISTS attendance_user_email_idx')
+    time_all() # warm the page cache
+    without_indexes = time_all()
+    with connection.schema_editor() as editor:
+        for model, index in indexes:
+            editor.add_index(model, index)
+        editor.execute('CREATE INDEX attendance_user_email_idx ON auth_user (email)')
+    with_indexes = time_all()
+
+    results = {}
+    for name in queries:
+        before, after = without_indexes[name] * 1e6, with_indexes[name] * 1e6
+        results[name] = {'before_us': before, 'after_us': after}
+        write(f"{name:>18}: before {before:9.1f} us | after {after:9.1f} us | x{before / after:.1f}")
+    return results
+
+
+@benchmark('metrics_overhead', needs_db=True)
+def bench_metrics_overhead(write):
+    """Cost per request of MetricsMiddleware around a view running 5 small queries, including its periodic flushes."""
+    body = b'x' * 5_000
+
+    def view(request):
+        with connection.cursor() as cursor:
+            for _ in range(5):
+                cursor.execute('SELECT 1')
+        return HttpResponse(body)
+
+    request = RequestFactory().get('/')
+    request.resolver_match = resolve('/')
+    middleware = MetricsMiddleware(view)
+    requests = 20_000
+    with override_settings(DEBUG=False): # no query logging, as in production
+        bare = best_of(lambda: view(request), number=requests)
+    write(f"view alone: {bare * 1e6:6.1f} us per request")
+
+    results = {'view_us': bare * 1e6}
+    for flush_interval in (1.0, 0.01):
+        with tempfile.TemporaryDirectory() as directory, override_settings(
+            DEBUG=False, METRICS_STORE_PATH=Path(directory) / 'metrics.sqlite3', METRICS_FLUSH_INTERVAL=flush_interval,
+        ):
+            reset_recorder()
+            try:
+                measured = best_of(lambda: middleware(request), number=requests)
+                get_recorder().flush()
+                assert get_recorder().store.read(), "metrics were never flushed"
+            finally:
+                reset_recorder()
+        overhead = (measured - bare) * 1e6
+        results[f'overhead_us_flush_{flush_interval}s'] = overhead
+        write(f"with metrics, flushing every {flush_interval * 1e3:4.0f} ms: {measured * 1e6:6.1f} us per request | overhead {overhead:5.1f} us")
+    return results
+
+
+@benchmark('session_rollups', needs_db=True)
+def bench_session_rollups(write):
+    """Session summary sums read from the rollup tables versus aggregated from the raw records, as history grows."""
+    results = {}
+    for years in (1, 3):
+        prefix = f'rollup-benchmark-{years}y-'
+        generate_dataset(users=1, sessions_per_user=1, subjects_per_session=8, days=365 * years, holidays_per_session=0,
+                         exams_per_session=0, username_prefix=prefix)
+        session = AcademicSession.objects.get(user__username=f'{prefix}0')
+        records = AttendanceRecord.objects.filter(subject__session=session)
+
+        def from_records():
+            list(aggregate_rollups(MonthlyAttendance, records))
+            list(aggregate_rollups(WeeklyAttendance, records).values('period_start').annotate(total=Sum('classes_conducted')))
+
+        def from_rollups():
+            list(MonthlyAttendance.objects.filter(subject__session=session).values_list('subject_id', 'period_start', 'classes_conducted', 'classes_attended'))
+            list(WeeklyAttendance.objects.filter(subject__session=session).order_by('period_start').values('period_start').annotate(total=Sum('classes_conducted')))
+
+        raw, rolled = best_of(from_records, number=5), best_of(from_rollups, number=20)
+        results[f'{years}y'] = {'records': records.count(), 'from_records_ms': raw * 1e3, 'from_rollups_ms': rolled * 1e3}
+        write(f"{years}y ({results[f'{years}y']['records']} records): from records {raw * 1e3:7.2f} ms | from rollups {rolled * 1e3:6.2f} ms | x{raw / rolled:.0f}")
+    return results
+
+
+@benchmark('export', needs_db=True)
+def bench_export(write):
+    """Peak memory and time of the streaming CSV export vs building the whole CSV in memory, as history grows."""
+    results = {}
+    for years in (1, 4):
+        prefix = f'export-benchmark-{years}y-'
+        generate_dataset(users=1, sessions_per_user=1, subjects_per_session=8, days=365 * years, holidays_per_session=0,
+                         exams_per_session=0, username_prefix=prefix)
+        sessions = list(AcademicSession.objects.filter(user__username=f'{prefix}0'))
+
+        def in_memory():
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(RECORD_COLUMNS)
+            records = AttendanceRecord.objects.filter(subject__session__in=sessions).select_related('subject__session').order_by(
+                'subject__name', 'date',
+            )
+            writer.writerows(
+                (record.subject.session.name, record.subject.name, record.subject.code, record.date.isoformat(),
+                 record.classes_conducted, record.classes_attended)
+                for record in records
+            )
+            return buffer.getvalue()
+
+        def streamed():
+            for _ in csv_chunks(RECORD_COLUMNS, record_rows(sessions)):
+                pass
+
+        numbers = {}
+        for label, func in (('in_memory', in_memory), ('streamed', streamed)):
+            tracemalloc.start()
+            try:
+                func()
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            numbers[f'{label}_ms'] = best_of(func, repeat=3) * 1e3
+            numbers[f'{label}_peak_kb'] = peak / 1024
+        count = AttendanceRecord.objects.filter(subject__session__in=sessions).count()
+        results[f'{years}y'] = {'records': count, **numbers}
+        write(f"{years}y ({count} records): in memory {numbers['in_memory_ms']:7.1f} ms, peak {numbers['in_memory_peak_kb']:8.0f} KB"
+              f" | streamed {numbers['streamed_ms']:7.1f} ms, peak {numbers['streamed_peak_kb']:6.0f} KB")
+    return results
@@ -0,0 +1,82 @@
+# attendance/conditional.py
+# Conditional GET for the pages built from one academic session's data (dashboard, subject detail).
+#
+# Every change to a session's data stamps its data_modified_at (see mark_sessions_modified()), and the
+# projections on these pages also change with the date. A page's ETag and Last-Modified are derived
+# from that stamp and today's date, which one small query reads, so a browser revalidating an
+# unchanged page gets a 304 before the view runs any of its queries or renders its template.
+import hashlib
+from datetime import date, datetime, time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.contrib.messages import get_messages
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+def page_validators(request, user, data_modified_at, today):
+    """
+    Returns (etag, last_modified timestamp) for the page at the request's URL, as `user` sees it,
+    built from session data stamped `data_modified_at`. The ETag is weak: renders of the same data
+    differ in their CSRF tokens.
+    """
+    source = f"{request.get_full_path()}:{user.pk}:{data_modified_at.isoformat()}:{today.isoformat()}"
+    etag = f'W/"{hashlib.sha1(source.encode()).hexdigest()}"'
+    start_of_today = timezone.make_aware(datetime.combine(today, time.min))
+    return etag, int(max(data_modified_at, start_of_today).timestamp())
+
+
+def conditional_on_session_data(stamp_query):
+    """
+    Decorates a view, sync or async, whose page only depends on the requesting user, the URL and
+    the data of one session. `stamp_query(user, *args, **kwargs)` takes the view's arguments and
+    returns a queryset of that session's data_modified_at (a flat values_list); an empty one
+    leaves the request to the view, for its redirect or 404.
+
+    GET requests whose If-None-Match / If-Modified-Since match get a 304 without calling the view.
+    Requests with messages waiting to be shown always render the page.
+    """
+    def decorator(view):
+        def check(request, user, data_modified_at):
+            """Returns (a 304 response or None, the page's (etag, last_modified) or None)."""
+            if data_modified_at is None:
+                return None, None
+            validators = page_validators(request, user, data_modified_at, date.today()) # the views' notion of today
+            if len(get_messages(request)):
+                return None, validators
+            etag, last_modified = validators
+            return get_conditional_response(request, etag=etag, last_modified=last_modified), validators
+
+        def add_headers(response, validators):
+            if validators and response.status_code in (200, 304):
+                etag, last_modified = validators
+                response.headers.setdefault('ETag', etag)
+                response.headers.setdefault('Last-Modified', http_date(last_modified))
+            return response
+
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if request.method not in SAFE_METHODS:
+                    return await view(request, *args, **kwargs)
+                user = await request.auser()
+                not_modified, validators = check(request, user, await stamp_query(user, *args, **kwargs).afirst())
+                if not_modified is not None:
+                    return add_headers(not_modified, validators)
+                return add_headers(await view(request, *args, **kwargs), validators)
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in SAFE_METHODS:
+                return view(request, *args, **kwargs)
+            not_modified, validators = check(request, request.user, stamp_query(request.user, *args, **kwargs).first())
+            if not_modified is not None:
+                return add_headers(not_modified, validators)
+            return add_headers(view(request, *args, **kwargs), validators)
+        return wrapper
+    return decorator
@@ -0,0 +1,59 @@
+# attendance/db_routers.py
+# Sends the reads of read-only views to a separate read connection, when one is configured
+# (see attendance_eligibility_project/database.py). Everything else uses 'default'.
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.db import DEFAULT_DB_ALIAS, connections
+
+READ_DATABASE_ALIAS = 'read'
+
+_read_only = ContextVar('attendance_read_only_database', default=False)
+
+
+@contextmanager
+def read_only_database():
+    """Routes the reads made inside the block to the read connection."""
+    token = _read_only.set(True)
+    try:
+        yield
+    finally:
+        _read_only.reset(token)
+
+
+def read_only_view(view):
+    """Decorates a view, sync or async, whose reads can all go to the read connection."""
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            # Queries run through sync_to_async, which carries the context into its thread
+            with read_only_database():
+                return await view(request, *args, **kwargs)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        with read_only_database():
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ReadRoutingRouter:
+    def db_for_read(self, model, **hints):
+        # Reads inside a transaction on 'default' stay on it, to see that transaction's writes
+        if _read_only.get() and READ_DATABASE_ALIAS in connections.settings and not connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return READ_DATABASE_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Explicitly 'default': left to Django, an instance read through the read connection would be saved back to it
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases are the same database
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != READ_DATABASE_ALIAS
@@ -0,0 +1,424 @@
+# attendance/eligibility.py
+# Attendance projection and eligibility rules, independent of views and the ORM.
+#
+# All decisions use integer arithmetic: percentages are basis points (75.00% == 7500) and
+# every division that feeds a class count is an exact round-half-even division, which is what
+# Python's round() does on the exact value. Floats are only used for displayed percentages.
+from datetime import timedelta
+from decimal import Decimal
+from fractions import Fraction
+from typing import NamedTuple
+
+import numpy as np
+
+# Define a minimum threshold for relying on observed historical data
+# If fewer than this many classes have been conducted, fall back to theoretical model
+MIN_CLASSES_FOR_HISTORICAL_PROJECTION = 5 # Adjust this number as needed (e.g., 10 or 15)
+
+# Only used by the theoretical fallback when historical data isn't sufficient
+AVERAGE_WORKING_DAYS_PER_WEEK = Fraction(11, 2) # 5.5
+
+# Status codes returned by the batch API
+STATUS_EXAM_PAST = 0
+STATUS_NOT_APPLICABLE = 1
+STATUS_INELIGIBLE = 2
+STATUS_NEEDS_ATTENTION = 3
+STATUS_GOOD = 4
+STATUS_GOOD_NO_MISSES_LEFT = 5
+STATUS_GOOD_ALL_CLASSES_DONE = 6
+
+STATUS_LABELS = (
+    'Exam Past',
+    'Not Applicable',
+    'Ineligible',
+    'Needs Attention',
+    'Good',
+    'Good (No Misses Left)',
+    'Good (All Classes Done)',
+)
+
+# How the projected class total was obtained
+PROJECTION_EXAM_PAST = 0
+PROJECTION_BEFORE_SESSION = 1
+PROJECTION_HISTORICAL = 2
+PROJECTION_THEORETICAL = 3
+PROJECTION_TIMETABLE = 4
+
+PROJECTION_DETAILS = (
+    '',
+    "Exam date before session start.",
+    "Based on observed historical class rate.",
+    "Based on theoretical schedule (insufficient historical data).",
+    "Based on the subject's weekly timetable.",
+)
+
+
+def to_basis_points(percentage):
+    """75.00 (Decimal, float or str) -> 7500."""
+    return int((Decimal(str(percentage)) * 100).to_integral_value())
+
+
+def divide_round_half_even(numerator, denominator):
+    """
+    Element-wise round(numerator / denominator) on integer arrays, computed exactly.
+    `denominator` must be positive.
+    """
+    quotient, remainder = np.divmod(numerator, denominator)
+    twice = 2 * remainder
+    return quotient + ((twice > denominator) | ((twice == denominator) & (quotient % 2 == 1)))
+
+
+def project_class_totals(total_conducted, classes_per_week, working_days_elapsed, working_days_to_exam, scheduled_classes=-1):
+    """
+    Projects the total number of classes conducted by each exam.
+
+    Takes broadcastable integer arrays (typically subjects as a column, exams as a row) and
+    returns (projected_classes, projection_method). A negative working_days_to_exam marks an
+    exam before the session start. `scheduled_classes` is the number of classes a subject's
+    timetable still holds before each exam, or -1 for a subject without a timetable; where it
+    is known, the projection is exact rather than extrapolated. The projection is never below
+    total_conducted.
+    """
+    total_conducted = np.asarray(total_conducted, dtype=np.int64)
+    classes_per_week = np.asarray(classes_per_week, dtype=np.int64)
+    working_days_elapsed = np.asarray(working_days_elapsed, dtype=np.int64)
+    working_days_to_exam = np.asarray(working_days_to_exam, dtype=np.int64)
+    scheduled_classes = np.asarray(scheduled_classes, dtype=np.int64)
+
+    before_session = working_days_to_exam < 0
+    days = np.maximum(working_days_to_exam, 0)
+
+    # Historical: (conducted / elapsed days) * days until the exam
+    historical = (total_conducted >= MIN_CLASSES_FOR_HISTORICAL_PROJECTION) & (working_days_elapsed > 0)
+    by_history = divide_round_half_even(total_conducted * days, np.maximum(working_days_elapsed, 1))
+    # Theoretical: (days until the exam / 5.5) * classes per week
+    by_schedule = divide_round_half_even(
+        days * classes_per_week * AVERAGE_WORKING_DAYS_PER_WEEK.denominator, AVERAGE_WORKING_DAYS_PER_WEEK.numerator
+    )
+
+    # Timetable: the classes held so far plus those scheduled from now until the exam
+    timetabled = scheduled_classes >= 0
+    by_timetable = total_conducted + np.maximum(scheduled_classes, 0)
+
+    projected = np.where(before_session, 0, np.where(timetabled, by_timetable, np.where(historical, by_history, by_schedule)))
+    method = np.where(
+        before_session, PROJECTION_BEFORE_SESSION,
+        np.where(timetabled, PROJECTION_TIMETABLE, np.where(historical, PROJECTION_HISTORICAL, PROJECTION_THEORETICAL)),
+    )
+    # Ensure projected total is at least what's already conducted
+    return np.maximum(projected, total_conducted), method
+
+
+class EligibilityBatch(NamedTuple):
+    status: np.ndarray
+    total_projected_classes: np.ndarray
+    classes_remaining_to_be_conducted: np.ndarray
+    min_required_classes: np.ndarray
+    classes_to_attend_for_eligibility: np.ndarray
+    classes_can_miss: np.ndarray
+
+
+def evaluate_eligibility(total_conducted, total_attended, minimum_basis_points, projected_classes, exam_past=False):
+    """
+    Evaluates eligibility for many subject x exam pairs in one vectorized call.
+
+    All arguments are broadcastable integer arrays (thresholds in basis points); `exam_past`
+    is a boolean array. Returns an EligibilityBatch of arrays with the broadcast shape.
+    """
+    conducted = np.asarray(total_conducted, dtype=np.int64)
+    attended = np.asarray(total_attended, dtype=np.int64)
+    minimum = np.asarray(minimum_basis_points, dtype=np.int64)
+    projected = np.asarray(projected_classes, dtype=np.int64)
+    exam_past = np.asarray(exam_past, dtype=bool)
+    shape = np.broadcast_shapes(conducted.shape, attended.shape, minimum.shape, projected.shape, exam_past.shape)
+    conducted, attended, minimum, projected, exam_past = (
+        np.broadcast_to(array, shape) for array in (conducted, attended, minimum, projected, exam_past)
+    )
+
+    applicable = ~exam_past & (projected > 0)
+    remaining = np.maximum(0, projected - conducted)
+    min_required = divide_round_half_even(minimum * projected, 10000)
+
+    # Reachable if attending every remaining class gets to the minimum percentage
+    reachable = (attended + remaining) * 10000 >= minimum * projected
+    needed = np.maximum(0, min_required - attended)
+    misses_left = np.minimum(np.maximum(0, (projected - min_required) - (conducted - attended)), remaining)
+
+    status = np.select(
+        [
+            exam_past,
+            ~applicable,
+            ~reachable,
+            needed > 0,
+            (misses_left == 0) & (remaining > 0),
+            (misses_left == 0) & (remaining == 0),
+        ],
+        [
+            STATUS_EXAM_PAST,
+            STATUS_NOT_APPLICABLE,
+            STATUS_INELIGIBLE,
+            STATUS_NEEDS_ATTENTION,
+            STATUS_GOOD_NO_MISSES_LEFT,
+            STATUS_GOOD_ALL_CLASSES_DONE,
+        ],
+        STATUS_GOOD,
+    )
+    to_attend = np.where(~reachable, remaining, np.where(needed > 0, needed, 0))
+    can_miss = np.where(~reachable, 0, np.where(needed > 0, remaining - needed, misses_left))
+
+    return EligibilityBatch(
+        status=status,
+        total_projected_classes=np.where(exam_past, conducted, np.where(applicable, projected, 0)),
+        classes_remaining_to_be_conducted=np.where(applicable, remaining, 0),
+        min_required_classes=np.where(applicable, min_required, 0),
+        classes_to_attend_for_eligibility=np.where(applicable, to_attend, 0),
+        classes_can_miss=np.where(applicable, can_miss, 0),
+    )
+
+
+class ProjectedTotals(NamedTuple):
+    total_conducted: np.ndarray
+    total_attended: np.ndarray
+    minimum_basis_points: np.ndarray
+    projected_classes: np.ndarray
+    projection_method: np.ndarray
+    exam_past: np.ndarray
+
+
+def project_totals_batch(subjects, session, exams, calendar, today):
+    """
+    Projects the class totals of several subjects at each exam. Takes the same arguments as
+    project_eligibility_batch() and returns ProjectedTotals: subject columns (subjects x 1),
+    exam_past as a row (exams) and the projection as a subjects x exams grid.
+    """
+    # Calculate working days elapsed from session start to today (inclusive)
+    working_days_elapsed = calendar.working_days(session.start_date, today)
+    # Working days from session start to the day before each exam (-1 if that is before the session)
+    working_days_to_exam = [
+        calendar.working_days(session.start_date, exam.start_date - timedelta(days=1))
+        if exam.start_date - timedelta(days=1) >= session.start_date else -1
+        for exam in exams
+    ]
+    exam_past = np.array([exam.start_date <= today for exam in exams])
+
+    # Classes timetabled subjects still have before each exam: the working days left per weekday
+    # (exams x 7, from the calendar's per-weekday prefix sums) times classes per weekday (subjects x 7)
+    timetables = [getattr(subject, 'timetable', None) for subject in subjects]
+    scheduled = -1
+    if any(timetables):
+        first_day = max(today + timedelta(days=1), session.start_date)
+        weekday_days = np.array(
+            [calendar.working_days_by_weekday(first_day, exam.start_date - timedelta(days=1)) for exam in exams], dtype=np.int64
+        )
+        per_weekday = np.array([timetable or [0] * 7 for timetable in timetables], dtype=np.int64)
+        has_timetable = np.array([bool(timetable) for timetable in timetables])[:, None]
+        scheduled = np.where(has_timetable, per_weekday @ weekday_days.T, -1)
+
+    conducted = np.array([subject.total_conducted for subject in subjects], dtype=np.int64)[:, None]
+    attended = np.array([subject.total_attended for subject in subjects], dtype=np.int64)[:, None]
+    per_week = np.array([subject.classes_per_week for subject in subjects], dtype=np.int64)[:, None]
+    minimum = np.array([to_basis_points(subject.minimum_attendance_percentage) for subject in subjects], dtype=np.int64)[:, None]
+
+    projected, method = project_class_totals(conducted, per_week, working_days_elapsed, working_days_to_exam, scheduled)
+    method = np.where(exam_past, PROJECTION_EXAM_PAST, method)
+    return ProjectedTotals(conducted, attended, minimum, projected, method, exam_past)
+
+
+def project_eligibility_batch(subjects, session, exams, calendar, today):
+    """
+    Projects attendance eligibility of several subjects for each exam.
+
+    `subjects` only need their running totals, classes_per_week, minimum_attendance_percentage and
+    timetable (7 classes-per-weekday counts, or None); `calendar` is the session's CompiledCalendar.
+    Returns one {exam_type: info dict} per subject.
+    """
+    subjects = list(subjects)
+    exams = list(exams)
+    if not subjects or not exams:
+        return [{} for _ in subjects]
+
+    totals = project_totals_batch(subjects, session, exams, calendar, today)
+    batch = evaluate_eligibility(
+        totals.total_conducted, totals.total_attended, totals.minimum_basis_points, totals.projected_classes, totals.exam_past
+    )
+    method = totals.projection_method
+
+    # Convert to plain Python ints once, rather than per element
+    columns = {field: getattr(batch, field).tolist() for field in EligibilityBatch._fields}
+    method = method.tolist()
+    return [
+        {
+            exam.exam_type: _describe(subject, {field: values[row][col] for field, values in columns.items()}, method[row][col])
+            for col, exam in enumerate(exams)
+        }
+        for row, subject in enumerate(subjects)
+    ]
+
+
+# Statuses in which the minimum can still be met, by attending enough of the remaining classes
+REACHABLE_STATUSES = (STATUS_NEEDS_ATTENTION, STATUS_GOOD, STATUS_GOOD_NO_MISSES_LEFT, STATUS_GOOD_ALL_CLASSES_DONE)
+
+
+class WhatIfCurves(NamedTuple):
+    misses: np.ndarray
+    percentage: np.ndarray
+    eligible: np.ndarray
+    classes_remaining: np.ndarray
+    max_misses: np.ndarray
+    target_max_misses: np.ndarray
+
+
+def max_misses(batch):
+    """The most remaining classes each pair of an EligibilityBatch can miss and stay eligible, or -1 if it can't be."""
+    return np.where(np.isin(batch.status, REACHABLE_STATUSES), batch.classes_can_miss, -1)
+
+
+def what_if_curves(total_conducted, total_attended, minimum_basis_points, projected_classes, target_basis_points=()):
+    """
+    Evaluates, for many subject x exam pairs at once, every outcome of the classes still to be held:
+    missing m of them and attending the rest, for m from 0 to the most classes remaining in any pair.
+
+    Takes broadcastable integer arrays like evaluate_eligibility() (pairs of upcoming exams only) and
+    target percentages in basis points. Returns WhatIfCurves, where with pairs of shape P:
+    - misses (M): 0..M-1;
+    - percentage (P x M): the attendance percentage at the exam, NaN where m exceeds the remaining classes;
+    - eligible (P x M): whether the minimum is met after m misses;
+    - classes_remaining, max_misses (P): max_misses is -1 where the minimum can't be met;
+    - target_max_misses (P x targets): the same inverse solve for each target percentage.
+    The eligibility rules are evaluate_eligibility()'s, so max_misses is its classes_can_miss.
+    """
+    batch = evaluate_eligibility(total_conducted, total_attended, minimum_basis_points, projected_classes)
+    shape = batch.status.shape
+    attended = np.broadcast_to(np.asarray(total_attended, dtype=np.int64), shape)
+    projected = batch.total_projected_classes
+    remaining = batch.classes_remaining_to_be_conducted
+
+    misses = np.arange(int(remaining.max(initial=0)) + 1)
+    attended_at_exam = (attended + remaining)[..., None] - misses
+    possible = misses <= remaining[..., None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        percentage = np.where(possible & (projected[..., None] > 0), attended_at_exam * 100 / projected[..., None], np.nan)
+    limit = max_misses(batch)
+    eligible = possible & (misses <= limit[..., None])
+
+    # Each target is a minimum of its own, on a trailing axis
+    targets = np.asarray(target_basis_points, dtype=np.int64).reshape(-1)
+    target_batch = evaluate_eligibility(
+        np.asarray(total_conducted, dtype=np.int64)[..., None], attended[..., None], targets, projected[..., None]
+    )
+    return WhatIfCurves(misses, percentage, eligible, remaining, limit, np.broadcast_to(max_misses(target_batch), shape + targets.shape))
+
+
+def project_eligibility(subject, session, exams, calendar, today):
+    """
+    Projects a subject's attendance eligibility for each exam. Returns {exam_type: info dict}.
+    """
+    return project_eligibility_batch([subject], session, exams, calendar, today)[0]
+
+
+def _describe(subject, result, method):
+    """Builds the display dict the templates use from one evaluated subject x exam pair."""
+    total_conducted = subject.total_conducted
+    total_attended = subject.total_attended
+    current_percentage = subject.current_percentage
+    minimum = subject.minimum_attendance_percentage
+    status = result['status']
+
+    if status == STATUS_EXAM_PAST:
+        return {
+            'status': STATUS_LABELS[status],
+            'detail': 'This exam date has already passed.',
+            'total_projected_classes': total_conducted,
+            'projected_attended': total_attended,
+            'projected_percentage': current_percentage,
+            'classes_remaining_to_be_conducted': 0,
+            'min_required_classes': 0,
+            'classes_to_attend_for_eligibility': 0,
+            'classes_can_miss': 0,
+        }
+
+    if status == STATUS_NOT_APPLICABLE:
+        return {
+            'status': STATUS_LABELS[status],
+            'detail': 'Cannot project eligibility as no effective class days are expected before this exam date or subject has no classes.',
+            'total_projected_classes': 0,
+            'classes_remaining_to_be_conducted': 0,
+            'min_required_classes': 0,
+            'classes_to_attend_for_eligibility': 0,
+            'classes_can_miss': 0,
+            'current_percentage': current_percentage,
+            'projected_percentage_if_all_attended': 0,
+        }
+
+    projected = result['total_projected_classes']
+    remaining = result['classes_remaining_to_be_conducted']
+    to_attend = result['classes_to_attend_for_eligibility']
+    can_miss = result['classes_can_miss']
+    # Projected percentage if ALL remaining classes are attended
+    projected_percentage_if_all_attended = (total_attended + remaining) / projected * 100
+
+    if status == STATUS_INELIGIBLE:
+        detail = f"You cannot reach {minimum:.2f}% attendance for this exam, even if you attend all {remaining} remaining classes. Your max possible attendance will be {projected_percentage_if_all_attended:.2f}%."
+    elif status == STATUS_NEEDS_ATTENTION:
+        detail = f"You must attend at least {to_attend} more classes to reach {minimum:.2f}% eligibility. You can miss up to {can_miss} more classes."
+    elif status == STATUS_GOOD_NO_MISSES_LEFT:
+        detail = f"You are eligible, but you cannot miss any more of the remaining {remaining} classes to maintain {minimum:.2f}% eligibility for this exam."
+    elif status == STATUS_GOOD_ALL_CLASSES_DONE:
+        detail = "You are eligible. All projected classes for this exam are completed."
+    else:
+        detail = f"You can afford to miss up to {can_miss} more classes and still be eligible for this exam (reaching at least {minimum:.2f}%)."
+
+    projection_method_detail = PROJECTION_DETAILS[method]
+    return {
+        'status': STATUS_LABELS[status],
+        'detail': detail + (f" (Projection: {projection_method_detail})" if projection_method_detail else ""),
+        'total_projected_classes': projected,
+        'classes_remaining_to_be_conducted': remaining,
+        'min_required_classes': result['min_required_classes'],
+        'classes_to_attend_for_eligibility': to_attend,
+        'classes_can_miss': can_miss,
+        'current_percentage': current_percentage,
+        'projected_percentage_if_all_attended': projected_percentage_if_all_attended,
+    }
+
+
+def evaluate_pair_reference(total_conducted, total_attended, minimum_percentage, classes_per_week,
+                            working_days_elapsed, working_days_to_exam, exam_past=False):
+    """
+    The original per-subject float/Decimal computation for one subject x exam pair, kept as the
+    reference for equivalence tests and benchmarks. `working_days_to_exam` is -1 for an exam before
+    the session start. Returns (status, projected, remaining, min_required, to_attend, can_miss).
+
+    It differs from the integer engine only where a float lands exactly on a rounding tie or on
+    the threshold (e.g. 57/100 attended read as 56.999...% against a 57% minimum).
+    """
+    if exam_past:
+        return ('Exam Past', total_conducted, 0, 0, 0, 0)
+
+    if working_days_to_exam < 0:
+        projected = 0
+    elif total_conducted >= MIN_CLASSES_FOR_HISTORICAL_PROJECTION and working_days_elapsed > 0:
+        projected = round(total_conducted / working_days_elapsed * working_days_to_exam)
+    else:
+        projected = round((working_days_to_exam / 5.5) * classes_per_week)
+    projected = max(projected, total_conducted)
+    if projected <= 0:
+        return ('Not Applicable', 0, 0, 0, 0, 0)
+
+    remaining = max(0, projected - total_conducted)
+    min_required = round((minimum_percentage / 100) * projected)
+    projected_percentage_if_all_attended = (total_attended + remaining) / projected * 100
+
+    if projected_percentage_if_all_attended < minimum_percentage:
+        return ('Ineligible', projected, remaining, min_required, remaining, 0)
+    needed = max(0, min_required - total_attended)
+    if needed > 0:
+        return ('Needs Attention', projected, remaining, min_required, needed, remaining - needed)
+    can_miss = min(max(0, (projected - min_required) - (total_conducted - total_attended)), remaining)
+    if can_miss == 0 and remaining > 0:
+        status = 'Good (No Misses Left)'
+    elif can_miss == 0 and remaining == 0:
+        status = 'Good (All Classes Done)'
+    else:
+        status = 'Good'
+    return (status, projected, remaining, min_required, 0, can_miss)
@@ -0,0 +1,89 @@
+# attendance/eligibility_cache.py
+# Caches per-subject eligibility results in Django's cache framework.
+#
+# Entries are keyed by subject, the session's data_modified_at and the date, so they never need to
+# be deleted: any write to the session's records, exams, holidays, subjects or the session itself
+# stamps data_modified_at anew, in the transaction making the change, and the old entries are simply
+# never read again and age out through the cache backend's own size bound and eviction. The stamp is
+# read from the database with the session, so every process agrees on it whatever the cache backend;
+# the conditional GET of the session's pages (attendance/conditional.py) is based on it too.
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+HITS_KEY = 'eligibility:stats:hits'
+MISSES_KEY = 'eligibility:stats:misses'
+
+
+def get_cache():
+    return caches[getattr(settings, 'ELIGIBILITY_CACHE_ALIAS', 'default')]
+
+
+def _entry_key(subject_id, data_modified_at, today):
+    return f'eligibility:{subject_id}:{data_modified_at.isoformat()}:{today.isoformat()}'
+
+
+def mark_sessions_modified(session_ids):
+    """
+    Stamps the sessions' data_modified_at, orphaning their cached eligibility and changing the
+    validators of their pages. Until the surrounding transaction commits, other connections
+    still read the old stamp, with the old data.
+    """
+    from .models import AcademicSession
+    session_ids = set(session_ids)
+    if session_ids:
+        AcademicSession.objects.filter(pk__in=session_ids).update(data_modified_at=timezone.now())
+
+
+def mark_subject_sessions_modified(subject_ids):
+    from .models import Subject
+    mark_sessions_modified(Subject.objects.filter(pk__in=set(subject_ids)).values_list('session_id', flat=True))
+
+
+def _count(key, amount):
+    if not amount:
+        return
+    cache = get_cache()
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key, amount)
+    except ValueError: # evicted between add() and incr()
+        cache.add(key, amount, timeout=None)
+
+
+def get_cached_eligibility(session, subjects, today, compute):
+    """
+    Returns one eligibility dict per subject of `session`, as project_eligibility_batch would.
+    Only the subjects missing from the cache are passed to `compute(subjects)`,
+    which must return their dicts in the same order.
+    The session must have been read no later than the subjects, so its stamp isn't newer than their data.
+    """
+    subjects = list(subjects)
+    keys = [_entry_key(subject.pk, session.data_modified_at, today) for subject in subjects]
+
+    cache = get_cache()
+    found = cache.get_many(keys)
+    missing = [index for index, key in enumerate(keys) if key not in found]
+    _count(HITS_KEY, len(keys) - len(missing))
+    _count(MISSES_KEY, len(missing))
+
+    if missing:
+        computed = compute([subjects[index] for index in missing])
+        fresh = {keys[index]: info for index, info in zip(missing, computed)}
+        cache.set_many(fresh)
+        found.update(fresh)
+    return [found[key] for key in keys]
+
+
+def get_stats():
+    values = get_cache().get_many([HITS_KEY, MISSES_KEY])
+    hits, misses = values.get(HITS_KEY, 0), values.get(MISSES_KEY, 0)
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': hits / (hits + misses) if hits + misses else None,
+    }
+
+
+def reset_stats():
+    get_cache().delete_many([HITS_KEY, MISSES_KEY])
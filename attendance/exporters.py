@@ -0,0 +1,97 @@
+# attendance/exporters.py
+# Streaming CSV and JSON exports. Rows are read through server-side cursors a chunk at a time and
+# encoded as they are produced, so memory stays bounded by the chunk size whatever the size of the export.
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .eligibility_cache import get_cached_eligibility
+from .eligibility import project_eligibility_batch
+from .importers import _batches
+from .models import AttendanceRecord, ExamDate, Subject
+
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_RECORDS = 'records'
+EXPORT_SUMMARY = 'summary'
+
+RECORD_COLUMNS = ('session', 'subject', 'code', 'date', 'classes_conducted', 'classes_attended')
+SUMMARY_COLUMNS = (
+    'session', 'subject', 'code', 'classes_conducted', 'classes_attended', 'percentage', 'minimum_percentage',
+    'exam', 'exam_date', 'status', 'projected_classes', 'classes_to_attend', 'classes_can_miss',
+)
+
+
+class _Echo:
+    """A file-like object whose write() returns what it is given, so csv.writer produces strings."""
+
+    def write(self, value):
+        return value
+
+
+def record_rows(sessions, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yields a RECORD_COLUMNS row for every attendance record of `sessions`, by session, subject name
+    and date. Each subject's records are one range of the (subject, date) index, read chunk_size rows
+    at a time; ordering the whole export in a single query would make SQLite sort all of it first.
+    """
+    for session in sessions:
+        subjects = list(Subject.objects.filter(session=session).order_by('name', 'id').values_list('id', 'name', 'code'))
+        for subject_id, name, code in subjects:
+            records = AttendanceRecord.objects.filter(subject_id=subject_id).order_by('date').values_list(
+                'date', 'classes_conducted', 'classes_attended',
+            )
+            for record_date, conducted, attended in records.iterator(chunk_size=chunk_size):
+                yield (session.name, name, code, record_date.isoformat(), conducted, attended)
+
+
+def summary_rows(sessions, today):
+    """
+    Yields a SUMMARY_COLUMNS row for each subject of `sessions` and each of its session's upcoming
+    exams (one row with empty exam columns when there are none), with the subject's running totals
+    and the same eligibility as the dashboard.
+    """
+    for session in sessions:
+        subjects = list(Subject.objects.filter(session=session).order_by('name', 'id'))
+        if not subjects:
+            continue
+        exams = list(ExamDate.objects.filter(session=session).order_by('start_date'))
+        upcoming = [exam for exam in exams if exam.start_date > today]
+        calendar = session.get_calendar() if upcoming else None
+        eligibility = get_cached_eligibility(
+            session, subjects, today, lambda missing: project_eligibility_batch(missing, session, exams, calendar, today)
+        ) if upcoming else [{} for _ in subjects]
+
+        for subject, info in zip(subjects, eligibility):
+            totals = (
+                session.name, subject.name, subject.code, subject.total_conducted, subject.total_attended,
+                round(subject.current_percentage, 2), subject.minimum_attendance_percentage,
+            )
+            if not upcoming:
+                yield totals + (None,) * 6
+            for exam in upcoming:
+                exam_info = info[exam.exam_type]
+                yield totals + (
+                    exam.exam_type, exam.start_date.isoformat(), exam_info['status'], exam_info['total_projected_classes'],
+                    exam_info['classes_to_attend_for_eligibility'], exam_info['classes_can_miss'],
+                )
+
+
+def csv_chunks(columns, rows, rows_per_chunk=EXPORT_CHUNK_SIZE):
+    """Encodes a header and `rows` as CSV text, rows_per_chunk rows per yielded string."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for batch in _batches(rows, rows_per_chunk):
+        yield ''.join(writer.writerow(row) for row in batch)
+
+
+def json_chunks(key, columns, rows, rows_per_chunk=EXPORT_CHUNK_SIZE):
+    """Encodes `rows` as {key: [{column: value, ...}, ...]}, rows_per_chunk rows per yielded string."""
+    encoder = DjangoJSONEncoder()
+    yield f'{{{json.dumps(key)}: ['
+    separator = ''
+    for batch in _batches(rows, rows_per_chunk):
+        yield separator + ','.join(encoder.encode(dict(zip(columns, row))) for row in batch)
+        separator = ','
+    yield ']}'
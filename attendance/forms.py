@@ -1,6 +1,8 @@
 # attendance/forms.py
 import datetime
 from django import forms
+from django.core.exceptions import ValidationError
+from django.urls import reverse
 from .models import AcademicSession, Subject, AttendanceRecord, ExamDate, Holiday
 
 # ADD THIS IMPORT:
@@ -8,10 +10,83 @@ from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User # You might also need to import User model
 
 
+class BitmaskMultipleChoiceField(forms.TypedMultipleChoiceField):
+    """
+    Edits an integer bitmask as a set of checkboxes; each choice value is a bit position.
+    """
+    def __init__(self, **kwargs):
+        kwargs.setdefault('coerce', int)
+        kwargs.setdefault('required', False)
+        kwargs.setdefault('widget', forms.CheckboxSelectMultiple(attrs={'class': 'form-check-input'}))
+        super().__init__(**kwargs)
+
+    def prepare_value(self, value):
+        if isinstance(value, int):
+            return [bit for bit, _ in self.choices if value >> bit & 1]
+        return value
+
+    def clean(self, value):
+        return sum(1 << bit for bit in super().clean(value))
+
+    def has_changed(self, initial, data):
+        return super().has_changed(self.prepare_value(initial), data)
+
+
+WEEKDAY_NAMES = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+
+class TimetableWidget(forms.MultiWidget):
+    def __init__(self, attrs=None):
+        widgets = [
+            forms.NumberInput(attrs={'class': 'form-control d-inline-block me-1', 'style': 'width: 4.5rem', 'min': 0, 'placeholder': name[:3], 'title': name})
+            for name in WEEKDAY_NAMES
+        ]
+        super().__init__(widgets, attrs)
+
+    def decompress(self, value):
+        return value or [None] * 7
+
+
+class TimetableField(forms.MultiValueField):
+    """
+    Edits a subject timetable (classes on each weekday, Monday first) as seven number inputs.
+    Leaving every day empty or zero means the subject has no timetable.
+    """
+    widget = TimetableWidget
+
+    def __init__(self, **kwargs):
+        fields = [forms.IntegerField(min_value=0, max_value=20, required=False) for _ in WEEKDAY_NAMES]
+        kwargs.setdefault('required', False)
+        super().__init__(fields, require_all_fields=False, **kwargs)
+
+    def compress(self, data_list):
+        classes = [count or 0 for count in data_list] if data_list else []
+        return classes if any(classes) else None
+
+
 class AcademicSessionForm(forms.ModelForm):
+    working_weekdays = BitmaskMultipleChoiceField(
+        choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')],
+        label="Working Weekdays",
+        help_text="Days of the week that are always working days.",
+    )
+    working_saturday_weeks = BitmaskMultipleChoiceField(
+        choices=[(0, '1st'), (1, '2nd'), (2, '3rd'), (3, '4th'), (4, '5th')],
+        label="Working Saturdays",
+        help_text="Saturdays of each month that are working days (ignored if Saturday is a working weekday).",
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start_date = cleaned_data.get('start_date')
+        end_date = cleaned_data.get('end_date')
+        if start_date and end_date and end_date < start_date:
+            self.add_error('end_date', "The end date cannot be before the start date.")
+        return cleaned_data
+
     class Meta:
         model = AcademicSession
-        fields = ['name', 'start_date', 'end_date', 'is_current']
+        fields = ['name', 'start_date', 'end_date', 'is_current', 'working_weekdays', 'working_saturday_weeks']
         widgets = {
             'name': forms.TextInput(attrs={'class': 'form-control'}),
             'start_date': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
@@ -20,9 +95,27 @@ class AcademicSessionForm(forms.ModelForm):
         }
 
 class SubjectForm(forms.ModelForm):
+    timetable = TimetableField(
+        label="Weekly Timetable",
+        help_text="Optional: classes held on each weekday, Monday to Sunday. When given, it sets classes per week and makes projections exact.",
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['classes_per_week'].required = False # derived from the timetable when there is one
+
+    def clean(self):
+        cleaned_data = super().clean()
+        timetable = cleaned_data.get('timetable')
+        if timetable:
+            cleaned_data['classes_per_week'] = sum(timetable)
+        elif cleaned_data.get('classes_per_week') is None and 'classes_per_week' not in self.errors:
+            self.add_error('classes_per_week', "Enter classes per week, or fill in the weekly timetable.")
+        return cleaned_data
+
     class Meta:
         model = Subject
-        fields = ['name', 'code', 'classes_per_week', 'minimum_attendance_percentage']
+        fields = ['name', 'code', 'classes_per_week', 'timetable', 'minimum_attendance_percentage']
         widgets = {
             'name': forms.TextInput(attrs={'class': 'form-control'}),
             'code': forms.TextInput(attrs={'class': 'form-control'}),
@@ -50,9 +143,43 @@ class AttendanceRecordForm(forms.ModelForm):
             'classes_attended': forms.NumberInput(attrs={'class': 'form-control'}),
         }
 
+# Accounts with more sessions than this get a search box instead of a full dropdown
+SESSION_SELECT_SEARCH_THRESHOLD = 25
+
+
+class LazyModelSelect(forms.Select):
+    """
+    A select for a ModelChoiceField that renders only the selected option, fetching that
+    one row instead of the whole queryset. Other options are searched from `search_url`
+    in the browser.
+    """
+    def __init__(self, search_url, attrs=None):
+        super().__init__(attrs)
+        self.search_url = search_url
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget']['attrs']['data-search-url'] = self.search_url
+        return context
+
+    def optgroups(self, name, value, attrs=None):
+        field = self.choices.field
+        selected = {str(v) for v in value if v not in (None, '')}
+        choices = [('', field.empty_label)] if field.empty_label is not None else []
+        if selected:
+            try:
+                choices += [self.choices.choice(obj) for obj in field.queryset.filter(pk__in=selected)]
+            except (ValueError, ValidationError): # a submitted value that isn't a valid pk
+                pass
+        return [
+            (None, [self.create_option(name, option_value, label, str(option_value) in selected, index, attrs=attrs)], index)
+            for index, (option_value, label) in enumerate(choices)
+        ]
+
+
 class HolidayBulkForm(forms.Form):
     session = forms.ModelChoiceField(
-        queryset=AcademicSession.objects.all(),
+        queryset=AcademicSession.objects.none(),
         label="Academic Session",
         widget=forms.Select(attrs={'class': 'form-select'})
     )
@@ -63,6 +190,15 @@ class HolidayBulkForm(forms.Form):
         required=False
     )
 
+    def __init__(self, *args, user, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Only the user's own sessions are choices, so validation (a single scoped lookup) enforces ownership
+        field = self.fields['session']
+        field.queryset = AcademicSession.objects.filter(user=user).order_by('-start_date', '-id')
+        if field.queryset[:SESSION_SELECT_SEARCH_THRESHOLD + 1].count() > SESSION_SELECT_SEARCH_THRESHOLD:
+            field.widget = LazyModelSelect(reverse('session_search'), attrs={'class': 'form-select'})
+            field.widget.choices = field.choices
+
     def clean(self):
         cleaned_data = super().clean()
         holiday_dates_text = cleaned_data.get('holiday_dates_text')
@@ -79,6 +215,22 @@ class HolidayUploadForm(forms.Form):
         widget=forms.ClearableFileInput(attrs={'accept': '.csv'})
     )
 
+class AttendanceImportForm(forms.Form):
+    csv_file = forms.FileField(
+        label='Select a CSV file',
+        help_text='One record per row: subject name or code, date (YYYY-MM-DD), classes conducted, classes attended.',
+        widget=forms.ClearableFileInput(attrs={'accept': '.csv'})
+    )
+    mode = forms.ChoiceField(
+        choices=[
+            ('skip', 'Skip rows whose subject and date already have a record'),
+            ('upsert', 'Overwrite existing records with the values in the file'),
+        ],
+        initial='skip',
+        label='Existing records',
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+
 # --- ADD THIS NEW CLASS FOR SIGNUP ---
 class SignUpForm(UserCreationForm):
     class Meta:
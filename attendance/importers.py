@@ -0,0 +1,411 @@
+# attendance/importers.py
+# Bulk CSV imports. Rows are streamed and written in batches inside a single transaction,
+# so memory stays bounded by the batch size whatever the size of the file.
+import csv
+from datetime import date, datetime
+from itertools import chain, islice
+
+from django.db import connection, transaction
+
+from .eligibility_cache import mark_sessions_modified
+from .models import AttendanceRecord, Holiday, SessionCalendar, Subject
+
+IMPORT_BATCH_SIZE = 2000
+MAX_REPORTED_ERRORS = 50
+
+# Accepted date formats, ordered from most specific/least ambiguous to more common
+DATE_FORMATS = ('%Y-%m-%d', '%d-%m-%Y', '%m/%d/%Y', '%d/%m/%Y', '%Y/%m/%d')
+DATE_FORMAT_SAMPLE_SIZE = 50
+
+IMPORT_MODE_SKIP = 'skip'
+IMPORT_MODE_UPSERT = 'upsert'
+
+
+class ImportResult:
+    """Counts what an import did; keeps the first MAX_REPORTED_ERRORS error messages."""
+
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.skipped = 0
+        self.error_count = 0
+        self.errors = []
+
+    def add_error(self, row_num, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"Row {row_num}: {message}")
+
+    def error_messages(self):
+        """The kept error messages, plus a summary line for the ones dropped."""
+        hidden = self.error_count - len(self.errors)
+        return self.errors + ([f"...and {hidden} more errors."] if hidden else [])
+
+
+def _normalize(name):
+    return ' '.join(name.split()).casefold()
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def import_attendance_csv(session, lines, mode=IMPORT_MODE_SKIP, batch_size=IMPORT_BATCH_SIZE, result=None):
+    """
+    Imports attendance records for `session` from CSV text lines with the columns
+    subject (name or code), date (YYYY-MM-DD), classes conducted, classes attended.
+    A header row is skipped. Existing (subject, date) records are skipped or, in
+    upsert mode, overwritten. Returns an ImportResult (`result`, if given).
+    """
+    result = result or ImportResult()
+
+    # Resolve subjects by name or code with one query
+    subjects_by_key = {}
+    for subject_id, name, code in Subject.objects.filter(session=session).values_list('id', 'name', 'code'):
+        subjects_by_key.setdefault(_normalize(name), subject_id)
+        if code:
+            subjects_by_key.setdefault(_normalize(code), subject_id)
+
+    rows = enumerate(csv.reader(lines), start=1)
+    with transaction.atomic():
+        for batch in _batches(rows, batch_size):
+            valid = _validate_batch(batch, session, subjects_by_key, result)
+            if valid:
+                _write_batch(valid, mode, result)
+    return result
+
+
+def _validate_batch(batch, session, subjects_by_key, result):
+    """Returns {(subject_id, date): (conducted, attended, row_num)} for the batch's valid rows."""
+    valid = {}
+    for row_num, row in batch:
+        if not row or not any(cell.strip() for cell in row):
+            continue
+        if row_num == 1 and _normalize(row[0]) in ('subject', 'subject name', 'subject code'):
+            continue # Header row
+        if len(row) < 4:
+            result.add_error(row_num, "Expected 4 columns: subject, date, classes conducted, classes attended.")
+            continue
+
+        subject_id = subjects_by_key.get(_normalize(row[0]))
+        if subject_id is None:
+            result.add_error(row_num, f"Unknown subject '{row[0].strip()}'.")
+            continue
+        try:
+            record_date = date.fromisoformat(row[1].strip())
+        except ValueError:
+            result.add_error(row_num, f"Invalid date '{row[1].strip()}'. Please use YYYY-MM-DD.")
+            continue
+        if not (session.start_date <= record_date <= session.end_date):
+            result.add_error(row_num, f"Date {record_date} is outside the session dates ({session.start_date} to {session.end_date}).")
+            continue
+        try:
+            conducted, attended = int(row[2]), int(row[3])
+        except ValueError:
+            result.add_error(row_num, "Classes conducted and attended must be whole numbers.")
+            continue
+        count_error = _count_error(conducted, attended)
+        if count_error:
+            result.add_error(row_num, count_error)
+            continue
+
+        key = (subject_id, record_date)
+        if key in valid:
+            result.add_error(row_num, f"Duplicate of row {valid[key][2]} for the same subject and date.")
+            continue
+        valid[key] = (conducted, attended, row_num)
+    return valid
+
+
+def _write_batch(valid, mode, result):
+    existing = {
+        (subject_id, record_date): pk
+        for pk, subject_id, record_date in AttendanceRecord.objects.filter(
+            subject_id__in={subject_id for subject_id, _ in valid},
+            date__in={record_date for _, record_date in valid},
+        ).values_list('id', 'subject_id', 'date')
+    }
+
+    to_create, to_update = [], []
+    for (subject_id, record_date), (conducted, attended, _) in valid.items():
+        record = AttendanceRecord(
+            pk=existing.get((subject_id, record_date)), subject_id=subject_id, date=record_date,
+            classes_conducted=conducted, classes_attended=attended,
+        )
+        if record.pk is None:
+            to_create.append(record)
+        elif mode == IMPORT_MODE_UPSERT:
+            to_update.append(record)
+        else:
+            result.skipped += 1
+
+    if to_create:
+        AttendanceRecord.objects.bulk_create(to_create)
+        result.created += len(to_create)
+    if to_update:
+        AttendanceRecord.objects.bulk_update(to_update, ['classes_conducted', 'classes_attended'])
+        result.updated += len(to_update)
+
+
+# --- Date Parsing ---
+def _parse_iso(value):
+    if len(value) != 10:
+        raise ValueError(value)
+    return date.fromisoformat(value)
+
+
+def _strptime_parser(fmt):
+    return lambda value: datetime.strptime(value, fmt).date()
+
+
+def _parse_any(value):
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(value)
+
+
+def detect_date_format(samples):
+    """
+    Returns the one of DATE_FORMATS that parses the most sample values (the earliest
+    on a tie), so a few malformed values don't defeat detection; None if none parse.
+    """
+    samples = [value for value in samples if value]
+    best, best_count = None, 0
+    for fmt in DATE_FORMATS:
+        parse = _parse_iso if fmt == '%Y-%m-%d' else _strptime_parser(fmt)
+        count = 0
+        for value in samples:
+            try:
+                parse(value)
+                count += 1
+            except ValueError:
+                pass
+        if count > best_count:
+            best, best_count = fmt, count
+    return best
+
+
+def make_date_parser(samples):
+    """
+    Returns a function parsing date strings in the format detected from `samples`,
+    with a fast path for ISO dates. Values the detected format can't parse fall back
+    to trying every accepted format; a ValueError means none matched.
+    """
+    fmt = detect_date_format(samples)
+    if fmt is None:
+        return _parse_any
+    fast = _parse_iso if fmt == '%Y-%m-%d' else _strptime_parser(fmt)
+
+    def parse(value):
+        try:
+            return fast(value)
+        except ValueError:
+            return _parse_any(value)
+    return parse
+
+
+# --- Holiday Import ---
+def _holiday_csv_entries(lines):
+    """
+    Yields (row_num, date_str, name) from holiday CSV lines, skipping a header row and empty rows.
+    """
+    for row_num, row in enumerate(csv.reader(lines), start=1):
+        # Skip header row (first row) if present: assume a header if the first cell isn't numeric-looking
+        if row_num == 1 and row and not row[0].strip().replace('-', '').replace('/', '').isdigit():
+            continue
+        if not row or not row[0].strip(): # Skip empty rows or rows with empty first column
+            continue
+        yield row_num, row[0].strip(), row[1].strip() if len(row) > 1 else ''
+
+
+def _holiday_text_entries(text):
+    """
+    Yields (line_num, date_str, name) from 'YYYY-MM-DD' or 'YYYY-MM-DD - Holiday Name' lines.
+    """
+    for line_num, line in enumerate(text.splitlines(), start=1):
+        line = line.strip()
+        if not line:
+            continue
+        parts = line.split(' - ', 1) # Split only on the first ' - '
+        yield line_num, parts[0].strip(), parts[1].strip() if len(parts) > 1 else 'Holiday'
+
+
+def import_holidays(session, entries, result=None):
+    """
+    Adds holidays to `session` from (row_num, date_str, name) entries.
+
+    The date format is detected once from a sample of the entries. Dates already
+    holidays in the session (fetched with one query) or repeated in the input are
+    skipped, and everything new is inserted with one bulk_create in one transaction.
+    Returns an ImportResult.
+    """
+    result = result or ImportResult()
+    entries = iter(entries)
+    sample = list(islice(entries, DATE_FORMAT_SAMPLE_SIZE))
+    parse_date = make_date_parser([date_str for _, date_str, _ in sample])
+
+    with transaction.atomic():
+        seen = set(Holiday.objects.filter(session=session).values_list('date', flat=True))
+        new_holidays = []
+        for row_num, date_str, name in chain(sample, entries):
+            try:
+                holiday_date = parse_date(date_str)
+            except ValueError:
+                result.add_error(row_num, f"Invalid date format '{date_str}'. Please use YYYY-MM-DD, DD-MM-YYYY, MM/DD/YYYY, DD/MM/YYYY, or YYYY/MM/DD.")
+                continue
+            # Ensure holiday date is within session bounds
+            if not (session.start_date <= holiday_date <= session.end_date):
+                result.add_error(row_num, f"Holiday date {holiday_date} is outside the session dates ({session.start_date} to {session.end_date}).")
+                continue
+            if holiday_date in seen:
+                result.skipped += 1
+                continue
+            seen.add(holiday_date)
+            new_holidays.append(Holiday(session=session, date=holiday_date, name=name))
+
+        if new_holidays:
+            # bulk_create sends no signals, so invalidate what Holiday signals would have
+            Holiday.objects.bulk_create(new_holidays)
+            SessionCalendar.invalidate([session.pk])
+            mark_sessions_modified([session.pk])
+            result.created = len(new_holidays)
+    return result
+
+
+def import_holidays_csv(session, lines, result=None):
+    """Imports holidays from CSV lines of 'date[,name]' rows."""
+    return import_holidays(session, _holiday_csv_entries(lines), result)
+
+
+def import_holidays_text(session, text):
+    """Imports holidays from pasted 'date[ - name]' lines."""
+    return import_holidays(session, _holiday_text_entries(text))
+
+
+# --- Batch Attendance Entries ---
+MAX_BATCH_ENTRIES = 500
+
+ENTRY_CREATED = 'created'
+ENTRY_UPDATED = 'updated'
+ENTRY_ERROR = 'error'
+
+
+def _entry_error(index, message):
+    return {'index': index, 'status': ENTRY_ERROR, 'error': message}
+
+
+def _count_error(conducted, attended):
+    """The message for class counts that can't be stored, None if they can."""
+    _, max_count = connection.ops.integer_field_range('PositiveIntegerField')
+    if conducted > max_count:
+        return f"Classes conducted must be at most {max_count}."
+    if conducted < 0 or not (0 <= attended <= conducted):
+        return f"Invalid counts {attended}/{conducted}: attended must be between 0 and classes conducted."
+    return None
+
+
+def _parse_entry(entry):
+    """Returns (subject_id, date, conducted, attended) from an entry dict; ValueError with a message if malformed."""
+    if not isinstance(entry, dict):
+        raise ValueError("Entry must be an object with subject, date, conducted and attended.")
+    missing = [key for key in ('subject', 'date', 'conducted', 'attended') if key not in entry]
+    if missing:
+        raise ValueError(f"Missing {', '.join(missing)}.")
+    subject_id, conducted, attended = entry['subject'], entry['conducted'], entry['attended']
+    # bool is an int, but true/false are not counts
+    if not all(isinstance(value, int) and not isinstance(value, bool) for value in (subject_id, conducted, attended)):
+        raise ValueError("Subject, conducted and attended must be whole numbers.")
+    min_id, max_id = connection.ops.integer_field_range(Subject._meta.pk.get_internal_type())
+    if not min_id <= subject_id <= max_id:
+        # No such subject can exist, and the database couldn't even look the id up
+        raise ValueError(f"Unknown subject {subject_id}.")
+    try:
+        record_date = date.fromisoformat(entry['date']) if isinstance(entry['date'], str) else None
+    except ValueError:
+        record_date = None
+    if record_date is None:
+        raise ValueError(f"Invalid date '{entry['date']}'. Please use YYYY-MM-DD.")
+    count_error = _count_error(conducted, attended)
+    if count_error:
+        raise ValueError(count_error)
+    return subject_id, record_date, conducted, attended
+
+
+def upsert_attendance_entries(user, entries):
+    """
+    Creates or overwrites attendance records of `user`'s subjects from a list of entry dicts
+    {'subject': id, 'date': 'YYYY-MM-DD', 'conducted': n, 'attended': n}.
+
+    Ownership and session dates of every subject are checked with one query and the existing
+    records fetched with another; valid entries are then written with one bulk_create and one
+    bulk_update in a single transaction. Invalid entries are reported and don't stop the others.
+    Returns (results, totals): a {'index', 'status'[, 'error']} dict per entry, in input order,
+    and {subject_id: (total_conducted, total_attended)} for the subjects written to.
+    """
+    parsed = {}
+    results = [None] * len(entries)
+    for index, entry in enumerate(entries):
+        try:
+            parsed[index] = _parse_entry(entry)
+        except ValueError as e:
+            results[index] = _entry_error(index, str(e))
+
+    sessions = {
+        subject_id: (start_date, end_date)
+        for subject_id, start_date, end_date in Subject.objects.filter(
+            pk__in={subject_id for subject_id, *_ in parsed.values()}, session__user=user,
+        ).values_list('id', 'session__start_date', 'session__end_date')
+    }
+
+    valid, first_index = {}, {}
+    for index, (subject_id, record_date, conducted, attended) in parsed.items():
+        if subject_id not in sessions:
+            # Someone else's subject is reported like a missing one
+            results[index] = _entry_error(index, f"Unknown subject {subject_id}.")
+            continue
+        start_date, end_date = sessions[subject_id]
+        if not (start_date <= record_date <= end_date):
+            results[index] = _entry_error(index, f"Date {record_date} is outside the session dates ({start_date} to {end_date}).")
+            continue
+        key = (subject_id, record_date)
+        if key in first_index:
+            results[index] = _entry_error(index, f"Duplicate of entry {first_index[key]} for the same subject and date.")
+            continue
+        first_index[key] = index
+        valid[key] = (conducted, attended)
+
+    totals = {}
+    if valid:
+        with transaction.atomic():
+            existing = {
+                (subject_id, record_date): pk
+                for pk, subject_id, record_date in AttendanceRecord.objects.filter(
+                    subject_id__in={subject_id for subject_id, _ in valid},
+                    date__in={record_date for _, record_date in valid},
+                ).values_list('id', 'subject_id', 'date')
+            }
+            to_create, to_update = [], []
+            for (subject_id, record_date), (conducted, attended) in valid.items():
+                record = AttendanceRecord(
+                    pk=existing.get((subject_id, record_date)), subject_id=subject_id, date=record_date,
+                    classes_conducted=conducted, classes_attended=attended,
+                )
+                (to_create if record.pk is None else to_update).append(record)
+                status = ENTRY_CREATED if record.pk is None else ENTRY_UPDATED
+                results[first_index[subject_id, record_date]] = {'index': first_index[subject_id, record_date], 'status': status}
+            if to_create:
+                AttendanceRecord.objects.bulk_create(to_create)
+            if to_update:
+                AttendanceRecord.objects.bulk_update(to_update, ['classes_conducted', 'classes_attended'])
+            totals = {
+                subject_id: (conducted, attended)
+                for subject_id, conducted, attended in Subject.objects.filter(
+                    pk__in={subject_id for subject_id, _ in valid},
+                ).values_list('id', 'total_conducted', 'total_attended')
+            }
+    return results, totals
@@ -0,0 +1,331 @@
+# attendance/jobs.py
+# A database-backed queue for bulk operations too slow to run inside a request, such as imports.
+#
+# A view stores the operation's input as a BackgroundJob row with enqueue() and responds at once.
+# Runners claim queued jobs one at a time with an atomic UPDATE, so any number of them can share
+# the queue without a broker, and run each with the handler registered for its kind. JOBS_RUNNER
+# selects the runner: 'thread' (the default) runs jobs on a small thread pool of the web process,
+# woken when the enqueuing transaction commits and once when the process loads the web application,
+# for jobs left queued by processes that have since exited; 'worker' leaves them to
+# `python manage.py run_jobs` processes; 'inline' runs them in the request once it commits.
+#
+# Uploaded files are spooled to JOBS_UPLOAD_DIR, not into the database, and read from there a line
+# at a time by the job; the file is deleted when the job finishes.
+#
+# Handlers write in one transaction, during which SQLite lets no other connection write the job
+# row, so a running job's progress is published to the cache (JOBS_CACHE_ALIAS), which every
+# process serving requests must share, and the row only changes when the job starts and finishes.
+# The row records which process runs the job. A job whose process has exited is queued again (its
+# transaction died with it); a process on another host can't be checked, so its job is queued again
+# once it has been running for JOBS_STALE_AFTER seconds.
+import codecs
+import logging
+import os
+import socket
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from typing import Callable, NamedTuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .importers import ImportResult, _holiday_text_entries, import_attendance_csv, import_holidays, import_holidays_csv
+from .models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+RUNNER_THREAD = 'thread'
+RUNNER_WORKER = 'worker'
+RUNNER_INLINE = 'inline'
+
+# A running job publishes its progress every this many rows
+PROGRESS_INTERVAL_ROWS = 500
+DEFAULT_STALE_AFTER = 15 * 60
+DEFAULT_MAX_UPLOAD_SIZE = 20 * 1024 * 1024
+
+STATUS_FIELDS = ('id', 'kind', 'status', 'session_id', 'rows_processed', 'created', 'updated', 'skipped', 'error_count', 'errors')
+
+JOB_HOLIDAYS_CSV = 'holidays_csv'
+JOB_HOLIDAYS_TEXT = 'holidays_text'
+JOB_ATTENDANCE_CSV = 'attendance_csv'
+
+
+class JobHandler(NamedTuple):
+    run: Callable
+    label: str
+
+
+_handlers = {}
+
+
+def job_handler(kind, label):
+    """
+    Registers the decorated function as the handler of jobs of `kind`, described to users as `label`.
+    It is called with the claimed BackgroundJob and its JobProgress and returns an ImportResult.
+    """
+    def decorator(func):
+        _handlers[kind] = JobHandler(func, label)
+        return func
+    return decorator
+
+
+def job_label(kind):
+    handler = _handlers.get(kind)
+    return handler.label if handler else kind
+
+
+def get_cache():
+    return caches[getattr(settings, 'JOBS_CACHE_ALIAS', 'default')]
+
+
+def _progress_key(job_id):
+    return f'jobs:progress:{job_id}'
+
+
+class JobProgress:
+    """The rows a running job has processed and its result so far, published to the cache as it goes."""
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.rows_processed = 0
+        self.result = ImportResult()
+
+    def track(self, rows):
+        """Yields `rows`, counting them and publishing the progress every PROGRESS_INTERVAL_ROWS."""
+        for row in rows:
+            self.rows_processed += 1
+            if self.rows_processed % PROGRESS_INTERVAL_ROWS == 0:
+                self.publish()
+            yield row
+
+    def publish(self):
+        get_cache().set(_progress_key(self.job_id), {
+            'rows_processed': self.rows_processed,
+            'error_count': self.result.error_count,
+            'errors': self.result.error_messages(),
+        }, timeout=getattr(settings, 'JOBS_STALE_AFTER', DEFAULT_STALE_AFTER))
+
+
+# --- Uploads ---
+def max_upload_size():
+    return getattr(settings, 'JOBS_MAX_UPLOAD_SIZE', DEFAULT_MAX_UPLOAD_SIZE)
+
+
+def spool_upload(uploaded_file):
+    """
+    Copies an uploaded file, chunk by chunk, into JOBS_UPLOAD_DIR for a job to read and returns the
+    copy's path. Raises UnicodeDecodeError, keeping no copy, if the file isn't UTF-8 text.
+    """
+    directory = Path(getattr(settings, 'JOBS_UPLOAD_DIR', settings.BASE_DIR / 'job_uploads'))
+    directory.mkdir(parents=True, exist_ok=True)
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    with tempfile.NamedTemporaryFile(dir=directory, prefix='upload-', suffix='.csv', delete=False) as spooled:
+        try:
+            for chunk in uploaded_file.chunks():
+                decoder.decode(chunk)
+                spooled.write(chunk)
+            decoder.decode(b'', final=True)
+        except BaseException:
+            spooled.close()
+            discard_upload(spooled.name)
+            raise
+    return spooled.name
+
+
+def discard_upload(path):
+    if path:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _open_input(job):
+    """The job's input as text lines: its spooled upload ('utf-8-sig' drops a BOM written by Excel), or its payload."""
+    if job.upload:
+        return open(job.upload, encoding='utf-8-sig', newline='')
+    return StringIO(job.payload, newline='')
+
+
+# --- Queue ---
+def enqueue(user, kind, payload='', session=None, upload='', **options):
+    """
+    Stores a job of `kind`, with its input as text in `payload` or as a file spooled with
+    spool_upload() at `upload`, and wakes the runner once the surrounding transaction commits.
+    """
+    if kind not in _handlers:
+        raise ValueError(f"No handler is registered for jobs of kind '{kind}'.")
+    job = BackgroundJob.objects.create(user=user, session=session, kind=kind, payload=payload, upload=upload, options=options)
+    transaction.on_commit(wake_runner)
+    return job
+
+
+def get_job_status(user, job_id):
+    """
+    Returns the STATUS_FIELDS of `user`'s job as a dict, with its latest progress if it is
+    running and 'label' and 'finished'; None if the user has no such job. The payload is not read.
+    """
+    status = BackgroundJob.objects.filter(pk=job_id, user=user).values(*STATUS_FIELDS).first()
+    if status is None:
+        return None
+    if status['status'] == BackgroundJob.STATUS_RUNNING:
+        status.update(get_cache().get(_progress_key(job_id)) or {})
+    status['label'] = job_label(status['kind'])
+    status['finished'] = status['status'] in (BackgroundJob.STATUS_DONE, BackgroundJob.STATUS_FAILED)
+    return status
+
+
+def runner_id():
+    """Identifies this process as a job runner: 'host:pid'."""
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def _runner_exited(runner, started_at, cutoff):
+    host, _, pid = runner.rpartition(':')
+    if host != socket.gethostname() or os.name != 'posix':
+        # No way to ask; a job running this long is taken to have lost its runner
+        return started_at < cutoff
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError: # running, as another user
+        pass
+    return False
+
+
+def requeue_stale_jobs():
+    """Queues again the running jobs whose runner has exited (see the module comment); returns how many."""
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, 'JOBS_STALE_AFTER', DEFAULT_STALE_AFTER))
+    requeued = 0
+    running = BackgroundJob.objects.filter(status=BackgroundJob.STATUS_RUNNING).values_list('pk', 'runner', 'started_at')
+    for job_id, runner, started_at in running:
+        if _runner_exited(runner, started_at, cutoff):
+            # Unless the job has finished, or been requeued and claimed again, since it was read
+            requeued += BackgroundJob.objects.filter(pk=job_id, status=BackgroundJob.STATUS_RUNNING, runner=runner).update(
+                status=BackgroundJob.STATUS_QUEUED, started_at=None, runner='',
+            )
+    return requeued
+
+
+def claim_next_job():
+    """Marks the oldest queued job running and returns it; None if there are none."""
+    while True:
+        job_id = BackgroundJob.objects.filter(status=BackgroundJob.STATUS_QUEUED).order_by('id').values_list('id', flat=True).first()
+        if job_id is None:
+            return None
+        # Only one runner's UPDATE matches; the others move on to the next job
+        claimed = BackgroundJob.objects.filter(pk=job_id, status=BackgroundJob.STATUS_QUEUED).update(
+            status=BackgroundJob.STATUS_RUNNING, started_at=timezone.now(), runner=runner_id(),
+        )
+        if claimed:
+            return BackgroundJob.objects.select_related('session').get(pk=job_id)
+
+
+def run_job(job):
+    """Runs a claimed job with its handler and stores the outcome; returns the job's final status."""
+    progress = JobProgress(job.pk)
+    handler = _handlers.get(job.kind)
+    try:
+        if handler is None:
+            raise LookupError(f"No handler is registered for jobs of kind '{job.kind}'.")
+        result = handler.run(job, progress)
+        status = BackgroundJob.STATUS_DONE
+    except Exception:
+        logger.exception("Background job %s (%s) failed", job.pk, job.kind)
+        # The handler's transaction was rolled back, so nothing it counted was kept
+        result = ImportResult()
+        result.errors.append("The job stopped because of an unexpected error; no changes were saved.")
+        result.error_count = 1
+        status = BackgroundJob.STATUS_FAILED
+
+    BackgroundJob.objects.filter(pk=job.pk).update(
+        status=status, finished_at=timezone.now(), payload='', upload='', rows_processed=progress.rows_processed,
+        created=result.created, updated=result.updated, skipped=result.skipped,
+        error_count=result.error_count, errors=result.error_messages(),
+    )
+    discard_upload(job.upload)
+    get_cache().delete(_progress_key(job.pk))
+    return status
+
+
+def run_pending_jobs(limit=None):
+    """Runs queued jobs, oldest first, until none are left (or `limit` have run); returns how many ran."""
+    requeue_stale_jobs()
+    count = 0
+    while limit is None or count < limit:
+        job = claim_next_job()
+        if job is None:
+            break
+        run_job(job)
+        count += 1
+    return count
+
+
+# --- Thread Runner ---
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor, _executor_pid
+    # A forked worker inherits its parent's pool but not the pool's threads
+    if _executor is None or _executor_pid != os.getpid():
+        with _executor_lock:
+            if _executor is None or _executor_pid != os.getpid():
+                _executor = ThreadPoolExecutor(max_workers=getattr(settings, 'JOBS_THREADS', 1), thread_name_prefix='jobs')
+                _executor_pid = os.getpid()
+    return _executor
+
+
+def _drain():
+    try:
+        run_pending_jobs()
+    except Exception:
+        logger.exception("The background job runner failed")
+    finally:
+        # This thread's connections; the pool thread may sit idle for long
+        connections.close_all()
+
+
+def wake_runner():
+    """Has the configured runner look at the queue: now in a pool thread, now in this thread, or (worker) not at all."""
+    runner = getattr(settings, 'JOBS_RUNNER', RUNNER_THREAD)
+    if runner == RUNNER_THREAD:
+        _get_executor().submit(_drain)
+    elif runner == RUNNER_INLINE:
+        run_pending_jobs()
+
+
+def start_runner():
+    """
+    Has the thread runner take up the jobs already queued, which no enqueue in this process will
+    wake it for; called by wsgi.py and asgi.py as the web application loads.
+    """
+    if getattr(settings, 'JOBS_RUNNER', RUNNER_THREAD) == RUNNER_THREAD:
+        _get_executor().submit(_drain)
+
+
+# --- Import Handlers ---
+@job_handler(JOB_HOLIDAYS_CSV, "Holiday upload")
+def run_holidays_csv(job, progress):
+    with _open_input(job) as lines:
+        return import_holidays_csv(job.session, progress.track(lines), progress.result)
+
+
+@job_handler(JOB_HOLIDAYS_TEXT, "Holiday list")
+def run_holidays_text(job, progress):
+    return import_holidays(job.session, progress.track(_holiday_text_entries(job.payload)), progress.result)
+
+
+@job_handler(JOB_ATTENDANCE_CSV, "Attendance import")
+def run_attendance_csv(job, progress):
+    with _open_input(job) as lines:
+        return import_attendance_csv(job.session, progress.track(lines), mode=job.options['mode'], result=progress.result)
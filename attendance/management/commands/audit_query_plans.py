@@ -0,0 +1,27 @@
+# attendance/management/commands/audit_query_plans.py
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from attendance.query_audit import audit
+
+
+class Command(BaseCommand):
+    help = "Runs the app's hot queries through EXPLAIN QUERY PLAN and flags full scans and temporary sorts."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--strict', action='store_true', help="Exit with an error if any query is flagged.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("The plan audit reads SQLite's EXPLAIN QUERY PLAN output.")
+
+        flagged = 0
+        for name, details, problems in audit():
+            style = self.style.WARNING if problems else self.style.SUCCESS
+            self.stdout.write(style(f"{name}: {'; '.join(kind for kind, _ in problems) or 'ok'}"))
+            for detail in details:
+                self.stdout.write(f"    {detail}")
+            flagged += bool(problems)
+
+        if flagged and options['strict']:
+            raise CommandError(f"{flagged} hot queries scan or sort without an index.")
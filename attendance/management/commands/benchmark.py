@@ -0,0 +1,31 @@
+# attendance/management/commands/benchmark.py
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from attendance.benchmarks import BENCHMARKS
+
+
+class Command(BaseCommand):
+    help = "Runs the attendance microbenchmarks (all of them, or the ones named)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help=f"Benchmarks to run. Available: {', '.join(sorted(BENCHMARKS))}")
+
+    def handle(self, *args, **options):
+        names = options['names'] or sorted(BENCHMARKS)
+        unknown = [name for name in names if name not in BENCHMARKS]
+        if unknown:
+            raise CommandError(f"Unknown benchmark(s): {', '.join(unknown)}")
+
+        # Database benchmarks write rows, so they get a throwaway test database instead of the real one
+        needs_db = any(BENCHMARKS[name].needs_db for name in names)
+        if needs_db:
+            old_name = connection.settings_dict['NAME']
+            connection.creation.create_test_db(verbosity=0)
+        try:
+            for name in names:
+                self.stdout.write(self.style.MIGRATE_HEADING(f"== {name} =="))
+                BENCHMARKS[name](self.stdout.write)
+        finally:
+            if needs_db:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
@@ -0,0 +1,31 @@
+# attendance/management/commands/benchmark_asgi_load.py
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from attendance.view_benchmarks import measure_asgi_load
+
+
+class Command(BaseCommand):
+    help = "Compares the sync and native async read-heavy views under ASGI with concurrent clients, on synthetic data."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, nargs='+', default=[1, 10, 50], help="Concurrent client counts to run.")
+        parser.add_argument('--requests', type=int, default=20, help="Requests made by each client.")
+
+    def handle(self, *args, **options):
+        old_name = connection.settings_dict['NAME']
+        setup_test_environment()
+        connection.creation.create_test_db(verbosity=0)
+        try:
+            results = measure_asgi_load(clients=options['clients'], requests_per_client=options['requests'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        for mode, by_clients in results.items():
+            for clients, numbers in by_clients.items():
+                self.stdout.write(
+                    f"{mode:>5} {clients:3d} clients: {numbers['requests_per_s']:7.1f} req/s"
+                    f"  p50 {numbers['p50_ms']:7.1f} ms  p95 {numbers['p95_ms']:7.1f} ms"
+                )
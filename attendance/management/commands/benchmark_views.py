@@ -0,0 +1,50 @@
+# attendance/management/commands/benchmark_views.py
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from attendance.view_benchmarks import (
+    BASELINE_PATH, DEFAULT_MEMORY_TOLERANCE, DEFAULT_TIME_TOLERANCE, compare_to_baseline, load_baseline,
+    measure_views, save_baseline,
+)
+
+
+class Command(BaseCommand):
+    help = "Benchmarks the main views on synthetic data (wall time, SQL queries, peak memory) against a stored baseline."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=7, help="Timed requests per view; the median is reported.")
+        parser.add_argument('--baseline', default=str(BASELINE_PATH), help="Baseline file to compare against.")
+        parser.add_argument('--save-baseline', action='store_true', help="Write this run's numbers as the new baseline.")
+        parser.add_argument('--time-tolerance', type=float, default=DEFAULT_TIME_TOLERANCE)
+        parser.add_argument('--memory-tolerance', type=float, default=DEFAULT_MEMORY_TOLERANCE)
+
+    def handle(self, *args, **options):
+        # The views are driven with the test client against a throwaway test database
+        old_name = connection.settings_dict['NAME']
+        setup_test_environment()
+        connection.creation.create_test_db(verbosity=0)
+        try:
+            results = measure_views(repeat=options['repeat'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        try:
+            baseline = load_baseline(options['baseline'])
+        except FileNotFoundError:
+            baseline = {}
+        for name, numbers in results.items():
+            base = baseline.get(name)
+            versus = f" | baseline {base['wall_ms']:7.1f} ms {base['queries']:3d} queries {base['peak_kb']:8.0f} KB" if base else ''
+            self.stdout.write(f"{name:>18}: {numbers['wall_ms']:7.1f} ms {numbers['queries']:3d} queries {numbers['peak_kb']:8.0f} KB{versus}")
+
+        if options['save_baseline']:
+            save_baseline(results, options['baseline'])
+            self.stdout.write(self.style.SUCCESS(f"Saved baseline to {options['baseline']}."))
+            return
+
+        regressions = compare_to_baseline(results, baseline, options['time_tolerance'], options['memory_tolerance'])
+        if regressions:
+            raise CommandError("Performance regressions:\n  " + "\n  ".join(regressions))
+        self.stdout.write(self.style.SUCCESS("No regressions against the baseline." if baseline else "No baseline to compare against."))
@@ -0,0 +1,59 @@
+# attendance/management/commands/eligibility_report.py
+import time
+from datetime import date
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from attendance.exporters import csv_chunks, json_chunks
+from attendance.reports import DEFAULT_AT_RISK_MISSES, DEFAULT_CHUNK_SIZE, REPORT_COLUMNS, report_session_ids, run_report
+
+
+class Command(BaseCommand):
+    help = "Writes the eligibility of every student's subjects for their upcoming exams to a CSV or JSON file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help="File to write; .json for JSON, CSV otherwise (or see --format).")
+        parser.add_argument('--format', choices=('csv', 'json'), help="Output format, if not given by the file name.")
+        parser.add_argument('--workers', type=int, default=1, help="Worker processes; the default, 1, evaluates in this process.")
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Sessions evaluated per task.")
+        parser.add_argument('--all-sessions', action='store_true', help="Include past sessions, not only current ones.")
+        parser.add_argument('--at-risk-only', action='store_true', help="Only the subjects that can't reach the minimum or can miss few more classes.")
+        parser.add_argument('--at-risk-misses', type=int, default=DEFAULT_AT_RISK_MISSES, help="With --at-risk-only, the most misses left that count as at risk.")
+        parser.add_argument('--date', type=date.fromisoformat, help="Evaluate as of this date (YYYY-MM-DD) instead of today.")
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1 or options['workers'] < 1:
+            raise CommandError("--chunk-size and --workers must be at least 1.")
+        output = Path(options['output'])
+        output_format = options['format'] or ('json' if output.suffix.lower() == '.json' else 'csv')
+        today = options['date'] or date.today()
+
+        at_risk_misses = options['at_risk_misses'] if options['at_risk_only'] else None
+
+        started = time.perf_counter()
+        session_ids = report_session_ids(options['all_sessions'])
+        total_chunks = -(-len(session_ids) // options['chunk_size'])
+        counts = {'chunks': 0, 'subjects': 0, 'rows': 0}
+
+        def rows():
+            results = run_report(session_ids, today, options['chunk_size'], options['workers'], at_risk_misses)
+            for subject_count, chunk_rows in results:
+                counts['chunks'] += 1
+                counts['subjects'] += subject_count
+                counts['rows'] += len(chunk_rows)
+                if options['verbosity'] >= 1:
+                    self.stdout.write(
+                        f"{counts['chunks']}/{total_chunks} chunks: {counts['subjects']} subjects, {counts['rows']} rows,"
+                        f" {time.perf_counter() - started:.1f}s"
+                    )
+                yield from chunk_rows
+
+        with output.open('w', newline='', encoding='utf-8') as out:
+            chunks = csv_chunks(REPORT_COLUMNS, rows()) if output_format == 'csv' else json_chunks('eligibility', REPORT_COLUMNS, rows())
+            for chunk in chunks:
+                out.write(chunk)
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {counts['rows']} rows for {counts['subjects']} subjects in {len(session_ids)} sessions to {output}"
+            f" in {time.perf_counter() - started:.1f}s."
+        ))
@@ -0,0 +1,32 @@
+# attendance/management/commands/generate_synthetic_data.py
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from attendance.synthetic import EXAM_TYPES, SUBJECT_NAMES, generate_dataset
+
+
+class Command(BaseCommand):
+    help = "Generates synthetic users, sessions, subjects, holidays, exams and daily attendance records."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--sessions', type=int, default=2, help="Sessions per user; the last one is current.")
+        parser.add_argument('--subjects', type=int, default=6, help=f"Subjects per session (at most {len(SUBJECT_NAMES)}).")
+        parser.add_argument('--days', type=int, default=120, help="Days of attendance history in each session.")
+        parser.add_argument('--holidays', type=int, default=8, help="Holidays per session.")
+        parser.add_argument('--exams', type=int, default=3, help=f"Exams per session (at most {len(EXAM_TYPES)}).")
+        parser.add_argument('--prefix', default='student', help="Username prefix; usernames are <prefix><n>.")
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options['subjects'] > len(SUBJECT_NAMES) or options['exams'] > len(EXAM_TYPES):
+            raise CommandError(f"At most {len(SUBJECT_NAMES)} subjects and {len(EXAM_TYPES)} exams per session.")
+        if get_user_model().objects.filter(username__startswith=options['prefix']).exists():
+            raise CommandError(f"Users named '{options['prefix']}...' already exist; choose another --prefix.")
+
+        counts = generate_dataset(
+            users=options['users'], sessions_per_user=options['sessions'], subjects_per_session=options['subjects'],
+            days=options['days'], holidays_per_session=options['holidays'], exams_per_session=options['exams'],
+            username_prefix=options['prefix'], seed=options['seed'],
+        )
+        self.stdout.write(self.style.SUCCESS("Created " + ", ".join(f"{count} {name}" for name, count in counts.items()) + "."))
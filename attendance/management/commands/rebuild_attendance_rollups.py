@@ -0,0 +1,52 @@
+# attendance/management/commands/rebuild_attendance_rollups.py
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from attendance.models import ROLLUP_MODELS, AttendanceRecord, aggregate_rollups
+
+REBUILD_BATCH_SIZE = 2000
+
+
+class Command(BaseCommand):
+    help = "Verifies the weekly and monthly attendance rollups and rebuilds them from the records."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help="Only report rollups that are out of date, failing if there are any; change nothing.")
+
+    def handle(self, *args, **options):
+        stale_models = []
+        for model in ROLLUP_MODELS:
+            actual = {
+                (row['subject_id'], row['period_start']): (row['conducted'], row['attended'])
+                for row in aggregate_rollups(model, AttendanceRecord.objects.all()).iterator()
+            }
+            stored = {
+                (subject_id, period_start): (conducted, attended)
+                for subject_id, period_start, conducted, attended in model.objects.values_list(
+                    'subject_id', 'period_start', 'classes_conducted', 'classes_attended',
+                ).iterator()
+            }
+            stale = {key for key in actual.keys() | stored.keys() if actual.get(key) != stored.get(key)}
+            name = model._meta.verbose_name
+            for subject_id, period_start in sorted(stale)[:20]:
+                key = (subject_id, period_start)
+                self.stdout.write(f"{name}, subject {subject_id}, {period_start}: stored {stored.get(key)}, actual {actual.get(key)}")
+            if not stale:
+                self.stdout.write(self.style.SUCCESS(f"All {name} rollups are up to date."))
+                continue
+            self.stdout.write(self.style.WARNING(f"{len(stale)} {name} rollup(s) are stale."))
+            stale_models.append((model, actual))
+
+        if not stale_models:
+            return
+        if options['check']:
+            raise CommandError(f"{len(stale_models)} rollup table(s) are stale.")
+        for model, actual in stale_models:
+            with transaction.atomic():
+                model.objects.all().delete()
+                model.objects.bulk_create(
+                    (model(subject_id=subject_id, period_start=period_start, classes_conducted=conducted, classes_attended=attended)
+                     for (subject_id, period_start), (conducted, attended) in actual.items()),
+                    batch_size=REBUILD_BATCH_SIZE,
+                )
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(actual)} {model._meta.verbose_name} rollup(s)."))
@@ -0,0 +1,37 @@
+# attendance/management/commands/rebuild_attendance_totals.py
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Sum
+
+from attendance.models import AttendanceRecord, Subject, refresh_subject_totals
+
+
+class Command(BaseCommand):
+    help = "Verifies the running attendance totals stored on each Subject and rebuilds them from the records."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help="Only report subjects whose totals are out of date, failing if there are any; change nothing.")
+
+    def handle(self, *args, **options):
+        actual = {
+            row['subject_id']: (row['conducted'], row['attended'], row['last'])
+            for row in AttendanceRecord.objects.order_by().values('subject_id').annotate(
+                conducted=Sum('classes_conducted'), attended=Sum('classes_attended'), last=Max('date')
+            )
+        }
+
+        stale = []
+        for subject in Subject.objects.values('pk', 'name', 'total_conducted', 'total_attended', 'last_record_date').iterator():
+            stored = (subject['total_conducted'], subject['total_attended'], subject['last_record_date'])
+            expected = actual.get(subject['pk'], (0, 0, None))
+            if stored != expected:
+                stale.append(subject['pk'])
+                self.stdout.write(f"Subject {subject['pk']} ({subject['name']}): stored {stored}, actual {expected}")
+
+        if not stale:
+            self.stdout.write(self.style.SUCCESS("All subject totals are up to date."))
+            return
+        if options['check']:
+            raise CommandError(f"{len(stale)} subject(s) have stale totals.")
+
+        refresh_subject_totals(stale)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt totals for {len(stale)} subject(s)."))
@@ -0,0 +1,34 @@
+# attendance/management/commands/run_jobs.py
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from attendance.jobs import claim_next_job, requeue_stale_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = "Runs queued background jobs (imports), polling the queue for new ones until stopped."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Run the jobs queued now, then exit.")
+        parser.add_argument('--interval', type=float, default=1.0, help="Seconds between polls of an empty queue.")
+
+    def handle(self, *args, **options):
+        if options['interval'] <= 0:
+            raise CommandError("--interval must be positive.")
+        try:
+            while True:
+                requeued = requeue_stale_jobs()
+                if requeued:
+                    self.stdout.write(self.style.WARNING(f"Requeued {requeued} job(s) whose runner stopped."))
+                while (job := claim_next_job()) is not None:
+                    started = time.perf_counter()
+                    status = run_job(job)
+                    self.stdout.write(f"Job {job.pk} ({job.kind}): {status} in {time.perf_counter() - started:.1f}s")
+                if options['once']:
+                    return
+                connections.close_all() # don't hold a connection while idle
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,319 @@
+# attendance/metrics.py
+# Per-view request metrics: latency and response size histograms, request counts, SQL query counts
+# and SQL time, served in Prometheus text format by the `metrics` view.
+#
+# Each process counts into an in-memory buffer (a few dict increments per request) and adds the
+# buffer into a small SQLite file every METRICS_FLUSH_INTERVAL seconds, from a background thread so
+# no response waits on the file. The file is shared by all worker processes on the host, so a scrape
+# of any worker sees the totals of all of them.
+import atexit
+import logging
+import os
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1_000, 5_000, 10_000, 50_000, 100_000, 500_000, 1_000_000, 5_000_000)
+UNMATCHED_VIEW = 'unmatched'
+
+
+def _format_number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# The `le` label of each bucket, with the +Inf bucket last
+LATENCY_LABELS = tuple(_format_number(bound) for bound in LATENCY_BUCKETS) + ('+Inf',)
+SIZE_LABELS = tuple(_format_number(bound) for bound in SIZE_BUCKETS) + ('+Inf',)
+STATUS_CLASSES = {1: '1xx', 2: '2xx', 3: '3xx', 4: '4xx', 5: '5xx'}
+
+REQUESTS = 'attendance_requests_total'
+LATENCY = 'attendance_request_duration_seconds'
+SQL_QUERIES = 'attendance_sql_queries_total'
+SQL_TIME = 'attendance_sql_duration_seconds_total'
+RESPONSE_SIZE = 'attendance_response_size_bytes'
+LATENCY_BUCKET, LATENCY_SUM, LATENCY_COUNT = LATENCY + '_bucket', LATENCY + '_sum', LATENCY + '_count'
+SIZE_BUCKET, SIZE_SUM, SIZE_COUNT = RESPONSE_SIZE + '_bucket', RESPONSE_SIZE + '_sum', RESPONSE_SIZE + '_count'
+
+# (name, type, help) in exposition order
+FAMILIES = (
+    (REQUESTS, 'counter', "Requests handled, by view and status class."),
+    (LATENCY, 'histogram', "Time spent producing the response, by view."),
+    (SQL_QUERIES, 'counter', "SQL queries executed while handling requests, by view."),
+    (SQL_TIME, 'counter', "Time spent executing SQL while handling requests, by view."),
+    (RESPONSE_SIZE, 'histogram', "Size of non-streaming response bodies, by view."),
+)
+
+
+class MetricsStore:
+    """
+    Sums of metric samples in a SQLite file, keyed by (metric, view, label). Histogram buckets
+    are stored per bucket, not cumulatively, with the bucket's upper bound as the label.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._connection = None
+        self._pid = None
+        # The connection is shared by the flushing thread and request threads serving /metrics;
+        # without it a read could run inside a half-done add() and see part of its increments
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        # A forked worker must not reuse its parent's connection
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            # Flushes don't wait for fsync; a crash can lose the last few seconds of counts, not corrupt them
+            self._connection.execute('PRAGMA synchronous=NORMAL')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS samples (metric TEXT NOT NULL, view TEXT NOT NULL, label TEXT NOT NULL,'
+                ' value REAL NOT NULL, PRIMARY KEY (metric, view, label)) WITHOUT ROWID'
+            )
+            self._pid = os.getpid()
+        return self._connection
+
+    def add(self, increments):
+        """Adds {(metric, view, label): amount} to the stored sums in one transaction."""
+        with self._lock:
+            db = self._connect()
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                db.executemany(
+                    'INSERT INTO samples (metric, view, label, value) VALUES (?, ?, ?, ?)'
+                    ' ON CONFLICT (metric, view, label) DO UPDATE SET value = value + excluded.value',
+                    [(*key, amount) for key, amount in increments.items()],
+                )
+            except BaseException:
+                db.execute('ROLLBACK')
+                raise
+            db.execute('COMMIT')
+
+    def read(self):
+        """Returns {(metric, view, label): sum}."""
+        with self._lock:
+            return {(metric, view, label): value for metric, view, label, value in self._connect().execute('SELECT * FROM samples')}
+
+    def clear(self):
+        with self._lock:
+            self._connect().execute('DELETE FROM samples')
+
+
+class MetricsRecorder:
+    """
+    Buffers observations in memory and flushes them to a MetricsStore at most every `flush_interval`
+    seconds, in a background thread. Observations the store can't take stay buffered for the next flush.
+    """
+
+    def __init__(self, store, flush_interval):
+        self.store = store
+        self.flush_interval = flush_interval
+        self._buffer = {}
+        self._lock = threading.Lock()
+        # Held for a whole flush, so flush() returns once everything observed before it is stored
+        self._flush_lock = threading.Lock()
+        self._flush_scheduled = False
+        self._last_flush = time.monotonic()
+
+    def observe_request(self, view, status, duration, queries, sql_time, size=None):
+        increments = [
+            ((REQUESTS, view, STATUS_CLASSES.get(status // 100, 'other')), 1),
+            ((LATENCY_BUCKET, view, _bucket_label(LATENCY_BUCKETS, LATENCY_LABELS, duration)), 1),
+            ((LATENCY_SUM, view, ''), duration),
+            ((LATENCY_COUNT, view, ''), 1),
+        ]
+        if queries:
+            increments += [((SQL_QUERIES, view, ''), queries), ((SQL_TIME, view, ''), sql_time)]
+        if size is not None:
+            increments += [
+                ((SIZE_BUCKET, view, _bucket_label(SIZE_BUCKETS, SIZE_LABELS, size)), 1),
+                ((SIZE_SUM, view, ''), size),
+                ((SIZE_COUNT, view, ''), 1),
+            ]
+        with self._lock:
+            buffer = self._buffer
+            for key, amount in increments:
+                buffer[key] = buffer.get(key, 0) + amount
+            due = not self._flush_scheduled and time.monotonic() - self._last_flush >= self.flush_interval
+            if due:
+                self._flush_scheduled = True
+        if due:
+            # The store waits up to its timeout for other processes' flushes; the response doesn't
+            threading.Thread(target=self._scheduled_flush, name='metrics-flush', daemon=True).start()
+
+    def _scheduled_flush(self):
+        try:
+            self.flush()
+        finally:
+            with self._lock:
+                self._flush_scheduled = False
+
+    def flush(self):
+        """Adds the buffered observations to the store; returns False, keeping them buffered, if it fails."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._buffer = self._buffer, {}
+                self._last_flush = time.monotonic()
+            if not pending:
+                return True
+            try:
+                self.store.add(pending)
+            except sqlite3.Error:
+                logger.exception("Could not add request metrics to %s; keeping them for the next flush", self.store.path)
+                with self._lock:
+                    for key, amount in pending.items():
+                        self._buffer[key] = self._buffer.get(key, 0) + amount
+                return False
+            return True
+
+
+def _bucket_label(bounds, labels, value):
+    return labels[bisect_left(bounds, value)]
+
+
+_recorder = None
+_recorder_lock = threading.Lock()
+
+
+def get_recorder():
+    """The process's MetricsRecorder, created from settings on first use."""
+    global _recorder
+    if _recorder is None:
+        with _recorder_lock:
+            if _recorder is None:
+                store = MetricsStore(getattr(settings, 'METRICS_STORE_PATH', settings.BASE_DIR / 'metrics.sqlite3'))
+                _recorder = MetricsRecorder(store, getattr(settings, 'METRICS_FLUSH_INTERVAL', 1.0))
+                atexit.register(_recorder.flush)
+    return _recorder
+
+
+def reset_recorder():
+    """Flushes and drops the process's recorder, so the next one is built from the current settings."""
+    global _recorder
+    with _recorder_lock:
+        if _recorder is not None:
+            _recorder.flush()
+            atexit.unregister(_recorder.flush)
+        _recorder = None
+
+
+class SqlTimer:
+    """Counts queries and the time spent in them, as a connection execute wrapper."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+
+
+# The SqlTimer of the request being handled. A context variable, because under ASGI the ORM runs
+# in sync_to_async threads with their own connections, which the request's context is carried into.
+_request_sql_timer = ContextVar('attendance_request_sql_timer', default=None)
+
+
+def _timed_execute(execute, sql, params, many, context):
+    timer = _request_sql_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
+
+
+@receiver(connection_created)
+def install_sql_timer(sender, connection, **kwargs):
+    """Wraps every connection of every thread, as it connects, with the timer of the current request."""
+    # The wrapper list outlives reconnections
+    if _timed_execute not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_timed_execute)
+
+
+class MetricsMiddleware:
+    """
+    Records each request's latency, SQL queries, SQL time and response size under its URL name.
+    Streaming responses are timed until the response starts and have no recorded size.
+    Works in both sync and async stacks, so it doesn't force async views into a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        sql = SqlTimer()
+        started = time.perf_counter()
+        token = _request_sql_timer.set(sql)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_sql_timer.reset(token)
+        self._observe(request, response, time.perf_counter() - started, sql)
+        return response
+
+    async def __acall__(self, request):
+        sql = SqlTimer()
+        started = time.perf_counter()
+        token = _request_sql_timer.set(sql)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_sql_timer.reset(token)
+        self._observe(request, response, time.perf_counter() - started, sql)
+        return response
+
+    def _observe(self, request, response, duration, sql):
+        match = request.resolver_match
+        view = (match.url_name or match.view_name) if match else UNMATCHED_VIEW
+        size = None if response.streaming else len(response.content)
+        get_recorder().observe_request(view, response.status_code, duration, sql.count, sql.seconds, size)
+
+
+def render_prometheus(samples):
+    """Formats {(metric, view, label): sum} samples in the Prometheus text exposition format."""
+    by_metric = {}
+    for (metric, view, label), value in samples.items():
+        by_metric.setdefault(metric, {}).setdefault(view, {})[label] = value
+
+    lines = []
+    for name, kind, help_text in FAMILIES:
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+        if kind == 'counter':
+            for view, values in sorted(by_metric.get(name, {}).items()):
+                for label, value in sorted(values.items()):
+                    labels = f'view="{view}"' + (f',status="{label}"' if label else '')
+                    lines.append(f'{name}{{{labels}}} {_format_value(value)}')
+            continue
+
+        labels = LATENCY_LABELS if name == LATENCY else SIZE_LABELS
+        buckets = by_metric.get(name + '_bucket', {})
+        for view in sorted(buckets):
+            cumulative = 0
+            for bound in labels:
+                cumulative += buckets[view].get(bound, 0)
+                lines.append(f'{name}_bucket{{view="{view}",le="{bound}"}} {_format_value(cumulative)}')
+            lines.append(f'{name}_sum{{view="{view}"}} {_format_value(by_metric[name + "_sum"][view][""])}')
+            lines.append(f'{name}_count{{view="{view}"}} {_format_value(by_metric[name + "_count"][view][""])}')
+    return '\n'.join(lines) + '\n'
+
+
+def _format_value(value):
+    return str(int(value)) if float(value).is_integer() else repr(value)
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0005_alter_holiday_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='academicsession',
+            name='working_saturday_weeks',
+            field=models.PositiveSmallIntegerField(default=5, help_text='Bitmask of the Saturdays of each month that are working days (1st=1, 2nd=2, 3rd=4, 4th=8, 5th=16).'),
+        ),
+        migrations.AddField(
+            model_name='academicsession',
+            name='working_weekdays',
+            field=models.PositiveSmallIntegerField(default=31, help_text='Bitmask of weekdays that are always working days (Mon=1, Tue=2, ..., Sun=64).'),
+        ),
+        migrations.CreateModel(
+            name='SessionCalendar',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_key', models.CharField(max_length=100)),
+                ('start_date', models.DateField()),
+                ('day_flags', models.BinaryField()),
+                ('working_day_prefix', models.BinaryField()),
+                ('holiday_count', models.PositiveIntegerField(default=0)),
+                ('compiled_at', models.DateTimeField(auto_now=True)),
+                ('session', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='calendar', to='attendance.academicsession')),
+            ],
+        ),
+    ]
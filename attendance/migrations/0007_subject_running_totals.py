@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:48
+
+from django.db import migrations, models
+from django.db.models import Max, Sum
+
+
+def populate_totals(apps, schema_editor):
+    Subject = apps.get_model('attendance', 'Subject')
+    AttendanceRecord = apps.get_model('attendance', 'AttendanceRecord')
+    totals = AttendanceRecord.objects.order_by().values('subject_id').annotate(
+        conducted=Sum('classes_conducted'), attended=Sum('classes_attended'), last=Max('date')
+    )
+    for row in totals:
+        Subject.objects.filter(pk=row['subject_id']).update(
+            total_conducted=row['conducted'], total_attended=row['attended'], last_record_date=row['last']
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0006_session_calendar'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subject',
+            name='last_record_date',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='subject',
+            name='total_attended',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='subject',
+            name='total_conducted',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_totals, migrations.RunPython.noop),
+    ]
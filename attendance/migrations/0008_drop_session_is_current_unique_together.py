@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:04
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0007_subject_running_totals'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='academicsession',
+            unique_together=set(),
+        ),
+    ]
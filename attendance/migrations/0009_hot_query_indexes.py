@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0008_drop_session_is_current_unique_together'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        # After auth's last table rebuild of auth_user, which would drop an index it doesn't know about
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='academicsession',
+            index=models.Index(fields=['user', 'start_date'], name='session_user_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendancerecord',
+            index=models.Index(fields=['subject', 'date', 'classes_conducted', 'classes_attended'], name='record_subject_date_cover_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='examdate',
+            index=models.Index(fields=['session', 'start_date'], name='exam_session_start_idx'),
+        ),
+        # SignUpForm.clean_email looks users up by email, which auth_user doesn't index
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS attendance_user_email_idx ON auth_user (email)',
+            reverse_sql='DROP INDEX IF EXISTS attendance_user_email_idx',
+        ),
+    ]
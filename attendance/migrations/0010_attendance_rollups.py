@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+
+
+def populate_rollups(apps, schema_editor):
+    AttendanceRecord = apps.get_model('attendance', 'AttendanceRecord')
+    for model_name, truncate in (('WeeklyAttendance', TruncWeek), ('MonthlyAttendance', TruncMonth)):
+        model = apps.get_model('attendance', model_name)
+        sums = AttendanceRecord.objects.order_by().annotate(period_start=truncate('date')).values('subject_id', 'period_start').annotate(
+            conducted=Sum('classes_conducted'), attended=Sum('classes_attended'),
+        )
+        model.objects.bulk_create(
+            (model(subject_id=row['subject_id'], period_start=row['period_start'], classes_conducted=row['conducted'], classes_attended=row['attended'])
+             for row in sums.iterator()),
+            batch_size=2000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0009_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyAttendance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_start', models.DateField()),
+                ('classes_conducted', models.PositiveIntegerField(default=0)),
+                ('classes_attended', models.PositiveIntegerField(default=0)),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='attendance.subject')),
+            ],
+            options={
+                'ordering': ['period_start'],
+                'abstract': False,
+                'unique_together': {('subject', 'period_start')},
+            },
+        ),
+        migrations.CreateModel(
+            name='WeeklyAttendance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_start', models.DateField()),
+                ('classes_conducted', models.PositiveIntegerField(default=0)),
+                ('classes_attended', models.PositiveIntegerField(default=0)),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='attendance.subject')),
+            ],
+            options={
+                'ordering': ['period_start'],
+                'abstract': False,
+                'unique_together': {('subject', 'period_start')},
+            },
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:39
+
+import attendance.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0010_attendance_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sessioncalendar',
+            name='weekday_prefix',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.AddField(
+            model_name='subject',
+            name='timetable',
+            field=models.JSONField(blank=True, help_text='Classes held on each weekday, Monday first, e.g. [1, 0, 2, 0, 1, 0, 0].', null=True, validators=[attendance.models.validate_timetable]),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:48
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0011_subject_timetable'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='academicsession',
+            name='data_modified_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
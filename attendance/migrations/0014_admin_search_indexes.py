@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:14
+
+import django.db.models.functions.comparison
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0013_background_jobs'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='academicsession',
+            index=models.Index(django.db.models.functions.comparison.Collate('name', 'NOCASE'), name='session_name_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendancerecord',
+            index=models.Index(fields=['date'], name='record_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='examdate',
+            index=models.Index(django.db.models.functions.comparison.Collate('exam_type', 'NOCASE'), name='exam_type_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='holiday',
+            index=models.Index(django.db.models.functions.comparison.Collate('name', 'NOCASE'), name='holiday_name_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subject',
+            index=models.Index(django.db.models.functions.comparison.Collate('name', 'NOCASE'), name='subject_name_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subject',
+            index=models.Index(django.db.models.functions.comparison.Collate('code', 'NOCASE'), name='subject_code_search_idx'),
+        ),
+    ]
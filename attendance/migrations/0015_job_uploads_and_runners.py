@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0014_admin_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='backgroundjob',
+            name='runner',
+            field=models.CharField(blank=True, help_text='host:pid of the process running the job.', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='backgroundjob',
+            name='upload',
+            field=models.CharField(blank=True, help_text='Path of the spooled upload the job reads, if any.', max_length=255),
+        ),
+    ]
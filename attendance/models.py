@@ -1,9 +1,26 @@
 # attendance/models.py
-from django.db import models
+from datetime import timedelta
+from typing import Callable, NamedTuple
+
+from django.core.exceptions import ValidationError
+from django.db import models, transaction, IntegrityError
+from django.db.models import F, Max, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Collate, Greatest, TruncMonth, TruncWeek
 from django.contrib.auth import get_user_model # To link data to specific users
+from django.utils import timezone
+
+from .eligibility_cache import mark_sessions_modified, mark_subject_sessions_modified
+from .workdays import CompiledCalendar, WorkdayRules, DEFAULT_RULES
 
 User = get_user_model()
 
+# SQLite's case-insensitive LIKE, behind the admin's prefix searches, can only use an index in this collation
+SEARCH_COLLATION = 'NOCASE'
+
+# Version of the SessionCalendar contents, part of its source key: changing it recompiles every stored calendar.
+# v2 added the per-weekday prefix sums.
+CALENDAR_FORMAT = 'v2'
+
 # --- AcademicSession Model ---
 class AcademicSession(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='academic_sessions')
@@ -11,16 +28,64 @@ class AcademicSession(models.Model):
     start_date = models.DateField()
     end_date = models.DateField()
     is_current = models.BooleanField(default=False, help_text="Is this the active session for the user?")
+    working_weekdays = models.PositiveSmallIntegerField(
+        default=DEFAULT_RULES.weekdays,
+        help_text="Bitmask of weekdays that are always working days (Mon=1, Tue=2, ..., Sun=64)."
+    )
+    working_saturday_weeks = models.PositiveSmallIntegerField(
+        default=DEFAULT_RULES.saturday_weeks,
+        help_text="Bitmask of the Saturdays of each month that are working days (1st=1, 2nd=2, 3rd=4, 4th=8, 5th=16)."
+    )
+    # When the session or its subjects, records, exams or holidays last changed, see mark_sessions_modified()
+    data_modified_at = models.DateTimeField(default=timezone.now, editable=False)
 
     def __str__(self):
         return f"{self.name} ({self.start_date.year}-{self.end_date.year})"
 
+    @property
+    def workday_rules(self):
+        return WorkdayRules(self.working_weekdays, self.working_saturday_weeks)
+
+    def calendar_source_key(self):
+        """
+        Identifies the session settings a compiled calendar was built from, and the format it was
+        stored in; a stored calendar with a different key is stale.
+        """
+        return f"{CALENDAR_FORMAT}:{self.start_date}:{self.end_date}:{self.working_weekdays}:{self.working_saturday_weeks}"
+
+    def get_calendar(self):
+        """
+        Returns this session's CompiledCalendar, compiling and storing it if it is missing or stale.
+        """
+        try:
+            stored = self.calendar
+        except SessionCalendar.DoesNotExist:
+            stored = None
+        if stored is None or stored.source_key != self.calendar_source_key():
+            stored = SessionCalendar.compile_for(self)
+        return stored.compiled
+
     class Meta:
         # Ensures a user can only have one current session at a time
-        unique_together = ('user', 'is_current')
         constraints = [
             models.UniqueConstraint(fields=['user'], condition=models.Q(is_current=True), name='unique_current_session')
         ]
+        indexes = [
+            # Session lists, newest first (read backwards)
+            models.Index(fields=['user', 'start_date'], name='session_user_start_idx'),
+            models.Index(Collate('name', SEARCH_COLLATION), name='session_name_search_idx'),
+        ]
+
+
+def validate_timetable(value):
+    if value is None:
+        return
+    if not (isinstance(value, list) and len(value) == 7 and all(isinstance(classes, int) and not isinstance(classes, bool) and classes >= 0 for classes in value)):
+        raise ValidationError("A timetable is a list of 7 non-negative class counts, Monday first.")
+
+
+# Maintained by AttendanceRecord writes, see refresh_subject_totals()
+SUBJECT_TOTALS_FIELDS = ('total_conducted', 'total_attended', 'last_record_date')
 
 
 # --- Subject Model ---
@@ -35,12 +100,156 @@ class Subject(models.Model):
         max_digits=5, decimal_places=2, default=75.00,
         help_text="Minimum attendance required (e.g., 75.00 for 75%)"
     )
+    # Classes on each weekday, Monday first, when the subject's timetable is known
+    timetable = models.JSONField(
+        null=True, blank=True, validators=[validate_timetable],
+        help_text="Classes held on each weekday, Monday first, e.g. [1, 0, 2, 0, 1, 0, 0]."
+    )
+    # Running totals over this subject's attendance records, maintained by AttendanceRecord writes
+    total_conducted = models.PositiveIntegerField(default=0, editable=False)
+    total_attended = models.PositiveIntegerField(default=0, editable=False)
+    last_record_date = models.DateField(null=True, blank=True, editable=False)
 
     def __str__(self):
         return f"{self.name} ({self.code or 'N/A'}) - {self.session.name}"
 
+    @property
+    def current_percentage(self):
+        return (self.total_attended / self.total_conducted * 100) if self.total_conducted > 0 else 0
+
+    def save(self, *args, **kwargs):
+        # Never write the running totals back from a possibly stale instance;
+        # only AttendanceRecord writes maintain them.
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.attname for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in SUBJECT_TOTALS_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
     class Meta:
         unique_together = ('session', 'name') # A subject name should be unique within a session
+        indexes = [
+            models.Index(Collate('name', SEARCH_COLLATION), name='subject_name_search_idx'),
+            models.Index(Collate('code', SEARCH_COLLATION), name='subject_code_search_idx'),
+        ]
+
+
+def refresh_subject_totals(subject_ids):
+    """
+    Recomputes the running totals of the given subjects from their attendance records, in one UPDATE.
+    """
+    subject_ids = set(subject_ids)
+    if not subject_ids:
+        return
+    records = AttendanceRecord.objects.filter(subject=OuterRef('pk')).order_by().values('subject')
+    Subject.objects.filter(pk__in=subject_ids).update(
+        total_conducted=Coalesce(Subquery(records.annotate(total=Sum('classes_conducted')).values('total')), 0),
+        total_attended=Coalesce(Subquery(records.annotate(total=Sum('classes_attended')).values('total')), 0),
+        last_record_date=Subquery(records.annotate(last=Max('date')).values('last')),
+    )
+
+
+# Writing any of these record fields changes the subject totals
+TOTALS_FIELDS = {'subject', 'subject_id', 'date', 'classes_conducted', 'classes_attended'}
+# ...and these also move the record to other rollup periods
+ROLLUP_KEY_FIELDS = {'subject', 'subject_id', 'date'}
+
+HISTORY_PAGE_SIZE = 50
+HISTORY_FIELDS = ('id', 'date', 'classes_conducted', 'classes_attended')
+
+
+class AttendanceRecordQuerySet(models.QuerySet):
+    """
+    Keeps Subject running totals and the cached eligibility in step with queryset-level
+    bulk writes, which bypass AttendanceRecord.save() and delete() and their signals.
+    """
+
+    def history_page(self, before=None, size=HISTORY_PAGE_SIZE):
+        """
+        Returns (rows, next_cursor) for one page of records as HISTORY_FIELDS dicts, newest first.
+        Pages seek on (date, id) from the `before` cursor of the previous page rather than using an
+        OFFSET, so every page costs the same however deep it is; next_cursor is None on the last page.
+        """
+        records = self.order_by('-date', '-id')
+        if before is not None:
+            before_date, before_id = before
+            records = records.filter(Q(date__lt=before_date) | Q(date=before_date, id__lt=before_id))
+        rows = list(records.values(*HISTORY_FIELDS)[:size + 1])
+        if len(rows) <= size:
+            return rows, None
+        last = rows[size - 1]
+        return rows[:size], (last['date'], last['id'])
+
+    def _rollup_keys(self):
+        """The (subject_id, date) of every record in this queryset, which locate its rollup periods."""
+        return set(self.order_by().values_list('subject_id', 'date').distinct())
+
+    def update(self, **kwargs):
+        if not TOTALS_FIELDS.intersection(kwargs):
+            return super().update(**kwargs)
+        with transaction.atomic(using=self.db):
+            keys = self._rollup_keys()
+            moved = ROLLUP_KEY_FIELDS.intersection(kwargs)
+            pks = list(self.order_by().values_list('pk', flat=True)) if moved else None
+            rows = super().update(**kwargs)
+            if moved:
+                keys |= self.model.objects.filter(pk__in=pks)._rollup_keys()
+            subject_ids = {subject_id for subject_id, _ in keys}
+            refresh_subject_totals(subject_ids)
+            refresh_rollups(keys)
+            mark_subject_sessions_modified(subject_ids)
+        return rows
+
+    def delete(self):
+        with transaction.atomic(using=self.db):
+            keys = self._rollup_keys()
+            result = super().delete()
+            subject_ids = {subject_id for subject_id, _ in keys}
+            refresh_subject_totals(subject_ids)
+            refresh_rollups(keys)
+            mark_subject_sessions_modified(subject_ids)
+        return result
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        with transaction.atomic(using=self.db):
+            created = super().bulk_create(objs, *args, **kwargs)
+            if kwargs.get('ignore_conflicts') or kwargs.get('update_conflicts'):
+                # Which rows were actually written is unknown, so recount.
+                refresh_subject_totals(obj.subject_id for obj in objs)
+            else:
+                deltas = {}
+                for obj in objs:
+                    conducted, attended, last = deltas.get(obj.subject_id, (0, 0, obj.date))
+                    deltas[obj.subject_id] = (conducted + obj.classes_conducted, attended + obj.classes_attended, max(last, obj.date))
+                for subject_id, (conducted, attended, last) in deltas.items():
+                    Subject.objects.filter(pk=subject_id).update(
+                        total_conducted=F('total_conducted') + conducted,
+                        total_attended=F('total_attended') + attended,
+                        last_record_date=Greatest(Coalesce('last_record_date', Value(last)), Value(last)),
+                    )
+            refresh_rollups((obj.subject_id, obj.date) for obj in objs)
+            mark_subject_sessions_modified({obj.subject_id for obj in objs})
+        return created
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        if not TOTALS_FIELDS.intersection(fields):
+            return super().bulk_update(objs, fields, *args, **kwargs)
+        with transaction.atomic(using=self.db):
+            keys = {(obj.subject_id, obj.date) for obj in objs}
+            if ROLLUP_KEY_FIELDS.intersection(fields):
+                keys |= self.model.objects.filter(pk__in=[obj.pk for obj in objs])._rollup_keys()
+            rows = super().bulk_update(objs, fields, *args, **kwargs)
+            subject_ids = {subject_id for subject_id, _ in keys}
+            refresh_subject_totals(subject_ids)
+            refresh_rollups(keys)
+            mark_subject_sessions_modified(subject_ids)
+        return rows
 
 
 # --- AttendanceRecord Model ---
@@ -54,12 +263,181 @@ class AttendanceRecord(models.Model):
         default=0, help_text="Number of classes attended by the student on this date for the subject."
     )
 
+    objects = AttendanceRecordQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.subject.name} - {self.date}: {self.classes_attended}/{self.classes_conducted}"
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            previous = None
+            if self.pk is not None:
+                previous = AttendanceRecord.objects.filter(pk=self.pk).values(
+                    'subject_id', 'date', 'classes_conducted', 'classes_attended'
+                ).first()
+            super().save(*args, **kwargs)
+
+            if previous is None:
+                self._adjust_subject_totals(self.classes_conducted, self.classes_attended)
+                adjust_rollups(self.subject_id, self.date, self.classes_conducted, self.classes_attended)
+                self._mark_sessions_modified({self.subject_id})
+            elif previous['subject_id'] != self.subject_id or previous['date'] != self.date:
+                refresh_subject_totals([previous['subject_id'], self.subject_id])
+                refresh_rollups([(previous['subject_id'], previous['date']), (self.subject_id, self.date)])
+                self._mark_sessions_modified({previous['subject_id'], self.subject_id})
+            else:
+                conducted_delta = self.classes_conducted - previous['classes_conducted']
+                attended_delta = self.classes_attended - previous['classes_attended']
+                self._adjust_subject_totals(conducted_delta, attended_delta)
+                if conducted_delta or attended_delta:
+                    adjust_rollups(self.subject_id, self.date, conducted_delta, attended_delta)
+                self._mark_sessions_modified({self.subject_id})
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            refresh_subject_totals([self.subject_id])
+            refresh_rollups([(self.subject_id, self.date)])
+            self._mark_sessions_modified({self.subject_id})
+        return result
+
+    def _mark_sessions_modified(self, subject_ids):
+        # Stamped here rather than from post_save/post_delete receivers, whose presence would make
+        # every cascade or queryset delete of records load them and signal once per row
+        if subject_ids == {self.subject_id} and AttendanceRecord.subject.is_cached(self) and self.subject.pk == self.subject_id:
+            mark_sessions_modified([self.subject.session_id])
+        else:
+            mark_subject_sessions_modified(subject_ids)
+
+    def _adjust_subject_totals(self, conducted_delta, attended_delta):
+        Subject.objects.filter(pk=self.subject_id).update(
+            total_conducted=F('total_conducted') + conducted_delta,
+            total_attended=F('total_attended') + attended_delta,
+            last_record_date=Greatest(Coalesce('last_record_date', Value(self.date)), Value(self.date)),
+        )
+
     class Meta:
         unique_together = ('subject', 'date') # Only one attendance record per subject per day
         ordering = ['-date'] # Order records by newest first
+        indexes = [
+            # Covers the history pages and the totals sums without reading the table
+            models.Index(fields=['subject', 'date', 'classes_conducted', 'classes_attended'], name='record_subject_date_cover_idx'),
+            # The admin's list of all records, newest first (SQLite keys each entry by its id as well)
+            models.Index(fields=['date'], name='record_date_idx'),
+        ]
+
+# --- Attendance Rollups ---
+class RollupPeriod(NamedTuple):
+    """The periods an AttendanceRollup sums over, computed alike in the database and in Python."""
+    truncate: type # database function truncating a date to its period's start
+    start_of: Callable # the same in Python
+    next_start: Callable # a period's start to the next period's
+
+
+WEEK = RollupPeriod(TruncWeek, lambda day: day - timedelta(days=day.weekday()), lambda start: start + timedelta(days=7))
+MONTH = RollupPeriod(TruncMonth, lambda day: day.replace(day=1), lambda start: (start + timedelta(days=31)).replace(day=1))
+
+
+class AttendanceRollup(models.Model):
+    """
+    The sums of a subject's attendance records over one period, so that summaries read a row per
+    period instead of a row per record. Maintained by AttendanceRecord writes like the subject
+    running totals: adjust_rollups() for single-record changes, refresh_rollups() otherwise.
+    Subclasses set `period` to a RollupPeriod.
+    """
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE, related_name='+')
+    period_start = models.DateField()
+    classes_conducted = models.PositiveIntegerField(default=0)
+    classes_attended = models.PositiveIntegerField(default=0)
+
+    period = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if not isinstance(cls.period, RollupPeriod):
+            raise TypeError(f"{cls.__name__} must set `period` to a RollupPeriod.")
+
+    @classmethod
+    def period_of(cls, day):
+        """The period_start of the period containing `day`."""
+        return cls.period.start_of(day)
+
+    @classmethod
+    def next_period(cls, period_start):
+        return cls.period.next_start(period_start)
+
+    @property
+    def percentage(self):
+        return (self.classes_attended / self.classes_conducted * 100) if self.classes_conducted > 0 else 0
+
+    class Meta:
+        abstract = True
+        unique_together = ('subject', 'period_start')
+        ordering = ['period_start']
+
+
+class WeeklyAttendance(AttendanceRollup):
+    """Attendance sums per subject and week; weeks start on Monday."""
+    period = WEEK
+
+    def __str__(self):
+        return f"Subject {self.subject_id}, week of {self.period_start}: {self.classes_attended}/{self.classes_conducted}"
+
+
+class MonthlyAttendance(AttendanceRollup):
+    """Attendance sums per subject and calendar month."""
+    period = MONTH
+
+    def __str__(self):
+        return f"Subject {self.subject_id}, {self.period_start:%B %Y}: {self.classes_attended}/{self.classes_conducted}"
+
+
+ROLLUP_MODELS = (WeeklyAttendance, MonthlyAttendance)
+
+
+def adjust_rollups(subject_id, day, conducted_delta, attended_delta):
+    """Adds a change in one record's counts to the rollups of its week and month."""
+    changes = {
+        'classes_conducted': F('classes_conducted') + conducted_delta,
+        'classes_attended': F('classes_attended') + attended_delta,
+    }
+    for model in ROLLUP_MODELS:
+        rows = model.objects.filter(subject_id=subject_id, period_start=model.period_of(day))
+        if not rows.update(**changes):
+            # The period's first record; a concurrent write may create the row first, so don't fail on it
+            model.objects.bulk_create([model(subject_id=subject_id, period_start=model.period_of(day))], ignore_conflicts=True)
+            rows.update(**changes)
+
+
+def aggregate_rollups(model, records):
+    """Sums `records` per subject and `model` period; a values queryset of subject_id, period_start and the sums."""
+    return records.order_by().annotate(period_start=model.period.truncate('date')).values('subject_id', 'period_start').annotate(
+        conducted=Sum('classes_conducted'), attended=Sum('classes_attended'),
+    )
+
+
+def refresh_rollups(keys):
+    """
+    Recomputes from the records the rollups of the periods containing the given (subject_id, date)
+    keys, with three queries per rollup table however many keys there are. Periods left without
+    records lose their rollup row.
+    """
+    keys = set(keys)
+    if not keys:
+        return
+    subject_ids = {subject_id for subject_id, _ in keys}
+    for model in ROLLUP_MODELS:
+        # Every period of every given subject in the range is recomputed, which is a superset of the keys
+        starts = {model.period_of(day) for _, day in keys}
+        records = AttendanceRecord.objects.filter(
+            subject_id__in=subject_ids, date__gte=min(starts), date__lt=model.next_period(max(starts)),
+        )
+        sums = [row for row in aggregate_rollups(model, records) if row['period_start'] in starts]
+        model.objects.filter(subject_id__in=subject_ids, period_start__in=starts).delete()
+        model.objects.bulk_create(
+            model(subject_id=row['subject_id'], period_start=row['period_start'], classes_conducted=row['conducted'], classes_attended=row['attended'])
+            for row in sums
+        )
 
 # --- ExamDate Model ---
 class ExamDate(models.Model):
@@ -77,6 +455,10 @@ class ExamDate(models.Model):
     class Meta:
         unique_together = ('session', 'exam_type')
         ordering = ['start_date']
+        indexes = [
+            models.Index(fields=['session', 'start_date'], name='exam_session_start_idx'),
+            models.Index(Collate('exam_type', SEARCH_COLLATION), name='exam_type_search_idx'),
+        ]
 
 # --- Holiday Model ---
 class Holiday(models.Model):
@@ -89,7 +471,112 @@ class Holiday(models.Model):
         # ADD THIS UNIQUE CONSTRAINT:
         unique_together = ('session', 'date')
         ordering = ['date'] # Optional: Keeps holidays sorted by date
+        indexes = [
+            models.Index(Collate('name', SEARCH_COLLATION), name='holiday_name_search_idx'),
+        ]
 
     def __str__(self):
         # Update the __str__ method to include the name
-        return f"{self.date} - {self.name or 'Holiday'} ({self.session.name})"
\ No newline at end of file
+        return f"{self.date} - {self.name or 'Holiday'} ({self.session.name})"
+
+# --- SessionCalendar Model ---
+class SessionCalendar(models.Model):
+    """
+    The compiled working-day calendar of a session (see workdays.CompiledCalendar).
+    It is deleted whenever the session's holidays change and recompiled on next use.
+    """
+    session = models.OneToOneField(AcademicSession, on_delete=models.CASCADE, related_name='calendar')
+    source_key = models.CharField(max_length=100)
+    start_date = models.DateField()
+    day_flags = models.BinaryField()
+    working_day_prefix = models.BinaryField()
+    weekday_prefix = models.BinaryField(default=b'')
+    holiday_count = models.PositiveIntegerField(default=0)
+    compiled_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Calendar for {self.session_id} ({self.start_date}, {len(self.day_flags)} days)"
+
+    @property
+    def compiled(self):
+        if not hasattr(self, '_compiled'):
+            self._compiled = CompiledCalendar.from_bytes(
+                self.start_date, self.day_flags, self.working_day_prefix, self.session.workday_rules, self.weekday_prefix
+            )
+        return self._compiled
+
+    @classmethod
+    def compile_for(cls, session):
+        holidays = list(Holiday.objects.filter(session=session).order_by('date').values_list('date', flat=True))
+        compiled = CompiledCalendar.compile(session.start_date, session.end_date, holidays, session.workday_rules)
+        fields = {
+            'source_key': session.calendar_source_key(),
+            'start_date': compiled.start_date,
+            'day_flags': compiled.day_flags,
+            'working_day_prefix': compiled.prefix_bytes(),
+            'weekday_prefix': compiled.weekday_prefix_bytes(),
+            'holiday_count': len(holidays),
+        }
+        try:
+            stored, _ = cls.objects.update_or_create(session=session, defaults=fields)
+        except IntegrityError:
+            # Another request compiled it at the same time; ours is just as good.
+            stored = cls(session=session, **fields)
+        stored.session = session
+        stored._compiled = compiled
+        session.calendar = stored
+        return stored
+
+    @classmethod
+    def invalidate(cls, session_ids):
+        cls.objects.filter(session_id__in=session_ids).delete()
+
+# --- BackgroundJob Model ---
+class BackgroundJob(models.Model):
+    """
+    A bulk operation, such as an import, accepted from a request and run later by a job runner
+    (see attendance/jobs.py). The input is kept in `payload`, or for uploads in the file at `upload`,
+    until the job finishes; the counts and first errors of its result are stored when it does.
+    Progress while running is in the cache.
+    """
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='background_jobs')
+    session = models.ForeignKey(AcademicSession, on_delete=models.CASCADE, related_name='background_jobs', null=True, blank=True)
+    kind = models.CharField(max_length=50, help_text="The registered job handler, see attendance/jobs.py.")
+    payload = models.TextField(blank=True)
+    upload = models.CharField(max_length=255, blank=True, help_text="Path of the spooled upload the job reads, if any.")
+    options = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    rows_processed = models.PositiveIntegerField(default=0)
+    created = models.PositiveIntegerField(default=0)
+    updated = models.PositiveIntegerField(default=0)
+    skipped = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    runner = models.CharField(max_length=100, blank=True, help_text="host:pid of the process running the job.")
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.kind} job {self.pk} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_DONE, self.STATUS_FAILED)
+
+    class Meta:
+        indexes = [
+            # The runners' claim of the oldest queued job, and their sweep of stale running ones
+            models.Index(fields=['status', 'id'], name='job_status_idx'),
+        ]
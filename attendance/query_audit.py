@@ -0,0 +1,62 @@
+# attendance/query_audit.py
+# The app's hot queries, and a check of their SQLite query plans for full scans and sorts.
+# Run it with `python manage.py audit_query_plans`.
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.db.models import Sum
+
+from .models import HISTORY_FIELDS, HISTORY_PAGE_SIZE, AcademicSession, AttendanceRecord, ExamDate, Holiday, Subject
+
+User = get_user_model()
+
+FULL_SCAN = 'full scan'
+TEMP_SORT = 'temp sort'
+
+
+def hot_queries(user_id=1, session_id=1, subject_id=1):
+    """
+    Returns {name: queryset} for the queries behind the busiest pages, built the way the views
+    build them. The ids only fill in parameters; SQLite plans don't depend on their values.
+    """
+    return {
+        'current_session': AcademicSession.objects.filter(user_id=user_id, is_current=True),
+        'session_list': AcademicSession.objects.filter(user_id=user_id).order_by('-start_date', '-id'),
+        'session_subjects': Subject.objects.filter(session_id=session_id).order_by('name'),
+        'session_exams': ExamDate.objects.filter(session_id=session_id).order_by('start_date'),
+        'holidays_in_range': Holiday.objects.filter(
+            session_id=session_id, date__range=(date(2025, 1, 1), date(2025, 6, 30))
+        ).values_list('date', flat=True),
+        'subject_history': AttendanceRecord.objects.filter(subject_id=subject_id).order_by('-date', '-id').values(*HISTORY_FIELDS)[:HISTORY_PAGE_SIZE + 1],
+        'subject_totals': AttendanceRecord.objects.filter(subject_id=subject_id).values('subject_id').annotate(
+            conducted=Sum('classes_conducted'), attended=Sum('classes_attended')
+        ).order_by(),
+        'signup_email': User.objects.filter(email='student@example.com').values('pk')[:1],
+    }
+
+
+def plan_details(queryset):
+    """Returns the detail column of each step of the queryset's EXPLAIN QUERY PLAN."""
+    # Django formats each SQLite plan row as 'id parent notused detail'
+    return [line.split(' ', 3)[3] for line in queryset.explain().splitlines()]
+
+
+def plan_problems(details):
+    """Flags plan steps that read a whole table or index, or sort in a temporary b-tree."""
+    problems = []
+    for detail in details:
+        if detail.startswith('SCAN ') and detail != 'SCAN CONSTANT ROW':
+            problems.append((FULL_SCAN, detail))
+        elif detail.startswith('USE TEMP B-TREE'):
+            problems.append((TEMP_SORT, detail))
+    return problems
+
+
+def audit(queries=None):
+    """Returns [(name, plan details, problems)] for each hot query."""
+    queries = hot_queries() if queries is None else queries
+    results = []
+    for name, queryset in queries.items():
+        details = plan_details(queryset)
+        results.append((name, details, plan_problems(details)))
+    return results
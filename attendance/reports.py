@@ -0,0 +1,125 @@
+# attendance/reports.py
+# The institution-wide eligibility report, run with `python manage.py eligibility_report`.
+#
+# Sessions are split into chunks, evaluated one after another in this process or, with --workers,
+# by worker processes, whose startup only pays off on a machine with cores to spare. Each chunk loads
+# its sessions, subjects, exams and calendars in a handful of set-based queries (subjects carry
+# their running attendance totals, so no records are read) and projects eligibility with the same
+# batch computation as the dashboard. Chunks come back in order, so the output is deterministic.
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from django.db import connections
+
+from .eligibility import STATUS_INELIGIBLE, STATUS_LABELS, project_eligibility_batch
+from .models import AcademicSession, ExamDate, Holiday, SessionCalendar, Subject
+from .workdays import CompiledCalendar
+
+DEFAULT_CHUNK_SIZE = 200
+
+REPORT_COLUMNS = (
+    'username', 'session', 'subject', 'code', 'classes_conducted', 'classes_attended', 'percentage', 'minimum_percentage',
+    'exam', 'exam_date', 'status', 'projected_classes', 'classes_to_attend', 'classes_can_miss',
+)
+# A subject is at risk for an exam when it can't reach the minimum, or can miss at most this many more classes
+DEFAULT_AT_RISK_MISSES = 2
+
+
+def is_at_risk(exam_info, at_risk_misses=DEFAULT_AT_RISK_MISSES):
+    if exam_info['status'] == STATUS_LABELS[STATUS_INELIGIBLE]:
+        return True
+    return exam_info['classes_remaining_to_be_conducted'] > 0 and exam_info['classes_can_miss'] <= at_risk_misses
+
+
+def report_session_ids(all_sessions=False):
+    """The ids of the sessions to report on, current ones unless `all_sessions`, grouped by user."""
+    sessions = AcademicSession.objects.all() if all_sessions else AcademicSession.objects.filter(is_current=True)
+    return list(sessions.order_by('user_id', 'id').values_list('id', flat=True))
+
+
+def _calendars(sessions):
+    """
+    Returns {session_id: CompiledCalendar}, using the stored calendars that are up to date and
+    compiling the others in memory from one query for all their holidays, without storing them.
+    """
+    calendars = {}
+    stale = {}
+    for session in sessions:
+        try:
+            stored = session.calendar
+        except SessionCalendar.DoesNotExist:
+            stored = None
+        if stored is not None and stored.source_key == session.calendar_source_key():
+            calendars[session.pk] = stored.compiled
+        else:
+            stale[session.pk] = session
+    if stale:
+        holidays = {session_id: [] for session_id in stale}
+        for session_id, holiday_date in Holiday.objects.filter(session_id__in=stale).order_by('session_id', 'date').values_list('session_id', 'date'):
+            holidays[session_id].append(holiday_date)
+        for session_id, session in stale.items():
+            calendars[session_id] = CompiledCalendar.compile(session.start_date, session.end_date, holidays[session_id], session.workday_rules)
+    return calendars
+
+
+def evaluate_chunk(session_ids, today, at_risk_misses=None):
+    """
+    Evaluates every subject of the sessions against each of its session's upcoming exams.
+    Returns (subjects evaluated, [REPORT_COLUMNS row, ...]), by user, session and subject name.
+    With `at_risk_misses`, only the rows at risk by is_at_risk() are kept.
+    """
+    sessions = list(AcademicSession.objects.filter(pk__in=session_ids).select_related('user', 'calendar').order_by('user_id', 'id'))
+    subjects = {session.pk: [] for session in sessions}
+    for subject in Subject.objects.filter(session_id__in=subjects).order_by('session_id', 'name', 'id'):
+        subjects[subject.session_id].append(subject)
+    exams = {session.pk: [] for session in sessions}
+    for exam in ExamDate.objects.filter(session_id__in=exams).order_by('session_id', 'start_date'):
+        exams[exam.session_id].append(exam)
+    calendars = _calendars([session for session in sessions if subjects[session.pk] and exams[session.pk]])
+
+    rows = []
+    subject_count = 0
+    for session in sessions:
+        session_subjects = subjects[session.pk]
+        subject_count += len(session_subjects)
+        upcoming = [exam for exam in exams[session.pk] if exam.start_date > today]
+        if not session_subjects or not upcoming:
+            continue
+        eligibility = project_eligibility_batch(session_subjects, session, exams[session.pk], calendars[session.pk], today)
+        for subject, info in zip(session_subjects, eligibility):
+            for exam in upcoming:
+                exam_info = info[exam.exam_type]
+                if at_risk_misses is not None and not is_at_risk(exam_info, at_risk_misses):
+                    continue
+                rows.append((
+                    session.user.username, session.name, subject.name, subject.code, subject.total_conducted, subject.total_attended,
+                    round(subject.current_percentage, 2), subject.minimum_attendance_percentage,
+                    exam.exam_type, exam.start_date.isoformat(), exam_info['status'], exam_info['total_projected_classes'],
+                    exam_info['classes_to_attend_for_eligibility'], exam_info['classes_can_miss'],
+                ))
+    return subject_count, rows
+
+
+def _init_worker():
+    # Spawned workers start without Django set up; forked ones must not use the parent's connections
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+    connections.close_all()
+
+
+def run_report(session_ids, today, chunk_size=DEFAULT_CHUNK_SIZE, workers=1, at_risk_misses=None):
+    """
+    Evaluates the sessions `chunk_size` at a time, on `workers` processes (in this process if 1),
+    yielding each chunk's evaluate_chunk() result in order as it becomes available.
+    """
+    chunks = [session_ids[start:start + chunk_size] for start in range(0, len(session_ids), chunk_size)]
+    if workers <= 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            yield evaluate_chunk(chunk, today, at_risk_misses)
+        return
+
+    connections.close_all() # not to be inherited by forked workers
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        yield from pool.map(evaluate_chunk, chunks, repeat(today), repeat(at_risk_misses))
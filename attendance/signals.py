@@ -0,0 +1,32 @@
+# attendance/signals.py
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .eligibility_cache import mark_sessions_modified
+from .models import AcademicSession, ExamDate, Holiday, SessionCalendar, Subject
+
+
+# Holiday changes make the session's compiled calendar stale; it is recompiled on next use.
+@receiver(post_save, sender=Holiday)
+@receiver(post_delete, sender=Holiday)
+def invalidate_session_calendar(sender, instance, **kwargs):
+    SessionCalendar.invalidate([instance.session_id])
+
+
+# Any change to data that eligibility depends on stamps the session's data_modified_at.
+# (Attendance records stamp it themselves, in AttendanceRecord and AttendanceRecordQuerySet.)
+@receiver(post_save, sender=Holiday)
+@receiver(post_delete, sender=Holiday)
+@receiver(post_save, sender=ExamDate)
+@receiver(post_delete, sender=ExamDate)
+@receiver(post_save, sender=Subject)
+@receiver(post_delete, sender=Subject)
+def mark_session_modified(sender, instance, **kwargs):
+    mark_sessions_modified([instance.session_id])
+
+
+@receiver(post_save, sender=AcademicSession)
+@receiver(post_delete, sender=AcademicSession)
+def mark_own_session_modified(sender, instance, **kwargs):
+    mark_sessions_modified([instance.pk])
+
@@ -0,0 +1,102 @@
+# attendance/synthetic.py
+# Generates realistic attendance data at a configurable scale, for benchmarks and load testing.
+# Run it with `python manage.py generate_synthetic_data`.
+import random
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from .importers import _batches
+from .models import AcademicSession, AttendanceRecord, ExamDate, Holiday, Subject
+from .workdays import DEFAULT_RULES, is_working_day
+
+User = get_user_model()
+
+SUBJECT_NAMES = (
+    ('Data Structures', 'CS201'), ('Algorithms', 'CS301'), ('Operating Systems', 'CS302'),
+    ('Database Systems', 'CS303'), ('Computer Networks', 'CS304'), ('Discrete Mathematics', 'MA201'),
+    ('Linear Algebra', 'MA202'), ('Probability and Statistics', 'MA301'), ('Digital Logic', 'EC201'),
+    ('Signals and Systems', 'EC301'), ('Engineering Physics', 'PH101'), ('Technical Writing', 'HS101'),
+)
+EXAM_TYPES = ('Quiz 1', 'Mid Term', 'Quiz 2', 'End Term', 'Practical')
+HOLIDAY_NAMES = ('Festival', 'National Holiday', 'Founders Day', 'Sports Day', 'Cultural Fest', 'Election Day')
+
+# Gap between consecutive sessions of a user, and how far the current session runs past today
+SESSION_BREAK_DAYS = 30
+UPCOMING_DAYS = 60
+
+
+def generate_dataset(users=10, sessions_per_user=2, subjects_per_session=6, days=120, holidays_per_session=8,
+                     exams_per_session=3, username_prefix='student', seed=0, today=None, batch_size=5000):
+    """
+    Creates `users` users, each with `sessions_per_user` consecutive sessions. The last session is
+    current: it started `days` days ago and ends UPCOMING_DAYS from today. Each session has subjects,
+    holidays on working days, exams spread over it, and one attendance record per subject for each
+    working day on which it had classes, up to yesterday, so that today is still free to add.
+    Students attend at a steady per-user rate. Returns the number of rows created per model.
+    """
+    rng = random.Random(seed)
+    today = today or date.today()
+    counts = dict.fromkeys(('users', 'sessions', 'subjects', 'holidays', 'exams', 'records'), 0)
+
+    with transaction.atomic():
+        new_users = User.objects.bulk_create(
+            User(username=f'{username_prefix}{i}', email=f'{username_prefix}{i}@example.com', password='!')
+            for i in range(users)
+        )
+        counts['users'] = len(new_users)
+
+        sessions = []
+        for user in new_users:
+            end = today + timedelta(days=UPCOMING_DAYS)
+            start = today - timedelta(days=days)
+            for n in reversed(range(sessions_per_user)):
+                sessions.append(AcademicSession(
+                    user=user, name=f'Semester {n + 1}', start_date=start, end_date=end, is_current=n == sessions_per_user - 1,
+                ))
+                end = start - timedelta(days=SESSION_BREAK_DAYS)
+                start = end - timedelta(days=days + UPCOMING_DAYS)
+        sessions = AcademicSession.objects.bulk_create(sessions, batch_size=batch_size)
+        counts['sessions'] = len(sessions)
+
+        subjects, holidays, exams = [], {}, []
+        for session in sessions:
+            span = (session.end_date - session.start_date).days
+            working = [d for d in (session.start_date + timedelta(days=i) for i in range(span + 1)) if is_working_day(d, DEFAULT_RULES)]
+            holidays[session] = sorted(rng.sample(working, min(holidays_per_session, len(working))))
+            for i, exam_type in enumerate(EXAM_TYPES[:exams_per_session]):
+                exam_start = session.start_date + timedelta(days=span * (i + 1) // (exams_per_session + 1))
+                exams.append(ExamDate(session=session, exam_type=exam_type, start_date=exam_start, end_date=exam_start + timedelta(days=4)))
+            for name, code in rng.sample(SUBJECT_NAMES, min(subjects_per_session, len(SUBJECT_NAMES))):
+                subjects.append(Subject(
+                    session=session, name=name, code=code, classes_per_week=rng.randint(2, 5),
+                    minimum_attendance_percentage=rng.choice((60, 75, 75, 80)),
+                ))
+        subjects = Subject.objects.bulk_create(subjects, batch_size=batch_size)
+        counts['subjects'] = len(subjects)
+        counts['holidays'] = len(Holiday.objects.bulk_create(
+            (Holiday(session=session, date=d, name=rng.choice(HOLIDAY_NAMES)) for session, dates in holidays.items() for d in dates),
+            batch_size=batch_size,
+        ))
+        counts['exams'] = len(ExamDate.objects.bulk_create(exams, batch_size=batch_size))
+
+        attendance_rate = {user.pk: rng.uniform(0.55, 0.98) for user in new_users}
+        holiday_sets = {session.pk: set(dates) for session, dates in holidays.items()}
+
+        def records():
+            for subject in subjects:
+                session = subject.session
+                rate = attendance_rate[session.user_id]
+                held = subject.classes_per_week / 5 # chance of a class on any working day
+                day, last = session.start_date, min(session.end_date, today - timedelta(days=1))
+                while day <= last:
+                    if is_working_day(day, DEFAULT_RULES) and day not in holiday_sets[session.pk] and rng.random() < held:
+                        conducted = 2 if rng.random() < 0.15 else 1
+                        attended = sum(rng.random() < rate for _ in range(conducted))
+                        yield AttendanceRecord(subject=subject, date=day, classes_conducted=conducted, classes_attended=attended)
+                    day += timedelta(days=1)
+
+        for batch in _batches(records(), batch_size):
+            counts['records'] += len(AttendanceRecord.objects.bulk_create(batch))
+    return counts
@@ -1,3 +1,1721 @@
-from django.test import TestCase
+import asyncio
+import csv
+import json
+import random
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import tracemalloc
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+
+from asgiref.sync import iscoroutinefunction
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, connection, connections
+from django.db.utils import ConnectionHandler
+from django.db.models import F, QuerySet
+from django.db.models.signals import pre_init
+from django.test.utils import CaptureQueriesContext
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from django.urls import reverse
+from django.utils import timezone
+
+from attendance_eligibility_project.database import sqlite_production_databases
+
+from . import views
+from .conditional import page_validators
+from .exporters import EXPORT_CHUNK_SIZE, RECORD_COLUMNS
+from .forms import SESSION_SELECT_SEARCH_THRESHOLD, AcademicSessionForm, HolidayBulkForm, LazyModelSelect, SubjectForm
+from .importers import (
+    IMPORT_MODE_SKIP, IMPORT_MODE_UPSERT, detect_date_format, import_attendance_csv, import_holidays_csv, import_holidays_text,
+)
+from .eligibility_cache import get_cache as get_eligibility_cache, get_stats as get_eligibility_cache_stats
+from .eligibility import (
+    PROJECTION_DETAILS, PROJECTION_TIMETABLE, STATUS_LABELS, divide_round_half_even, evaluate_eligibility, evaluate_pair_reference,
+    project_class_totals, project_eligibility, project_eligibility_batch, to_basis_points, what_if_curves,
+)
+from .models import (
+    CALENDAR_FORMAT, HISTORY_PAGE_SIZE, ROLLUP_MODELS, AcademicSession, AttendanceRecord, AttendanceRollup, BackgroundJob, ExamDate, Holiday, MonthlyAttendance, SessionCalendar, Subject,
+    WeeklyAttendance, aggregate_rollups,
+)
+from .jobs import (
+    JOB_HOLIDAYS_TEXT, claim_next_job, enqueue, get_job_status, requeue_stale_jobs, run_job, run_pending_jobs, start_runner,
+)
+from .metrics import REQUESTS, SQL_QUERIES, SQL_TIME, MetricsRecorder, MetricsStore, get_recorder, render_prometheus, reset_recorder
+from .db_routers import READ_DATABASE_ALIAS, ReadRoutingRouter, read_only_database
+from .reports import evaluate_chunk, report_session_ids
+from .query_audit import FULL_SCAN, TEMP_SORT, audit, plan_details, plan_problems
+from .synthetic import generate_dataset
+from .view_benchmarks import compare_to_baseline
+from .workdays import (
+    CompiledCalendar, WorkdayRules, get_working_days_count, get_working_days_count_by_loop, is_working_day,
+)
+
+User = get_user_model()
+
+
+class StudentSessionTestCase(TestCase):
+    """
+    Tests of a student, 'student' with password 'pw', and their current academic session, both created
+    once per class. The session runs from session_start to session_end: dates, or offsets from today.
+    """
+    session_name = 'Session'
+    session_start, session_end = date(2025, 1, 1), date(2025, 6, 30)
+
+    @classmethod
+    def setUpTestData(cls):
+        today = date.today()
+        start, end = (today + bound if isinstance(bound, timedelta) else bound for bound in (cls.session_start, cls.session_end))
+        cls.user = User.objects.create_user('student', password='pw')
+        cls.session = AcademicSession.objects.create(user=cls.user, name=cls.session_name, start_date=start, end_date=end, is_current=True)
+
+
+# --- Working Day Counter ---
+class WorkingDaysCountTests(SimpleTestCase):
+    def test_matches_loop_on_random_ranges(self):
+        rng = random.Random(1234)
+        base = date(2023, 1, 1)
+        for _ in range(2000):
+            start = base + timedelta(days=rng.randrange(1500))
+            end = start + timedelta(days=rng.randrange(-5, 900))
+            holidays = {start + timedelta(days=rng.randrange(-30, 930)) for _ in range(rng.randrange(25))}
+            with self.subTest(start=start, end=end):
+                self.assertEqual(
+                    get_working_days_count(start, end, sorted(holidays)),
+                    get_working_days_count_by_loop(start, end, holidays),
+                )
+
+    def test_every_short_range_in_a_year(self):
+        # Exhaustively covers partial weeks and month boundaries at both ends.
+        holidays = {date(2025, 1, 4), date(2025, 1, 5), date(2025, 1, 6), date(2025, 3, 15)}
+        for offset in range(365):
+            start = date(2025, 1, 1) + timedelta(days=offset)
+            for length in range(0, 40):
+                end = start + timedelta(days=length)
+                self.assertEqual(
+                    get_working_days_count(start, end, holidays),
+                    get_working_days_count_by_loop(start, end, holidays),
+                )
+
+    def test_holidays_on_non_working_days_are_ignored(self):
+        # 2025-06-08 is a Sunday, 2025-06-14 the 2nd Saturday, 2025-06-09 a Monday.
+        holidays = [date(2025, 6, 8), date(2025, 6, 9), date(2025, 6, 14)]
+        self.assertEqual(get_working_days_count(date(2025, 6, 1), date(2025, 6, 30), holidays), 22)
+
+    def test_unsorted_holiday_lists(self):
+        holidays = [date(2025, 6, 20), date(2025, 7, 1), date(2025, 6, 9), date(2025, 5, 30), date(2025, 6, 9)]
+        for container in (list, tuple):
+            with self.subTest(container=container):
+                self.assertEqual(get_working_days_count(date(2025, 6, 1), date(2025, 6, 30), container(holidays)), 21)
+
+    def test_reversed_range_is_zero(self):
+        self.assertEqual(get_working_days_count(date(2025, 2, 1), date(2025, 1, 1), []), 0)
+
+
+# --- Compiled Session Calendar ---
+class CompiledCalendarTests(SimpleTestCase):
+    def test_matches_counter_for_any_rules_and_range(self):
+        rng = random.Random(99)
+        for rules in (WorkdayRules(), WorkdayRules(0b0111111, 0), WorkdayRules(0b0011111, 0b10001), WorkdayRules(0b1000001, 0b01010)):
+            holidays = sorted({date(2025, 1, 1) + timedelta(days=rng.randrange(200)) for _ in range(20)})
+            calendar = CompiledCalendar.compile(date(2025, 1, 15), date(2025, 6, 30), holidays, rules)
+            for _ in range(300):
+                start = date(2024, 11, 1) + timedelta(days=rng.randrange(400))
+                end = start + timedelta(days=rng.randrange(-3, 300))
+                with self.subTest(rules=rules, start=start, end=end):
+                    expected = sum(
+                        1 for offset in range((end - start).days + 1)
+                        if is_working_day(start + timedelta(days=offset), rules) and start + timedelta(days=offset) not in holidays
+                    )
+                    self.assertEqual(calendar.working_days(start, end), expected)
+                    self.assertEqual(get_working_days_count(start, end, holidays, rules), expected)
+
+    def test_working_days_by_weekday_matches_loop(self):
+        rng = random.Random(5)
+        rules = WorkdayRules(0b0111111, 0b01010)
+        holidays = sorted({date(2025, 1, 1) + timedelta(days=rng.randrange(200)) for _ in range(20)})
+        calendar = CompiledCalendar.compile(date(2025, 1, 15), date(2025, 6, 30), holidays, rules)
+        for _ in range(200):
+            start = date(2024, 12, 1) + timedelta(days=rng.randrange(260))
+            end = start + timedelta(days=rng.randrange(-3, 200))
+            expected = [0] * 7
+            for offset in range((end - start).days + 1):
+                day = start + timedelta(days=offset)
+                if is_working_day(day, rules) and not (calendar.start_date <= day <= calendar.end_date and day in holidays):
+                    expected[day.weekday()] += 1
+            with self.subTest(start=start, end=end):
+                self.assertEqual(calendar.working_days_by_weekday(start, end), expected)
+
+    def test_reversed_range_compiles_to_an_empty_calendar(self):
+        calendar = CompiledCalendar.compile(date(2025, 6, 30), date(2025, 1, 15), [])
+        self.assertEqual(len(calendar.day_flags), 0)
+        self.assertEqual(calendar.working_days(date(2025, 1, 1), date(2025, 1, 31)), get_working_days_count(date(2025, 1, 1), date(2025, 1, 31), []))
+        self.assertEqual(calendar.working_days_by_weekday(date(2025, 1, 6), date(2025, 1, 12)), [1, 1, 1, 1, 1, 0, 0])
+
+    def test_round_trips_through_bytes(self):
+        calendar = CompiledCalendar.compile(date(2025, 1, 1), date(2025, 12, 31), [date(2025, 3, 3)])
+        restored = CompiledCalendar.from_bytes(
+            calendar.start_date, calendar.day_flags, calendar.prefix_bytes(), calendar.rules, calendar.weekday_prefix_bytes()
+        )
+        self.assertEqual(list(restored.prefix), list(calendar.prefix))
+        self.assertEqual(restored.working_days_by_weekday(date(2025, 2, 1), date(2025, 4, 30)), calendar.working_days_by_weekday(date(2025, 2, 1), date(2025, 4, 30)))
+        self.assertEqual(restored.working_days(date(2025, 1, 1), date(2025, 12, 31)), calendar.working_days(date(2025, 1, 1), date(2025, 12, 31)))
+
+
+class SessionCalendarTests(StudentSessionTestCase):
+    session_name = 'Odd Semester'
+    session_start, session_end = date(2025, 7, 1), date(2025, 12, 15)
+
+    def test_calendar_is_compiled_once_and_reused(self):
+        self.session.get_calendar()
+        session = AcademicSession.objects.get(pk=self.session.pk)
+        with self.assertNumQueries(1):
+            calendar = session.get_calendar()
+        self.assertEqual(calendar.working_days(date(2025, 7, 1), date(2025, 7, 31)), 25)
+
+    def test_holiday_changes_invalidate_the_calendar(self):
+        self.assertEqual(self.session.get_calendar().working_days(date(2025, 7, 1), date(2025, 7, 31)), 25)
+        holiday = Holiday.objects.create(session=self.session, date=date(2025, 7, 2), name='Break')
+        self.assertFalse(SessionCalendar.objects.filter(session=self.session).exists())
+
+        session = AcademicSession.objects.get(pk=self.session.pk)
+        self.assertEqual(session.get_calendar().working_days(date(2025, 7, 1), date(2025, 7, 31)), 24)
+        self.assertEqual(session.calendar.holiday_count, 1)
+
+        holiday.delete()
+        session = AcademicSession.objects.get(pk=self.session.pk)
+        self.assertEqual(session.get_calendar().working_days(date(2025, 7, 1), date(2025, 7, 31)), 25)
+
+    def test_session_rule_changes_recompile_the_calendar(self):
+        self.session.get_calendar()
+        self.session.working_saturday_weeks = 0
+        self.session.save()
+        session = AcademicSession.objects.get(pk=self.session.pk)
+        self.assertEqual(session.get_calendar().working_days(date(2025, 7, 1), date(2025, 7, 31)), 23)
+
+    def test_calendars_stored_in_an_older_format_are_recompiled(self):
+        self.session.get_calendar()
+        SessionCalendar.objects.filter(session=self.session).update(
+            source_key=self.session.calendar_source_key().replace(CALENDAR_FORMAT, 'v1'), weekday_prefix=b'',
+        )
+        session = AcademicSession.objects.get(pk=self.session.pk)
+        # 2025-07-01 is a Tuesday; July has 4 Saturdays, the 2nd and 4th of them off
+        self.assertEqual(session.get_calendar().working_days_by_weekday(date(2025, 7, 1), date(2025, 7, 31)), [4, 5, 5, 5, 4, 2, 0])
+        self.assertEqual(SessionCalendar.objects.get(session=self.session).source_key, session.calendar_source_key())
+
+
+# --- Subject Timetable ---
+class SubjectTimetableTests(StudentSessionTestCase):
+    session_name = 'Odd Semester'
+    session_start, session_end = date(2025, 7, 1), date(2025, 12, 15)
+
+    def setUp(self):
+        self.subject = Subject.objects.create(session=self.session, name='Maths', code='MA101', classes_per_week=4, timetable=[1, 0, 2, 0, 1, 0, 0])
+        Holiday.objects.create(session=self.session, date=date(2025, 8, 15), name='Independence Day') # a Friday
+        self.exam = ExamDate.objects.create(session=self.session, exam_type='Mid-Term', start_date=date(2025, 9, 1))
+
+    def test_projection_counts_the_timetabled_classes_left(self):
+        AttendanceRecord.objects.create(subject=self.subject, date=date(2025, 8, 1), classes_conducted=10, classes_attended=8)
+        self.subject.refresh_from_db()
+        today = date(2025, 8, 10)
+        info = project_eligibility(self.subject, self.session, [self.exam], self.session.get_calendar(), today)['Mid-Term']
+        # 2025-08-11 to 2025-08-31: 3 Mondays, 3 Wednesdays, 2 Fridays after the holiday
+        self.assertEqual(info['total_projected_classes'], 10 + 3 * 1 + 3 * 2 + 2 * 1)
+        self.assertIn(PROJECTION_DETAILS[PROJECTION_TIMETABLE], info['detail'])
+
+    def test_subjects_without_a_timetable_keep_the_estimate(self):
+        other = Subject.objects.create(session=self.session, name='Physics', code='PH101', classes_per_week=4)
+        results = project_eligibility_batch([self.subject, other], self.session, [self.exam], self.session.get_calendar(), date(2025, 8, 10))
+        self.assertIn(PROJECTION_DETAILS[PROJECTION_TIMETABLE], results[0]['Mid-Term']['detail'])
+        self.assertNotIn(PROJECTION_DETAILS[PROJECTION_TIMETABLE], results[1]['Mid-Term']['detail'])
+
+    def test_form_derives_classes_per_week_from_the_timetable(self):
+        data = {'name': 'Chemistry', 'code': 'CH101', 'classes_per_week': '', 'minimum_attendance_percentage': '75.00'}
+        data.update({f'timetable_{day}': classes for day, classes in enumerate(['1', '', '2', '', '1', '', ''])})
+        form = SubjectForm(data)
+        self.assertTrue(form.is_valid(), form.errors)
+        subject = form.save(commit=False)
+        self.assertEqual(subject.timetable, [1, 0, 2, 0, 1, 0, 0])
+        self.assertEqual(subject.classes_per_week, 4)
+
+        data.update({f'timetable_{day}': '' for day in range(7)})
+        form = SubjectForm(data)
+        self.assertFalse(form.is_valid())
+        self.assertIn('classes_per_week', form.errors)
+
+
+# --- Subject Detail View ---
+class SubjectDetailViewTests(StudentSessionTestCase):
+    session_start, session_end = timedelta(days=-60), timedelta(days=90)
+
+    def setUp(self):
+        today = date.today()
+        self.subject = Subject.objects.create(session=self.session, name='Algorithms', code='CS301', classes_per_week=4)
+        for offset in range(1, 30):
+            AttendanceRecord.objects.create(subject=self.subject, date=today - timedelta(days=offset), classes_conducted=1, classes_attended=offset % 4 != 0)
+        ExamDate.objects.create(session=self.session, exam_type='Mid Term', start_date=today + timedelta(days=30))
+        ExamDate.objects.create(session=self.session, exam_type='Quiz', start_date=today - timedelta(days=5))
+        self.client.force_login(self.user)
+
+    def test_renders_eligibility_for_each_exam(self):
+        response = self.client.get(reverse('subject_detail', args=[self.subject.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_conducted'], 29)
+        self.assertEqual(response.context['total_attended'], 22)
+        self.assertEqual(response.context['eligibility_info']['Quiz']['status'], 'Exam Past')
+        self.assertIn(response.context['eligibility_info']['Mid Term']['status'], ('Good', 'Needs Attention', 'Ineligible', 'Good (No Misses Left)'))
+
+    def get_with_stats(self):
+        """Requests the page, returning (response, query count, peak traced memory, record instances built)."""
+        get_eligibility_cache().clear() # measure the full computation, not a cache hit
+        built = []
+        def count_instances(sender, **kwargs):
+            built.append(sender)
+        pre_init.connect(count_instances, sender=AttendanceRecord)
+        tracemalloc.start()
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse('subject_detail', args=[self.subject.pk]))
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+            pre_init.disconnect(count_instances, sender=AttendanceRecord)
+        return response, len(queries), peak, len(built)
+
+    def test_query_count_and_memory_stay_flat_with_long_history(self):
+        self.get_with_stats() # compiles the session calendar
+        _, small_queries, small_peak, _ = self.get_with_stats()
+
+        start = self.session.start_date - timedelta(days=10_000)
+        AttendanceRecord.objects.bulk_create(
+            AttendanceRecord(subject=self.subject, date=start + timedelta(days=offset), classes_conducted=2, classes_attended=1)
+            for offset in range(10_000)
+        )
+        response, large_queries, peak, built = self.get_with_stats()
+
+        self.assertEqual(response.context['total_conducted'], 29 + 20_000)
+        self.assertEqual(large_queries, small_queries)
+        self.assertEqual(built, 0)
+        # 350 times the records; the peak allows for noise, not for memory growing with them
+        self.assertLess(peak, small_peak * 1.5)
+
+    def test_history_is_keyset_paginated(self):
+        start = self.session.start_date - timedelta(days=200)
+        AttendanceRecord.objects.bulk_create(
+            AttendanceRecord(subject=self.subject, date=start + timedelta(days=offset), classes_conducted=1, classes_attended=1)
+            for offset in range(100)
+        )
+        response = self.client.get(reverse('subject_detail', args=[self.subject.pk]))
+        first_page = list(response.context['attendance_records'])
+        self.assertEqual(len(first_page), HISTORY_PAGE_SIZE)
+        self.assertEqual(first_page[0]['date'], date.today() - timedelta(days=1))
+        self.assertEqual(response.context['total_conducted'], 129) # the summary covers all history
+
+        dates, cursor, page_queries = [row['date'] for row in first_page], response.context['next_cursor'], []
+        while cursor:
+            with CaptureQueriesContext(connection) as queries:
+                data = self.client.get(reverse('subject_history', args=[self.subject.pk]), {'before': cursor}).json()
+            page_queries.append(len(queries))
+            dates += [date.fromisoformat(row['date']) for row in data['records']]
+            cursor = data['next']
+        expected = list(AttendanceRecord.objects.filter(subject=self.subject).order_by('-date').values_list('date', flat=True))
+        self.assertEqual(dates, expected)
+        self.assertEqual(len(set(page_queries)), 1)
+
+    def test_history_endpoint_rejects_bad_cursors_and_other_users(self):
+        url = reverse('subject_history', args=[self.subject.pk])
+        self.assertEqual(self.client.get(url, {'before': 'yesterday'}).status_code, 400)
+        self.client.force_login(User.objects.create_user('other', password='pw'))
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+# --- Subject Running Totals ---
+class SubjectTotalsTests(StudentSessionTestCase):
+    def setUp(self):
+        self.subject = Subject.objects.create(session=self.session, name='Physics', classes_per_week=3)
+        self.other = Subject.objects.create(session=self.session, name='Chemistry', classes_per_week=3)
+
+    def assertTotals(self, subject, conducted, attended, last):
+        subject.refresh_from_db()
+        self.assertEqual((subject.total_conducted, subject.total_attended, subject.last_record_date), (conducted, attended, last))
+
+    def test_instance_create_edit_and_delete(self):
+        first = AttendanceRecord.objects.create(subject=self.subject, date=date(2025, 1, 6), classes_conducted=2, classes_attended=1)
+        second = AttendanceRecord.objects.create(subject=self.subject, date=date(2025, 1, 7), classes_conducted=1, classes_attended=1)
+        self.assertTotals(self.subject, 3, 2, date(2025, 1, 7))
+
+        first.classes_attended = 2
+        first.save()
+        self.assertTotals(self.subject, 3, 3, date(2025, 1, 7))
+
+        second.subject = self.other
+        second.save()
+        self.assertTotals(self.subject, 2, 2, date(2025, 1, 6))
+        self.assertTotals(self.other, 1, 1, date(2025, 1, 7))
+
+        first.delete()
+        self.assertTotals(self.subject, 0, 0, None)
+
+    def test_queryset_bulk_operations(self):
+        records = AttendanceRecord.objects.bulk_create([
+            AttendanceRecord(subject=self.subject, date=date(2025, 2, day), classes_conducted=2, classes_attended=1)
+            for day in range(1, 11)
+        ])
+        self.assertTotals(self.subject, 20, 10, date(2025, 2, 10))
+
+        AttendanceRecord.objects.filter(date__lte=date(2025, 2, 5)).update(classes_attended=2)
+        self.assertTotals(self.subject, 20, 15, date(2025, 2, 10))
+
+        for record in records[:2]:
+            record.classes_conducted = 3
+        AttendanceRecord.objects.bulk_update(records[:2], ['classes_conducted'])
+        self.assertTotals(self.subject, 22, 15, date(2025, 2, 10))
+
+        AttendanceRecord.objects.filter(date__gte=date(2025, 2, 9)).update(subject=self.other)
+        self.assertTotals(self.other, 4, 2, date(2025, 2, 10))
+
+        self.subject.attendance_records.filter(date__gte=date(2025, 2, 5)).delete()
+        self.assertTotals(self.subject, 10, 8, date(2025, 2, 4))
+
+    def test_saving_a_stale_subject_keeps_the_totals(self):
+        AttendanceRecord.objects.create(subject=self.subject, date=date(2025, 1, 6), classes_conducted=2, classes_attended=1)
+        self.subject.name = 'Applied Physics' # self.subject still holds zero totals
+        self.subject.save()
+        self.assertTotals(self.subject, 2, 1, date(2025, 1, 6))
+        self.assertEqual(self.subject.name, 'Applied Physics')
+
+    def test_deletes_take_as_many_queries_for_many_records_as_for_few(self):
+        def delete_queries(count, delete):
+            subject = Subject.objects.create(session=self.session, name=f'Subject {Subject.objects.count()}', classes_per_week=3)
+            AttendanceRecord.objects.bulk_create(
+                AttendanceRecord(subject=subject, date=date(2025, 1, 1) + timedelta(days=day), classes_conducted=1, classes_attended=1)
+                for day in range(count)
+            )
+            with CaptureQueriesContext(connection) as queries:
+                delete(subject)
+            return len(queries)
+        deletes = {
+            'records': lambda subject: AttendanceRecord.objects.filter(subject=subject).delete(),
+            'subject': lambda subject: subject.delete(),
+        }
+        for name, delete in deletes.items():
+            with self.subTest(delete=name):
+                self.assertEqual(delete_queries(3, delete), delete_queries(150, delete))
+
+    def test_instance_writes_stamp_the_session(self):
+        def stamp():
+            return AcademicSession.objects.values_list('data_modified_at', flat=True).get(pk=self.session.pk)
+        before = stamp()
+        record = AttendanceRecord.objects.create(subject=self.subject, date=date(2025, 1, 6), classes_conducted=2, classes_attended=1)
+        self.assertGreater(stamp(), before)
+        before = stamp()
+        record.classes_attended = 2
+        record.save()
+        self.assertGreater(stamp(), before)
+        before = stamp()
+        AttendanceRecord.objects.get(pk=record.pk).delete()
+        self.assertGreater(stamp(), before)
+
+    def test_rebuild_command_checks_and_repairs(self):
+        AttendanceRecord.objects.create(subject=self.subject, date=date(2025, 1, 6), classes_conducted=2, classes_attended=1)
+        Subject.objects.filter(pk=self.subject.pk).update(total_conducted=99)
+
+        out = StringIO()
+        with self.assertRaisesMessage(CommandError, '1 subject(s) have stale totals'):
+            call_command('rebuild_attendance_totals', '--check', stdout=out)
+        self.assertIn(f'Subject {self.subject.pk} (', out.getvalue())
+        self.assertTotals(self.subject, 99, 1, date(2025, 1, 6))
+
+        call_command('rebuild_attendance_totals', stdout=StringIO())
+        self.assertTotals(self.subject, 2, 1, date(2025, 1, 6))
+
+
+# --- Attendance Rollups ---
+class AttendanceRollupTests(StudentSessionTestCase):
+    def setUp(self):
+        self.subject = Subject.objects.create(session=self.session, name='Physics', classes_per_week=3)
+        self.other = Subject.objects.create(session=self.session, name='Chemistry', classes_per_week=3)
+
+    def assertRollupsMatchRecords(self):
+        for model in ROLLUP_MODELS:
+            actual = {
+                (row['subject_id'], row['period_start']): (row['conducted'], row['attended'])
+                for row in aggregate_rollups(model, AttendanceRecord.objects.all())
+            }
+            stored = {
+                (subject_id, period_start): (conducted, attended)
+                for subject_id, period_start, conducted, attended in model.objects.values_list(
+                    'subject_id', 'period_start', 'classes_conducted', 'classes_attended',
+                )
+            }
+            self.assertEqual(stored, actual, model.__name__)
+
+    def test_period_boundaries(self):
+        self.assertEqual(WeeklyAttendance.period_of(date(2025, 1, 5)), date(2024, 12, 30)) # a Sunday
+        self.assertEqual(WeeklyAttendance.period_of(date(2025, 1, 6)), date(2025, 1, 6))
+        self.assertEqual(MonthlyAttendance.period_of(date(2025, 1, 31)), date(2025, 1, 1))
+        self.assertEqual(MonthlyAttendance.next_period(date(2025, 1, 1)), date(2025, 2, 1))
+        self.assertEqual(MonthlyAttendance.next_period(date(2025, 12, 1)), date(2026, 1, 1))
+
+    def test_rollups_must_declare_their_period(self):
+        with self.assertRaisesMessage(TypeError, "must set `period` to a RollupPeriod"):
+            class DailyAttendance(AttendanceRollup):
+                class Meta:
+                    app_label = 'attendance'
+
+    def test_instance_writes(self):
+        first = AttendanceRecord.objects.create(subject=self.subject, date=date(2025, 1, 31), classes_conducted=2, classes_attended=1)
+        second = AttendanceRecord.objects.create(subject=self.subject, date=date(2025, 2, 1), classes_conducted=1, classes_attended=1)
+        self.assertEqual(WeeklyAttendance.objects.get(subject=self.subject).classes_conducted, 3) # both in the week of Jan 27
+        self.assertEqual(MonthlyAttendance.objects.filter(subject=self.subject).count(), 2)
+        self.assertRollupsMatchRecords()
+
+        first.classes_attended = 2
+        first.save()
+        self.assertRollupsMatchRecords()
+
+        second.date = date(2025, 2, 3)
+        second.subject = self.other
+        second.save()
+        self.assertRollupsMatchRecords()
+
+        first.delete()
+        self.assertRollupsMatchRecords()
+        self.assertFalse(WeeklyAttendance.objects.filter(subject=self.subject).exists())
+
+    def test_queryset_bulk_operations(self):
+        records = AttendanceRecord.objects.bulk_create([
+            AttendanceRecord(subject=subject, date=date(2025, 1, 1) + timedelta(days=offset), classes_conducted=2, classes_attended=offset % 3 != 0)
+            for subject in (self.subject, self.other) for offset in range(0, 70, 2)
+        ])
+        self.assertRollupsMatchRecords()
+
+        AttendanceRecord.objects.filter(date__lte=date(2025, 1, 20)).update(classes_attended=2)
+        self.assertRollupsMatchRecords()
+
+        AttendanceRecord.objects.filter(subject=self.subject, date__gte=date(2025, 3, 1)).update(date=F('date') + timedelta(days=1))
+        self.assertRollupsMatchRecords()
+
+        for record in records[:5]:
+            record.date += timedelta(days=60)
+        AttendanceRecord.objects.bulk_update(records[:5], ['date'])
+        self.assertRollupsMatchRecords()
+
+        AttendanceRecord.objects.filter(subject=self.other, date__month=2).delete()
+        self.assertRollupsMatchRecords()
+
+    def test_rebuild_command_checks_and_repairs(self):
+        AttendanceRecord.objects.create(subject=self.subject, date=date(2025, 1, 6), classes_conducted=2, classes_attended=1)
+        WeeklyAttendance.objects.filter(subject=self.subject).update(classes_conducted=99)
+        MonthlyAttendance.objects.create(subject=self.other, period_start=date(2025, 3, 1), classes_conducted=1)
+
+        out = StringIO()
+        with self.assertRaisesMessage(CommandError, '2 rollup table(s) are stale'):
+            call_command('rebuild_attendance_rollups', '--check', stdout=out)
+        self.assertIn('1 weekly attendance rollup(s) are stale', out.getvalue())
+        self.assertIn('1 monthly attendance rollup(s) are stale', out.getvalue())
+        self.assertEqual(WeeklyAttendance.objects.get(subject=self.subject).classes_conducted, 99)
+
+        call_command('rebuild_attendance_rollups', stdout=StringIO())
+        self.assertRollupsMatchRecords()
+
+    def test_session_summary_reads_rollups(self):
+        self.client.force_login(self.user)
+        url = reverse('session_summary', args=[self.session.pk])
+
+        def add_days(first, days):
+            AttendanceRecord.objects.bulk_create(
+                AttendanceRecord(subject=self.subject, date=first + timedelta(days=offset), classes_conducted=1, classes_attended=offset % 2)
+                for offset in range(days)
+            )
+
+        def count_queries():
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            return response, len(queries)
+
+        add_days(date(2025, 1, 1), 10)
+        _, few = count_queries()
+        add_days(date(2025, 2, 1), 120)
+        response, many = count_queries()
+        self.assertEqual(few, many)
+
+        self.assertEqual(len(response.context['months']), 5)
+        (_, chemistry_months), (_, physics_months) = response.context['subject_months'] # by name
+        self.assertEqual((physics_months[0].classes_conducted, physics_months[0].classes_attended), (10, 5))
+        self.assertEqual(chemistry_months, [None] * 5)
+        self.assertEqual(sum(week.classes_conducted for week in response.context['weeks']), 130)
+
+
+# --- Dashboard ---
+class DashboardViewTests(StudentSessionTestCase):
+    session_start, session_end = timedelta(days=-60), timedelta(days=90)
+
+    def setUp(self):
+        today = date.today()
+        Holiday.objects.create(session=self.session, date=today + timedelta(days=3))
+        ExamDate.objects.create(session=self.session, exam_type='Mid Term', start_date=today + timedelta(days=20))
+        ExamDate.objects.create(session=self.session, exam_type='End Term', start_date=today + timedelta(days=80))
+        ExamDate.objects.create(session=self.session, exam_type='Quiz', start_date=today - timedelta(days=5))
+        self.client.force_login(self.user)
+
+    def add_subjects(self, count):
+        today = date.today()
+        for index in range(Subject.objects.count(), Subject.objects.count() + count):
+            subject = Subject.objects.create(session=self.session, name=f'Subject {index}', classes_per_week=3 + index % 3)
+            AttendanceRecord.objects.bulk_create(
+                AttendanceRecord(subject=subject, date=today - timedelta(days=offset), classes_conducted=1, classes_attended=(offset + index) % 3 != 0)
+                for offset in range(1, 1 + 5 * index)
+            )
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_session_ending_before_it_starts_does_not_break_the_dashboard(self):
+        today = date.today()
+        AcademicSession.objects.filter(pk=self.session.pk).update(start_date=today, end_date=today - timedelta(days=30))
+        Holiday.objects.filter(session=self.session).delete() # would widen the calendar to a valid range
+        self.add_subjects(1)
+        self.count_queries()
+
+        form = AcademicSessionForm({
+            'name': 'Reversed', 'start_date': today, 'end_date': today - timedelta(days=1),
+            'working_weekdays': ['0', '1', '2', '3', '4'], 'working_saturday_weeks': [],
+        })
+        self.assertFalse(form.is_valid())
+        self.assertIn('end_date', form.errors)
+
+    def test_query_count_does_not_depend_on_subject_count(self):
+        self.add_subjects(1)
+        self.count_queries() # compiles the session calendar
+        _, few = self.count_queries()
+        self.add_subjects(12)
+        response, many = self.count_queries()
+        self.assertEqual(few, many)
+        self.assertEqual(len(response.context['subject_eligibility']), 13)
+        self.assertEqual(response.context['holiday_count'], 1)
+
+    def test_eligibility_matches_subject_detail(self):
+        self.add_subjects(4)
+        response, _ = self.count_queries()
+        self.assertEqual([exam.exam_type for exam in response.context['upcoming_exams']], ['Mid Term', 'End Term'])
+        for subject, infos in response.context['subject_eligibility']:
+            detail = self.client.get(reverse('subject_detail', args=[subject.pk])).context['eligibility_info']
+            self.assertEqual(infos, [detail['Mid Term'], detail['End Term']])
+
+
+class AsyncViewTests(StudentSessionTestCase):
+    session_start, session_end = timedelta(days=-60), timedelta(days=90)
+
+    def setUp(self):
+        today = date.today()
+        Holiday.objects.create(session=self.session, date=today + timedelta(days=3))
+        ExamDate.objects.create(session=self.session, exam_type='Mid Term', start_date=today + timedelta(days=20))
+        self.subject = Subject.objects.create(session=self.session, name='Physics', classes_per_week=3)
+        AttendanceRecord.objects.bulk_create(
+            AttendanceRecord(subject=self.subject, date=today - timedelta(days=offset), classes_conducted=1, classes_attended=offset % 3 != 0)
+            for offset in range(1, 60)
+        )
+
+    def test_async_views_render_what_the_sync_views_do(self):
+        self.client.force_login(self.user)
+        pages = (
+            ('dashboard', [], ['subjects', 'exam_dates', 'upcoming_exams', 'subject_eligibility', 'holiday_count']),
+            ('academic_session_list', [], ['sessions']),
+            ('subject_detail', [self.subject.pk], ['attendance_records', 'next_cursor', 'total_conducted', 'current_percentage', 'eligibility_info']),
+        )
+        def context_values(response, keys):
+            # The sync session list passes its queryset unevaluated
+            values = {key: response.context[key] for key in keys}
+            return {key: list(value) if isinstance(value, QuerySet) else value for key, value in values.items()}
+
+        for name, args, keys in pages:
+            url = reverse(name, args=args)
+            sync_response = self.client.get(url)
+            with override_settings(ROOT_URLCONF='attendance_eligibility_project.asgi_urls'):
+                async_response = self.client.get(url)
+                self.assertTrue(iscoroutinefunction(async_response.resolver_match.func), name)
+            self.assertEqual(context_values(async_response, keys), context_values(sync_response, keys))
+
+    @override_settings(ROOT_URLCONF='attendance_eligibility_project.asgi_urls')
+    async def test_concurrent_requests_through_the_asgi_handler(self):
+        await self.async_client.aforce_login(self.user)
+        url = reverse('subject_detail', args=[self.subject.pk])
+        responses = await asyncio.gather(*(self.async_client.get(url) for _ in range(5)))
+        self.assertEqual([response.status_code for response in responses], [200] * 5)
+        self.assertEqual((await self.async_client.get(reverse('subject_detail', args=[self.subject.pk + 1]))).status_code, 404)
+
+        await self.session.adelete()
+        response = await self.async_client.get(reverse('dashboard'))
+        self.assertRedirects(response, reverse('add_academic_session'), fetch_redirect_response=False)
+
+
+class ConditionalGetTests(StudentSessionTestCase):
+    session_start, session_end = timedelta(days=-60), timedelta(days=90)
+
+    def setUp(self):
+        today = date.today()
+        ExamDate.objects.create(session=self.session, exam_type='Mid Term', start_date=today + timedelta(days=20))
+        self.subject = Subject.objects.create(session=self.session, name='Physics', classes_per_week=3)
+        AttendanceRecord.objects.create(subject=self.subject, date=today - timedelta(days=1), classes_conducted=2, classes_attended=1)
+        self.client.force_login(self.user)
+
+    def revalidate(self, view, url, *args, **headers):
+        # Straight to the view, without the session and user lookups of the test client's requests
+        request = RequestFactory().get(url, headers=headers)
+        request.user = self.user
+        return view(request, *args)
+
+    def test_unchanged_pages_are_not_modified_after_one_query(self):
+        for view, url, args in (
+            (views.dashboard_view, reverse('dashboard'), []),
+            (views.subject_detail, reverse('subject_detail', args=[self.subject.pk]), [self.subject.pk]),
+        ):
+            response = self.revalidate(view, url, *args)
+            self.assertEqual(response.status_code, 200)
+            with self.subTest(view=view.__name__), self.assertNumQueries(1):
+                not_modified = self.revalidate(view, url, *args, if_none_match=response['ETag'])
+            self.assertEqual(not_modified.status_code, 304)
+            self.assertEqual(not_modified['ETag'], response['ETag'])
+            with self.assertNumQueries(1):
+                self.assertEqual(self.revalidate(view, url, *args, if_modified_since=response['Last-Modified']).status_code, 304)
+
+    def test_data_changes_give_a_new_etag(self):
+        url = reverse('subject_detail', args=[self.subject.pk])
+        etag = self.client.get(url)['ETag']
+        for change in (
+            lambda: AttendanceRecord.objects.filter(subject=self.subject).update(classes_attended=2),
+            lambda: ExamDate.objects.create(session=self.session, exam_type='End Term', start_date=date.today() + timedelta(days=80)),
+            lambda: Holiday.objects.create(session=self.session, date=date.today() + timedelta(days=3)),
+        ):
+            change()
+            response = self.client.get(url, headers={'if-none-match': etag})
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response['ETag'], etag)
+            etag = response['ETag']
+        # Another history page, another date or another user is another page
+        self.assertEqual(self.client.get(url, headers={'if-none-match': etag}).status_code, 304)
+        self.assertEqual(self.client.get(url, {'before': '2020-01-01.1'}, headers={'if-none-match': etag}).status_code, 200)
+        request = RequestFactory().get(url)
+        self.assertNotEqual(
+            page_validators(request, self.user, self.session.data_modified_at, date(2025, 1, 1)),
+            page_validators(request, self.user, self.session.data_modified_at, date(2025, 1, 2)),
+        )
+
+    def test_pending_messages_render_the_page(self):
+        url = reverse('dashboard')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, headers={'if-none-match': etag}).status_code, 304)
+        with mock.patch('attendance.conditional.get_messages', return_value=['Subject updated successfully!']):
+            self.assertEqual(self.client.get(url, headers={'if-none-match': etag}).status_code, 200)
+
+    @override_settings(ROOT_URLCONF='attendance_eligibility_project.asgi_urls')
+    async def test_async_views_answer_conditional_requests(self):
+        await self.async_client.aforce_login(self.user)
+        url = reverse('subject_detail', args=[self.subject.pk])
+        response = await self.async_client.get(url)
+        self.assertTrue(iscoroutinefunction(response.resolver_match.func))
+        not_modified = await self.async_client.get(url, headers={'if-none-match': response['ETag']})
+        self.assertEqual(not_modified.status_code, 304)
+
+
+# --- Eligibility Engine ---
+class EligibilityEngineTests(SimpleTestCase):
+    def random_pairs(self, count, seed):
+        rng = random.Random(seed)
+        pairs = []
+        for _ in range(count):
+            conducted = rng.randrange(0, 120)
+            pairs.append((
+                conducted,
+                rng.randrange(0, conducted + 1),
+                Decimal(rng.choice(['75.00', '60.00', '80.00', '66.67', '85.50', '50.00'])),
+                rng.randrange(1, 8),
+                rng.randrange(0, 100),
+                rng.randrange(-1, 160),
+                rng.random() < 0.1,
+            ))
+        return pairs
+
+    def evaluate(self, pairs):
+        conducted, attended, minimum, per_week, elapsed, to_exam, past = zip(*pairs)
+        projected, _ = project_class_totals(conducted, per_week, elapsed, to_exam)
+        batch = evaluate_eligibility(conducted, attended, [to_basis_points(value) for value in minimum], projected, past)
+        return [
+            (STATUS_LABELS[batch.status[i]], *(int(getattr(batch, field)[i]) for field in batch._fields[1:]))
+            for i in range(len(pairs))
+        ]
+
+    def test_batch_matches_reference_computation(self):
+        pairs = self.random_pairs(20_000, seed=7)
+        for pair, result in zip(pairs, self.evaluate(pairs)):
+            conducted, attended, minimum, _, elapsed, to_exam, _ = pair
+            # Skip the inputs where the float reference rounds an exact tie or threshold wrongly
+            on_tie = elapsed and to_exam > 0 and 2 * (conducted * to_exam % elapsed) == elapsed
+            projected = result[1]
+            on_threshold = projected and (attended + result[2]) * 10000 == to_basis_points(minimum) * projected
+            if on_tie or on_threshold:
+                continue
+            with self.subTest(pair=pair):
+                self.assertEqual(result, evaluate_pair_reference(*pair))
+
+    def test_exact_threshold_is_eligible(self):
+        # 57/100 is exactly 57%, which float division reads as 56.99999999999999%.
+        [result] = self.evaluate([(100, 57, Decimal('57.00'), 5, 50, 50, False)])
+        self.assertEqual(result[0], 'Good (All Classes Done)')
+        self.assertEqual(evaluate_pair_reference(100, 57, Decimal('57.00'), 5, 50, 50)[0], 'Ineligible')
+
+
+class WhatIfTests(StudentSessionTestCase):
+    session_name = 'Current'
+    session_start, session_end = timedelta(days=-60), timedelta(days=120)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        today = date.today()
+        self.subject = Subject.objects.create(session=self.session, name='Maths', code='MA101', classes_per_week=5, timetable=[1, 1, 1, 1, 1, 0, 0])
+        AttendanceRecord.objects.create(subject=self.subject, date=today - timedelta(days=1), classes_conducted=40, classes_attended=32)
+        ExamDate.objects.create(session=self.session, exam_type='Mid-Term', start_date=today + timedelta(days=30))
+        ExamDate.objects.create(session=self.session, exam_type='Old', start_date=today - timedelta(days=5))
+
+    def test_curve_matches_eligibility_for_every_number_of_misses(self):
+        self.subject.refresh_from_db()
+        [expected] = project_eligibility(self.subject, self.session, ExamDate.objects.filter(exam_type='Mid-Term'), self.session.get_calendar(), date.today()).values()
+        response = self.client.get(reverse('what_if', args=[self.session.pk]), {'target': ['75', '100']})
+        self.assertEqual(response.status_code, 200)
+        [exam] = response.json()['subjects'][0]['exams'] # past exams are left out
+        remaining = expected['classes_remaining_to_be_conducted']
+        self.assertEqual(exam['classes_remaining'], remaining)
+        self.assertEqual(exam['max_misses'], expected['classes_can_miss'])
+        self.assertEqual(exam['targets'], {'75.00': expected['classes_can_miss'], '100.00': None})
+        self.assertEqual(len(exam['percentage']), remaining + 1)
+        self.assertEqual(exam['eligible'], [misses <= expected['classes_can_miss'] for misses in range(remaining + 1)])
+        self.assertEqual(exam['percentage'][-1], round(32 * 100 / exam['total_projected_classes'], 2))
+
+    def test_inverse_solve_against_brute_force(self):
+        conducted = np.array([[0], [10], [40], [37]])
+        attended = np.array([[0], [10], [20], [30]])
+        projected = np.array([[30, 60], [30, 60], [50, 90], [40, 80]])
+        targets = [5000, 6667, 7500, 9000]
+        curves = what_if_curves(conducted, attended, 7500, projected, targets)
+        for (row, col), limit in np.ndenumerate(curves.max_misses):
+            remaining = projected[row, col] - conducted[row, 0]
+            for target, target_limit in zip(targets, curves.target_max_misses[row, col]):
+                # The most m for which attending all but m of the remaining classes reaches the required count
+                required = divide_round_half_even(target * projected[row, col], 10000)
+                reachable = (attended[row, 0] + remaining) * 10000 >= target * projected[row, col]
+                meets = [m for m in range(remaining + 1) if attended[row, 0] + remaining - m >= required]
+                with self.subTest(row=row, col=col, target=target):
+                    self.assertEqual(target_limit, max(meets) if reachable and meets else -1)
+            self.assertEqual(curves.eligible[row, col].sum(), limit + 1)
+
+    def test_rejects_bad_targets_and_other_users_sessions(self):
+        url = reverse('what_if', args=[self.session.pk])
+        self.assertEqual(self.client.get(url, {'target': 'lots'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'target': '120'}).status_code, 400)
+        for value in ('nan', 'NaN', 'inf', '-Infinity', 'sNaN'):
+            with self.subTest(target=value):
+                self.assertEqual(self.client.get(url, {'target': value}).status_code, 400)
+        self.client.force_login(User.objects.create_user('other', password='pw'))
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_subject_without_classes_has_null_percentages(self):
+        idle = Subject.objects.create(session=self.session, name='Idle', code='ID101', classes_per_week=0)
+        response = self.client.get(reverse('what_if', args=[self.session.pk]), {'subject': idle.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(b'NaN', response.content)
+        [exam] = json.loads(response.content, parse_constant=self.fail)['subjects'][0]['exams']
+        self.assertEqual(exam['total_projected_classes'], 0)
+        self.assertEqual(exam['percentage'], [None])
+
+    def test_query_count_does_not_grow_with_subjects(self):
+        for n in range(10):
+            Subject.objects.create(session=self.session, name=f'Subject {n}', code=f'S{n}', classes_per_week=3)
+        self.session.get_calendar()
+        with self.assertNumQueries(6): # auth session, user, academic session, subjects, exams, calendar
+            self.client.get(reverse('what_if', args=[self.session.pk]), {'target': '80'})
+
+
+# --- Eligibility Cache ---
+class EligibilityCacheTests(StudentSessionTestCase):
+    session_start, session_end = timedelta(days=-60), timedelta(days=90)
+
+    def setUp(self):
+        get_eligibility_cache().clear()
+        today = date.today()
+        self.subject = Subject.objects.create(session=self.session, name='Algorithms', classes_per_week=4)
+        AttendanceRecord.objects.bulk_create(
+            AttendanceRecord(subject=self.subject, date=today - timedelta(days=offset), classes_conducted=1, classes_attended=offset % 3 != 0)
+            for offset in range(1, 40)
+        )
+        ExamDate.objects.create(session=self.session, exam_type='Mid Term', start_date=today + timedelta(days=30))
+        self.client.force_login(self.user)
+        self.url = reverse('subject_detail', args=[self.subject.pk])
+
+    def get_info(self):
+        return self.client.get(self.url).context['eligibility_info']
+
+    def test_repeat_views_hit_the_cache(self):
+        self.get_info()
+        with CaptureQueriesContext(connection) as cold:
+            get_eligibility_cache().clear()
+            self.get_info()
+        with CaptureQueriesContext(connection) as warm:
+            self.get_info()
+        self.assertLess(len(warm), len(cold))
+        stats = get_eligibility_cache_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1)) # clear() also resets the counters
+
+    def test_writes_invalidate_cached_results(self):
+        before = self.get_info()['Mid Term']
+
+        AttendanceRecord.objects.create(subject=self.subject, date=date.today(), classes_conducted=5, classes_attended=0)
+        after_record = self.get_info()['Mid Term']
+        self.assertNotEqual(after_record['current_percentage'], before['current_percentage'])
+
+        ExamDate.objects.create(session=self.session, exam_type='End Term', start_date=date.today() + timedelta(days=80))
+        self.assertIn('End Term', self.get_info())
+
+        self.subject.minimum_attendance_percentage = Decimal('100.00')
+        self.subject.save()
+        self.assertEqual(self.get_info()['Mid Term']['status'], 'Ineligible')
+
+        AttendanceRecord.objects.filter(subject=self.subject).update(classes_conducted=1, classes_attended=1)
+        self.assertNotEqual(self.get_info()['Mid Term']['status'], 'Ineligible')
+
+    def test_writes_from_other_processes_invalidate_cached_results(self):
+        before = self.get_info()['Mid Term']
+        # Another process's write reaches this one only through the database: new data and a new stamp
+        Subject.objects.filter(pk=self.subject.pk).update(total_conducted=F('total_conducted') + 5)
+        AcademicSession.objects.filter(pk=self.session.pk).update(data_modified_at=timezone.now())
+        self.assertNotEqual(self.get_info()['Mid Term']['current_percentage'], before['current_percentage'])
+
+    def test_stats_endpoint_is_staff_only(self):
+        self.assertEqual(self.client.get(reverse('eligibility_cache_stats')).status_code, 302)
+        staff = User.objects.create_user('admin', password='pw', is_staff=True)
+        self.client.force_login(staff)
+        self.assertEqual(set(self.client.get(reverse('eligibility_cache_stats')).json()), {'hits', 'misses', 'hit_rate'})
+
+
+# --- Attendance CSV Import ---
+class AttendanceImportTests(StudentSessionTestCase):
+    def setUp(self):
+        self.physics = Subject.objects.create(session=self.session, name='Physics', code='PH101', classes_per_week=3)
+        self.maths = Subject.objects.create(session=self.session, name='Maths', classes_per_week=4)
+
+    def test_imports_by_name_or_code_and_reports_bad_rows(self):
+        lines = [
+            'subject,date,conducted,attended',
+            'PH101,2025-01-06,2,1',
+            'physics,2025-01-07,1,1',
+            'Maths,2025-01-06,3,3',
+            'Biology,2025-01-06,1,1',
+            'Maths,06/01/2025,1,1',
+            'Maths,2025-08-01,1,1',
+            'Maths,2025-01-08,1,2',
+            'Maths,2025-01-06,1,0',
+            'Maths,2025-01-09',
+        ]
+        result = import_attendance_csv(self.session, lines, batch_size=4)
+        self.assertEqual(result.created, 3)
+        # Row 9 repeats row 4 from an earlier batch, so it is an existing record by then
+        self.assertEqual(result.skipped, 1)
+        self.assertEqual(result.error_count, 5)
+        self.assertEqual(result.errors[0], "Row 5: Unknown subject 'Biology'.")
+
+        self.physics.refresh_from_db()
+        self.assertEqual((self.physics.total_conducted, self.physics.total_attended), (3, 2))
+
+    def test_skip_and_upsert_existing_records(self):
+        AttendanceRecord.objects.create(subject=self.maths, date=date(2025, 1, 6), classes_conducted=1, classes_attended=0)
+        lines = ['Maths,2025-01-06,2,2', 'Maths,2025-01-07,1,1']
+
+        skipped = import_attendance_csv(self.session, lines, mode=IMPORT_MODE_SKIP)
+        self.assertEqual((skipped.created, skipped.updated, skipped.skipped), (1, 0, 1))
+        self.assertEqual(AttendanceRecord.objects.get(subject=self.maths, date=date(2025, 1, 6)).classes_attended, 0)
+
+        upserted = import_attendance_csv(self.session, lines, mode=IMPORT_MODE_UPSERT)
+        self.assertEqual((upserted.created, upserted.updated, upserted.skipped), (0, 2, 0))
+        self.maths.refresh_from_db()
+        self.assertEqual((self.maths.total_conducted, self.maths.total_attended), (3, 3))
+
+    def test_query_count_grows_with_batches_not_rows(self):
+        def import_rows(count, month):
+            lines = [f'Maths,2025-{month:02d}-{day:02d},1,1' for day in range(1, count + 1)]
+            with CaptureQueriesContext(connection) as queries:
+                import_attendance_csv(self.session, lines)
+            return len(queries)
+        self.assertEqual(import_rows(3, 1), import_rows(28, 2))
+
+    def test_upload_view(self):
+        self.client.force_login(self.user)
+        upload = SimpleUploadedFile('attendance.csv', b'\xef\xbb\xbfsubject,date,conducted,attended\r\nPH101,2025-01-06,2,1\r\n')
+        response = self.client.post(reverse('import_attendance', args=[self.session.pk]), {'csv_file': upload, 'mode': 'skip'})
+        job = BackgroundJob.objects.get()
+        self.assertRedirects(response, reverse('job_detail', args=[job.pk]))
+        self.assertEqual(run_pending_jobs(), 1)
+        self.assertEqual(AttendanceRecord.objects.filter(subject=self.physics).count(), 1)
+
+
+class AttendanceExportTests(StudentSessionTestCase):
+    session_name = 'Current'
+    session_start, session_end = timedelta(days=-60), timedelta(days=90)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        today = date.today()
+        self.old_session = AcademicSession.objects.create(
+            user=self.user, name='Last Year', start_date=today - timedelta(days=400), end_date=today - timedelta(days=250)
+        )
+        self.maths = Subject.objects.create(session=self.session, name='Maths', code='MA101', classes_per_week=3)
+        self.physics = Subject.objects.create(session=self.session, name='Physics', code='PH101', classes_per_week=3)
+        old = Subject.objects.create(session=self.old_session, name='Chemistry', code='CH101', classes_per_week=3)
+        ExamDate.objects.create(session=self.session, exam_type='Mid-Term', start_date=today + timedelta(days=20))
+        for subject, start in ((self.physics, today - timedelta(days=30)), (self.maths, today - timedelta(days=30)), (old, self.old_session.start_date)):
+            AttendanceRecord.objects.bulk_create(
+                AttendanceRecord(subject=subject, date=start + timedelta(days=offset), classes_conducted=2, classes_attended=offset % 3 != 0)
+                for offset in range(10)
+            )
+
+    def download(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_records_csv_and_json(self):
+        url = reverse('export_attendance', args=[self.session.pk])
+        rows = list(csv.reader(StringIO(self.download(url))))
+        self.assertEqual(rows[0], list(RECORD_COLUMNS))
+        self.assertEqual(len(rows), 1 + 20)
+        self.assertEqual([row[1] for row in rows[1:]], ['Maths'] * 10 + ['Physics'] * 10)
+        self.assertEqual(rows[1][3:], [(date.today() - timedelta(days=30)).isoformat(), '2', '0'])
+
+        records = json.loads(self.download(url, format='json'))['records']
+        self.assertEqual([list(map(str, record.values())) for record in records], rows[1:])
+
+        everything = list(csv.reader(StringIO(self.download(reverse('export_all_attendance')))))
+        self.assertEqual([row[0] for row in everything[1:]], ['Current'] * 20 + ['Last Year'] * 10)
+
+    def test_summary_matches_the_dashboard(self):
+        dashboard = self.client.get(reverse('dashboard')).context['subject_eligibility']
+        summary = json.loads(self.download(reverse('export_all_attendance'), kind='summary', format='json'))['summary']
+        self.assertEqual(len(summary), 3)
+        for row, (subject, [info]) in zip(summary, dashboard):
+            self.assertEqual((row['subject'], row['exam'], row['status']), (subject.name, 'Mid-Term', info['status']))
+            self.assertEqual((row['classes_conducted'], row['classes_can_miss']), (20, info['classes_can_miss']))
+        self.assertEqual((summary[2]['subject'], summary[2]['exam']), ('Chemistry', None))
+
+    def test_reads_records_in_chunks(self):
+        with mock.patch.object(QuerySet, 'iterator', autospec=True, side_effect=QuerySet.iterator) as iterator:
+            self.download(reverse('export_attendance', args=[self.session.pk]))
+        self.assertEqual([call.kwargs['chunk_size'] for call in iterator.call_args_list], [EXPORT_CHUNK_SIZE] * 2)
+
+    def test_rejects_unknown_formats_and_other_users_sessions(self):
+        url = reverse('export_attendance', args=[self.session.pk])
+        self.assertEqual(self.client.get(url, {'format': 'xml'}).status_code, 400)
+        self.client.force_login(User.objects.create_user('other', password='pw'))
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.download(reverse('export_all_attendance')), ','.join(RECORD_COLUMNS) + '\r\n')
+
+
+class EligibilityReportTests(TestCase):
+    def setUp(self):
+        today = date.today()
+        self.users = [User.objects.create_user(f'student{n}', password='pw') for n in range(3)]
+        for n, user in enumerate(self.users):
+            session = AcademicSession.objects.create(
+                user=user, name='Current', start_date=today - timedelta(days=60), end_date=today + timedelta(days=90), is_current=True
+            )
+            AcademicSession.objects.create(user=user, name='Old', start_date=today - timedelta(days=400), end_date=today - timedelta(days=250))
+            Holiday.objects.create(session=session, date=today + timedelta(days=3))
+            ExamDate.objects.create(session=session, exam_type='Mid-Term', start_date=today + timedelta(days=20))
+            ExamDate.objects.create(session=session, exam_type='Quiz', start_date=today - timedelta(days=5))
+            for name, rate in (('Maths', 2), ('Physics', 6 + n)):
+                subject = Subject.objects.create(session=session, name=name, classes_per_week=3)
+                AttendanceRecord.objects.bulk_create(
+                    AttendanceRecord(subject=subject, date=today - timedelta(days=offset), classes_conducted=1, classes_attended=offset % rate != 0)
+                    for offset in range(1, 40)
+                )
+
+    def run_report(self, *args, **options):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'report.csv'
+            stdout = StringIO()
+            call_command('eligibility_report', str(path), *args, stdout=stdout, **options)
+            return path.read_text(), stdout.getvalue()
+
+    def test_report_matches_the_dashboard(self):
+        # Serial unless --workers asks for processes
+        with mock.patch('attendance.reports.ProcessPoolExecutor') as pool:
+            text, output = self.run_report(chunk_size=2)
+        pool.assert_not_called()
+        rows = list(csv.DictReader(StringIO(text)))
+        self.assertEqual(len(rows), 6) # 3 students x 2 subjects x 1 upcoming exam
+        self.assertIn('2/2 chunks: 6 subjects, 6 rows', output)
+        for user in self.users:
+            self.client.force_login(user)
+            expected = [
+                (subject.name, info['status'], info['classes_can_miss'])
+                for subject, [info] in self.client.get(reverse('dashboard')).context['subject_eligibility']
+            ]
+            self.assertEqual([(row['subject'], row['status'], int(row['classes_can_miss'])) for row in rows if row['username'] == user.username], expected)
+
+    def test_at_risk_only_and_json(self):
+        text, _ = self.run_report('--at-risk-only', format='json')
+        rows = json.loads(text)['eligibility']
+        self.assertEqual([(row['subject'], row['status']) for row in rows], [('Maths', 'Ineligible')] * 3)
+        # Physics can miss 7, 8 and 9 more classes
+        text, _ = self.run_report('--at-risk-only', format='json', at_risk_misses=8)
+        self.assertEqual([row['classes_can_miss'] for row in json.loads(text)['eligibility'] if row['subject'] == 'Physics'], [7, 8])
+
+    def test_chunks_use_a_fixed_number_of_queries(self):
+        session_ids = report_session_ids(all_sessions=True)
+        self.assertEqual(len(session_ids), 6)
+        # sessions, subjects, exams, holidays of the sessions without an up-to-date stored calendar
+        with self.assertNumQueries(4):
+            subject_count, rows = evaluate_chunk(session_ids, date.today())
+        self.assertEqual((subject_count, len(rows)), (6, 6))
+        self.assertFalse(SessionCalendar.objects.exists()) # compiled in memory, not stored
+        for session in AcademicSession.objects.filter(is_current=True):
+            session.get_calendar()
+        with self.assertNumQueries(3):
+            self.assertEqual(evaluate_chunk(session_ids, date.today())[1], rows)
+
+
+class AttendanceBatchApiTests(StudentSessionTestCase):
+    def setUp(self):
+        self.physics = Subject.objects.create(session=self.session, name='Physics', classes_per_week=3)
+        self.maths = Subject.objects.create(session=self.session, name='Maths', classes_per_week=4)
+        other = User.objects.create_user('other', password='pw')
+        other_session = AcademicSession.objects.create(
+            user=other, name='Session', start_date=date(2025, 1, 1), end_date=date(2025, 6, 30), is_current=True
+        )
+        self.others_subject = Subject.objects.create(session=other_session, name='Physics', classes_per_week=3)
+        self.client.force_login(self.user)
+
+    def post(self, entries):
+        return self.client.post(reverse('attendance_batch'), {'entries': entries}, content_type='application/json')
+
+    def test_upserts_entries_and_reports_each_one(self):
+        AttendanceRecord.objects.create(subject=self.maths, date=date(2025, 1, 6), classes_conducted=1, classes_attended=0)
+        response = self.post([
+            {'subject': self.physics.pk, 'date': '2025-01-06', 'conducted': 2, 'attended': 1},
+            {'subject': self.maths.pk, 'date': '2025-01-06', 'conducted': 2, 'attended': 2},
+            {'subject': self.others_subject.pk, 'date': '2025-01-06', 'conducted': 1, 'attended': 1},
+            {'subject': self.physics.pk, 'date': '2025-08-01', 'conducted': 1, 'attended': 1},
+            {'subject': self.physics.pk, 'date': '2025-01-06', 'conducted': 1, 'attended': 1},
+            {'subject': self.physics.pk, 'date': '06/01/2025', 'conducted': 1, 'attended': 2},
+        ])
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([result['status'] for result in data['results']], ['created', 'updated', 'error', 'error', 'error', 'error'])
+        self.assertEqual(data['results'][2]['error'], f"Unknown subject {self.others_subject.pk}.")
+        self.assertEqual(data['results'][4]['error'], "Duplicate of entry 0 for the same subject and date.")
+        self.assertEqual((data['created'], data['updated'], data['error']), (1, 1, 4))
+        self.assertEqual(data['subjects'], [
+            {'id': self.physics.pk, 'total_conducted': 2, 'total_attended': 1, 'percentage': 50.0},
+            {'id': self.maths.pk, 'total_conducted': 2, 'total_attended': 2, 'percentage': 100.0},
+        ])
+        self.assertFalse(AttendanceRecord.objects.filter(subject=self.others_subject).exists())
+
+    def test_query_count_does_not_depend_on_entry_count(self):
+        def post_days(count, month):
+            entries = [
+                {'subject': subject.pk, 'date': f'2025-{month:02d}-{day:02d}', 'conducted': 1, 'attended': 1}
+                for subject in (self.physics, self.maths) for day in range(1, count + 1)
+            ]
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.post(entries).json()['created'], len(entries))
+            return len(queries)
+        self.assertEqual(post_days(2, 1), post_days(28, 2))
+
+    def test_rejects_malformed_requests(self):
+        url = reverse('attendance_batch')
+        self.assertEqual(self.client.post(url, 'not json', content_type='application/json').status_code, 400)
+        self.assertEqual(self.post({'subject': self.physics.pk}).status_code, 400)
+        self.assertEqual(self.client.get(url).status_code, 405)
+
+    def test_reports_numbers_beyond_the_column_range_as_entry_errors(self):
+        _, max_count = connection.ops.integer_field_range('PositiveIntegerField')
+        response = self.post([
+            {'subject': 10**30, 'date': '2025-01-06', 'conducted': 1, 'attended': 1},
+            {'subject': self.physics.pk, 'date': '2025-01-06', 'conducted': 10**30, 'attended': 1},
+            {'subject': self.physics.pk, 'date': '2025-01-07', 'conducted': max_count + 1, 'attended': 1},
+            {'subject': self.physics.pk, 'date': '2025-01-08', 'conducted': max_count, 'attended': 1},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result.get('error') for result in response.json()['results']], [
+            f"Unknown subject {10**30}.",
+            f"Classes conducted must be at most {max_count}.",
+            f"Classes conducted must be at most {max_count}.",
+            None,
+        ])
+        self.assertEqual(AttendanceRecord.objects.get(subject=self.physics).classes_conducted, max_count)
+
+    def test_anonymous_callers_get_a_json_401(self):
+        self.client.logout()
+        response = self.post([])
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json(), {'error': f"Log in first, at {reverse('login')}."})
+
+    def test_non_browser_clients_log_in_and_send_the_csrf_token(self):
+        client = Client(enforce_csrf_checks=True)
+        client.get(reverse('login'))
+        token = client.cookies['csrftoken'].value
+        response = client.post(reverse('login'), {'username': 'student', 'password': 'pw', 'csrfmiddlewaretoken': token})
+        self.assertEqual(response.status_code, 302)
+        token = client.cookies['csrftoken'].value # rotated by the login
+        entries = {'entries': [{'subject': self.physics.pk, 'date': '2025-01-06', 'conducted': 1, 'attended': 1}]}
+        url = reverse('attendance_batch')
+        self.assertEqual(client.post(url, entries, content_type='application/json').status_code, 403)
+        response = client.post(url, entries, content_type='application/json', headers={'X-CSRFToken': token})
+        self.assertEqual(response.json()['created'], 1)
+
+
+class HolidayImportTests(StudentSessionTestCase):
+    def test_detects_format_from_sample(self):
+        self.assertEqual(detect_date_format(['2025-01-06', '2025-02-13']), '%Y-%m-%d')
+        # 06/01 alone is ambiguous; 13/02 settles it as day-first
+        self.assertEqual(detect_date_format(['06/01/2025', '13/02/2025']), '%d/%m/%Y')
+        self.assertIsNone(detect_date_format(['6th Jan']))
+
+    def test_imports_csv_with_detected_format_and_skips_duplicates(self):
+        Holiday.objects.create(session=self.session, date=date(2025, 1, 6), name='Existing')
+        lines = ['date,name', '06/01/2025,Repeat', '13/02/2025,Fest', '13/02/2025,Fest again', '14/02/2025', 'bad,Oops', '01/08/2025,Late']
+        result = import_holidays_csv(self.session, lines)
+        self.assertEqual((result.created, result.skipped, result.error_count), (2, 2, 2))
+        self.assertEqual(result.errors[0], "Row 6: Invalid date format 'bad'. Please use YYYY-MM-DD, DD-MM-YYYY, MM/DD/YYYY, DD/MM/YYYY, or YYYY/MM/DD.")
+        self.assertEqual(Holiday.objects.get(date=date(2025, 2, 13)).name, 'Fest')
+
+    def test_inserts_with_constant_queries_and_invalidates_calendar(self):
+        self.session.get_calendar()
+        lines = [(date(2025, 1, 1) + timedelta(days=i)).isoformat() for i in range(150)]
+        with CaptureQueriesContext(connection) as queries:
+            result = import_holidays_csv(self.session, lines)
+        self.assertEqual(result.created, 150)
+        self.assertLessEqual(len(queries), 6)
+        self.assertFalse(SessionCalendar.objects.filter(session=self.session).exists())
+        AcademicSession.objects.get(pk=self.session.pk).get_calendar()
+        self.assertEqual(SessionCalendar.objects.get(session=self.session).holiday_count, 150)
+
+    def test_upload_view(self):
+        self.client.force_login(self.user)
+        upload = SimpleUploadedFile('holidays.csv', b'\xef\xbb\xbfdate,name\r\n2025-01-26,Republic Day\r\n')
+        response = self.client.post(reverse('upload_holidays', args=[self.session.pk]), {'csv_file': upload})
+        self.assertRedirects(response, reverse('job_detail', args=[BackgroundJob.objects.get().pk]))
+        run_pending_jobs()
+        self.assertTrue(Holiday.objects.filter(session=self.session, date=date(2025, 1, 26)).exists())
+
+    def test_bulk_add_view(self):
+        self.client.force_login(self.user)
+        text = '2025-01-26 - Republic Day\n2025-03-14'
+        response = self.client.post(reverse('bulk_add_holidays'), {'session': self.session.pk, 'holiday_dates_text': text})
+        self.assertRedirects(response, reverse('job_detail', args=[BackgroundJob.objects.get().pk]))
+        run_pending_jobs()
+        self.assertEqual(Holiday.objects.get(date=date(2025, 3, 14)).name, 'Holiday')
+
+
+
+class BackgroundJobTests(StudentSessionTestCase):
+    def setUp(self):
+        self.client.force_login(self.user)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.upload_dir = Path(directory.name)
+        overrides = override_settings(JOBS_UPLOAD_DIR=self.upload_dir)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def enqueue_holidays(self, text='2025-01-26 - Republic Day\n2025-03-14\n2025-09-01 - Too late'):
+        return enqueue(self.user, JOB_HOLIDAYS_TEXT, text, session=self.session)
+
+    def test_runs_queued_job_and_stores_its_result(self):
+        job = self.enqueue_holidays()
+        self.assertEqual(get_job_status(self.user, job.pk)['status'], BackgroundJob.STATUS_QUEUED)
+        self.assertEqual(run_pending_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.rows_processed, job.created, job.error_count), (BackgroundJob.STATUS_DONE, 3, 2, 1))
+        self.assertEqual(job.errors, ["Row 3: Holiday date 2025-09-01 is outside the session dates (2025-01-01 to 2025-06-30)."])
+        self.assertEqual(job.payload, '')
+        self.assertEqual(Holiday.objects.filter(session=self.session).count(), 2)
+        self.assertEqual(run_pending_jobs(), 0)
+
+    def test_progress_endpoint(self):
+        job = self.enqueue_holidays()
+        run_pending_jobs()
+        with self.assertNumQueries(3): # the login session, its user and the job's small fields
+            data = self.client.get(reverse('job_progress', args=[job.pk])).json()
+        self.assertEqual(data['status'], 'done')
+        self.assertTrue(data['finished'])
+        self.assertEqual((data['rows_processed'], data['created'], data['error_count']), (3, 2, 1))
+        self.assertContains(self.client.get(reverse('job_detail', args=[job.pk])), 'is outside the session dates')
+
+    def test_other_users_jobs_are_not_found(self):
+        job = self.enqueue_holidays()
+        self.client.force_login(User.objects.create_user('other', password='pw'))
+        self.assertEqual(self.client.get(reverse('job_progress', args=[job.pk])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('job_detail', args=[job.pk])).status_code, 404)
+
+    def test_running_job_publishes_progress(self):
+        job = self.enqueue_holidays('\n'.join((date(2025, 1, 1) + timedelta(days=i)).isoformat() for i in range(10)))
+        seen = []
+
+        def import_holidays(session, entries, result):
+            for _ in entries:
+                seen.append(get_job_status(self.user, job.pk)['rows_processed'])
+            return result
+        with mock.patch('attendance.jobs.PROGRESS_INTERVAL_ROWS', 4), mock.patch('attendance.jobs.import_holidays', import_holidays):
+            run_pending_jobs()
+        self.assertEqual(seen, [0, 0, 0, 4, 4, 4, 4, 8, 8, 8])
+        self.assertEqual(BackgroundJob.objects.get().rows_processed, 10)
+
+    def test_claims_each_job_once(self):
+        first, second = self.enqueue_holidays(), self.enqueue_holidays()
+        self.assertEqual(claim_next_job().pk, first.pk)
+        self.assertEqual(claim_next_job().pk, second.pk)
+        self.assertIsNone(claim_next_job())
+        self.assertEqual(set(BackgroundJob.objects.values_list('status', flat=True)), {BackgroundJob.STATUS_RUNNING})
+
+    def test_requeues_jobs_whose_runner_stopped(self):
+        job = self.enqueue_holidays()
+        claim_next_job()
+        # This process runs it, however long it takes
+        BackgroundJob.objects.filter(pk=job.pk).update(started_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(requeue_stale_jobs(), 0)
+
+        exited = subprocess.Popen([sys.executable, '-c', 'pass'])
+        exited.wait()
+        BackgroundJob.objects.filter(pk=job.pk).update(runner=f'{socket.gethostname()}:{exited.pid}', started_at=timezone.now())
+        self.assertEqual(run_pending_jobs(), 1)
+        self.assertEqual(BackgroundJob.objects.get().status, BackgroundJob.STATUS_DONE)
+
+    def test_requeues_jobs_of_other_hosts_once_stale(self):
+        job = self.enqueue_holidays()
+        claim_next_job()
+        BackgroundJob.objects.filter(pk=job.pk).update(runner='elsewhere:1')
+        self.assertEqual(requeue_stale_jobs(), 0)
+        BackgroundJob.objects.filter(pk=job.pk).update(started_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(requeue_stale_jobs(), 1)
+        self.assertEqual(BackgroundJob.objects.get().status, BackgroundJob.STATUS_QUEUED)
+
+    def test_failing_job_is_marked_failed(self):
+        job = self.enqueue_holidays()
+        with mock.patch('attendance.jobs.import_holidays', side_effect=RuntimeError), self.assertLogs('attendance.jobs', 'ERROR'):
+            self.assertEqual(run_job(claim_next_job()), BackgroundJob.STATUS_FAILED)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.created, job.error_count), (BackgroundJob.STATUS_FAILED, 0, 1))
+
+    @override_settings(JOBS_RUNNER='inline')
+    def test_inline_runner_runs_job_when_request_commits(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('bulk_add_holidays'), {'session': self.session.pk, 'holiday_dates_text': '2025-01-26'})
+        self.assertEqual(BackgroundJob.objects.get().status, BackgroundJob.STATUS_DONE)
+        self.assertTrue(Holiday.objects.filter(date=date(2025, 1, 26)).exists())
+
+    def test_thread_runner_drains_the_queue_when_the_web_application_loads(self):
+        for runner, drains in (('thread', True), ('worker', False), ('inline', False)):
+            with self.subTest(runner=runner), override_settings(JOBS_RUNNER=runner), \
+                    mock.patch('attendance.jobs._get_executor') as get_executor:
+                start_runner()
+                self.assertEqual(get_executor.return_value.submit.called, drains)
+
+    def test_upload_must_be_utf8(self):
+        upload = SimpleUploadedFile('holidays.csv', '2025-01-26,Fête'.encode('latin-1'))
+        response = self.client.post(reverse('upload_holidays', args=[self.session.pk]), {'csv_file': upload})
+        self.assertFormError(response.context['form'], 'csv_file', "The file must be UTF-8 encoded text.")
+        self.assertFalse(BackgroundJob.objects.exists())
+        self.assertEqual(list(self.upload_dir.iterdir()), [])
+
+    def test_upload_is_spooled_to_a_file_until_its_job_finishes(self):
+        upload = SimpleUploadedFile('holidays.csv', '\ufeff2025-01-26,Fête\r\n2025-03-14\r\n'.encode())
+        self.client.post(reverse('upload_holidays', args=[self.session.pk]), {'csv_file': upload})
+        job = BackgroundJob.objects.get()
+        self.assertEqual(job.payload, '')
+        self.assertEqual(Path(job.upload).parent, self.upload_dir)
+        self.assertTrue(Path(job.upload).exists())
+        run_pending_jobs()
+        self.assertFalse(Path(job.upload).exists())
+        self.assertEqual(BackgroundJob.objects.get().upload, '')
+        self.assertEqual(Holiday.objects.get(date=date(2025, 1, 26)).name, 'Fête')
+
+    @override_settings(JOBS_MAX_UPLOAD_SIZE=1000)
+    def test_upload_size_is_capped(self):
+        upload = SimpleUploadedFile('holidays.csv', b'2025-01-26\r\n' * 100)
+        response = self.client.post(reverse('upload_holidays', args=[self.session.pk]), {'csv_file': upload})
+        self.assertFormError(response.context['form'], 'csv_file', "The file must be at most 1000\xa0bytes.")
+        self.assertFalse(BackgroundJob.objects.exists())
+
+class MetricsTests(StudentSessionTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.store_path = Path(directory.name) / 'metrics.sqlite3'
+        overrides = override_settings(METRICS_STORE_PATH=self.store_path, METRICS_FLUSH_INTERVAL=0)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        reset_recorder()
+        self.addCleanup(reset_recorder)
+
+    @override_settings(METRICS_ALLOWED_IPS=['127.0.0.1'])
+    def test_records_views_and_serves_prometheus_text(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse('dashboard'))
+        self.client.get(reverse('dashboard'))
+        self.client.get('/no-such-page/')
+
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        text = response.content.decode()
+        self.assertIn('attendance_requests_total{view="dashboard",status="2xx"} 2', text)
+        self.assertIn('attendance_requests_total{view="unmatched",status="4xx"} 1', text)
+        self.assertIn('attendance_request_duration_seconds_bucket{view="dashboard",le="+Inf"} 2', text)
+        self.assertIn('attendance_request_duration_seconds_count{view="dashboard"} 2', text)
+        self.assertRegex(text, r'attendance_sql_queries_total\{view="dashboard"\} [1-9]')
+        self.assertIn('# TYPE attendance_response_size_bytes histogram', text)
+
+    async def test_counts_queries_under_asgi(self):
+        await self.async_client.aforce_login(self.user)
+        for urlconf in ('attendance_eligibility_project.urls', 'attendance_eligibility_project.asgi_urls'):
+            MetricsStore(self.store_path).clear()
+            with self.subTest(urlconf=urlconf), override_settings(ROOT_URLCONF=urlconf):
+                self.assertEqual((await self.async_client.get(reverse('dashboard'))).status_code, 200)
+                get_recorder().flush()
+                samples = MetricsStore(self.store_path).read()
+                self.assertGreater(samples.get((SQL_QUERIES, 'dashboard', ''), 0), 0)
+                self.assertGreater(samples.get((SQL_TIME, 'dashboard', ''), 0), 0)
+
+    def test_counts_from_every_process_are_added_up(self):
+        # Two recorders on one store file stand in for two worker processes
+        first, second = (MetricsRecorder(MetricsStore(self.store_path), flush_interval=60) for _ in range(2))
+        first.observe_request('dashboard', 200, 0.02, 4, 0.001, 2_000)
+        second.observe_request('dashboard', 200, 0.3, 4, 0.001, 2_000)
+        second.observe_request('dashboard', 500, 3.0, 0, 0, 100)
+        first.flush()
+        second.flush()
+
+        text = render_prometheus(MetricsStore(self.store_path).read())
+        self.assertIn('attendance_requests_total{view="dashboard",status="2xx"} 2', text)
+        self.assertIn('attendance_sql_queries_total{view="dashboard"} 8', text)
+        self.assertIn('attendance_request_duration_seconds_bucket{view="dashboard",le="0.025"} 1', text)
+        self.assertIn('attendance_request_duration_seconds_bucket{view="dashboard",le="0.5"} 2', text)
+        self.assertIn('attendance_request_duration_seconds_bucket{view="dashboard",le="5.0"} 3', text)
+
+    def test_reads_never_see_part_of_a_flush(self):
+        store = MetricsStore(self.store_path)
+        increments = {(REQUESTS, f'view{i}', '2xx'): 1 for i in range(200)}
+        done = threading.Event()
+        failures = []
+
+        def flush_repeatedly():
+            try:
+                for _ in range(50):
+                    store.add(increments)
+            except Exception as exc:
+                failures.append(exc)
+            finally:
+                done.set()
+
+        flusher = threading.Thread(target=flush_repeatedly)
+        flusher.start()
+        try:
+            while not done.is_set():
+                sums = set(store.read().values())
+                self.assertLessEqual(len(sums), 1, "a read saw some of a flush's increments but not others")
+        finally:
+            flusher.join()
+        self.assertEqual(failures, [])
+        self.assertEqual(set(store.read().values()), {50})
+
+    def test_flushes_off_the_request_thread_and_keeps_what_the_store_refuses(self):
+        recorder = MetricsRecorder(MetricsStore(self.store_path), flush_interval=0)
+        attempted = threading.Event()
+        flushing_threads = []
+
+        def locked(increments):
+            flushing_threads.append(threading.current_thread())
+            attempted.set()
+            raise sqlite3.OperationalError('database is locked')
+
+        with mock.patch.object(recorder.store, 'add', side_effect=locked), self.assertLogs('attendance.metrics', 'ERROR'):
+            recorder.observe_request('dashboard', 200, 0.02, 4, 0.001, 2_000)
+            self.assertTrue(attempted.wait(5))
+            self.assertIsNot(flushing_threads[0], threading.current_thread())
+            self.assertFalse(recorder.flush())
+        self.assertTrue(recorder.flush())
+        self.assertIn('attendance_requests_total{view="dashboard",status="2xx"} 1', render_prometheus(recorder.store.read()))
+
+    def test_endpoint_requires_staff_a_token_or_an_allowed_address(self):
+        url = reverse('metrics')
+        # Behind a local reverse proxy every client connects from the loopback address
+        self.assertEqual(self.client.get(url, REMOTE_ADDR='127.0.0.1').status_code, 403)
+        with override_settings(METRICS_ALLOWED_IPS=['10.1.2.3']):
+            self.assertEqual(self.client.get(url, REMOTE_ADDR='10.1.2.3').status_code, 200)
+        with override_settings(METRICS_TOKEN='s3cret'):
+            self.assertEqual(self.client.get(url, headers={'Authorization': 'Bearer s3cret'}).status_code, 200)
+            self.assertEqual(self.client.get(url, headers={'Authorization': 'Bearer guess'}).status_code, 403)
+            self.assertEqual(self.client.get(url, headers={'Authorization': 'Bearer'}).status_code, 403)
+        self.assertEqual(self.client.get(url, headers={'Authorization': 'Bearer '}).status_code, 403)
+        self.client.force_login(User.objects.create_user('admin', password='pw', is_staff=True))
+        self.assertEqual(self.client.get(url, REMOTE_ADDR='10.1.2.3').status_code, 200)
+
+
+class ProductionDatabaseTests(SimpleTestCase):
+    # The concurrency test connects to its own file under the same aliases, not to the test database
+    databases = '__all__'
+
+    def test_router_sends_reads_of_read_only_views_to_the_read_connection(self):
+        router = ReadRoutingRouter()
+        default = connections.settings['default']
+        with mock.patch.object(connections, 'settings', {'default': default, READ_DATABASE_ALIAS: default}):
+            self.assertEqual(router.db_for_read(Subject), 'default')
+            with read_only_database():
+                self.assertEqual(router.db_for_read(Subject), READ_DATABASE_ALIAS)
+                self.assertEqual(router.db_for_write(Subject), 'default')
+                with mock.patch.object(connections['default'], 'in_atomic_block', True):
+                    self.assertEqual(router.db_for_read(Subject), 'default')
+        with mock.patch.object(connections, 'settings', {'default': default}), read_only_database():
+            self.assertEqual(router.db_for_read(Subject), 'default')
+        self.assertFalse(router.allow_migrate(READ_DATABASE_ALIAS, 'attendance'))
+
+    def test_parallel_writers_and_readers_on_a_file(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        handler = ConnectionHandler(sqlite_production_databases(Path(directory.name) / 'concurrency.sqlite3'))
+        self.addCleanup(handler.close_all)
+        with handler['default'].cursor() as cursor:
+            cursor.execute('CREATE TABLE marks (id INTEGER PRIMARY KEY, writer INTEGER)')
+            cursor.execute('CREATE TABLE counter (value INTEGER)')
+            cursor.execute('INSERT INTO counter VALUES (0)')
+
+        writers, writes_each, errors = 4, 100, []
+
+        def write(writer):
+            connection = handler['default']
+            try:
+                for _ in range(writes_each):
+                    # Read, then write, in one transaction: the pattern that fails at once with deferred transactions
+                    connection.set_autocommit(False)
+                    with connection.cursor() as cursor:
+                        cursor.execute('INSERT INTO marks (writer) VALUES (%s)', [writer])
+                        cursor.execute('SELECT value FROM counter')
+                        value = cursor.fetchone()[0]
+                        cursor.execute('UPDATE counter SET value = %s', [value + 1])
+                    connection.commit()
+                    connection.set_autocommit(True)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        def read():
+            connection = handler[READ_DATABASE_ALIAS]
+            try:
+                seen = 0
+                while seen < writers * writes_each and not errors:
+                    with connection.cursor() as cursor:
+                        cursor.execute('SELECT COUNT(*) FROM marks')
+                        count = cursor.fetchone()[0]
+                    self.assertGreaterEqual(count, seen)
+                    seen = count
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=write, args=(n,)) for n in range(writers)] + [threading.Thread(target=read) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        with handler['default'].cursor() as cursor:
+            cursor.execute('SELECT value FROM counter')
+            self.assertEqual(cursor.fetchone()[0], writers * writes_each)
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+        with self.assertRaises(DatabaseError), handler[READ_DATABASE_ALIAS].cursor() as cursor:
+            cursor.execute('DELETE FROM marks')
+
+
+class SyntheticDataTests(TestCase):
+    def test_generates_consistent_data(self):
+        today = date(2025, 3, 10)
+        counts = generate_dataset(users=2, sessions_per_user=2, subjects_per_session=3, days=60, holidays_per_session=4, exams_per_session=2, today=today)
+        self.assertEqual((counts['users'], counts['sessions'], counts['subjects'], counts['holidays'], counts['exams']), (2, 4, 12, 16, 8))
+        self.assertEqual(AcademicSession.objects.filter(is_current=True).count(), 2)
+        self.assertEqual(AttendanceRecord.objects.count(), counts['records'])
+        self.assertFalse(AttendanceRecord.objects.filter(date__gte=today).exists())
+        self.assertFalse(AttendanceRecord.objects.filter(subject__session__holidays__date=F('date')).exists())
+
+        out = StringIO()
+        call_command('rebuild_attendance_totals', check=True, stdout=out)
+        self.assertIn('up to date', out.getvalue())
+
+    def test_baseline_comparison(self):
+        baseline = {'dashboard': {'wall_ms': 10.0, 'queries': 6, 'peak_kb': 1000}}
+        self.assertEqual(compare_to_baseline({'dashboard': {'wall_ms': 11.0, 'queries': 6, 'peak_kb': 1100}}, baseline), [])
+        regressions = compare_to_baseline({'dashboard': {'wall_ms': 30.0, 'queries': 7, 'peak_kb': 5000}, 'other': {}}, baseline)
+        self.assertEqual(len(regressions), 3)
+
+
+class QueryPlanAuditTests(TestCase):
+    def test_hot_queries_use_indexes(self):
+        self.assertEqual({name: problems for name, _, problems in audit() if problems}, {})
+
+    def test_flags_scans_and_temp_sorts(self):
+        details = ['SCAN auth_user', 'SEARCH attendance_subject USING INDEX x (session_id=?)', 'USE TEMP B-TREE FOR ORDER BY']
+        self.assertEqual([kind for kind, _ in plan_problems(details)], [FULL_SCAN, TEMP_SORT])
+
+
+
+class AdminChangelistTests(TestCase):
+    # Queries of a changelist page: the login session, its user, the table's highest id and, on
+    # tables as small as these, its exact count, then the page's rows
+    CHANGELIST_QUERIES = 5
+    # Filtered pages are counted exactly, with no look at the highest id
+    FILTERED_CHANGELIST_QUERIES = 4
+    MODELS = (AcademicSession, Subject, AttendanceRecord, ExamDate, Holiday, BackgroundJob)
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', password='pw'))
+        self.add_students(1)
+
+    def add_students(self, count):
+        for _ in range(count):
+            number = User.objects.count()
+            user = User.objects.create_user(f'student{number}', password='pw')
+            session = AcademicSession.objects.create(user=user, name=f'Session {number}', start_date=date(2025, 1, 1), end_date=date(2025, 6, 30))
+            subject = Subject.objects.create(session=session, name=f'Maths {number}', code=f'MA{number}', classes_per_week=3)
+            AttendanceRecord.objects.create(subject=subject, date=date(2025, 1, 6), classes_conducted=2, classes_attended=1)
+            ExamDate.objects.create(session=session, exam_type='Mid-Semester', start_date=date(2025, 3, 1))
+            Holiday.objects.create(session=session, date=date(2025, 1, 26), name='Republic Day')
+            enqueue(user, JOB_HOLIDAYS_TEXT, '2025-01-27', session=session)
+
+    def changelist_url(self, model):
+        return reverse(f'admin:attendance_{model._meta.model_name}_changelist')
+
+    def test_query_count_does_not_grow_with_rows(self):
+        queries = {}
+        for rows in (1, 5):
+            self.add_students(rows - AcademicSession.objects.count())
+            for model in self.MODELS:
+                with self.subTest(model=model.__name__, rows=rows), self.assertNumQueries(self.CHANGELIST_QUERIES):
+                    self.assertContains(self.client.get(self.changelist_url(model)), f'{rows} ')
+
+    def test_filtered_and_searched_query_count(self):
+        self.add_students(4)
+        for model in self.MODELS:
+            with self.subTest(model=model.__name__), self.assertNumQueries(self.FILTERED_CHANGELIST_QUERIES):
+                response = self.client.get(self.changelist_url(model), {'owner': 'student2'})
+            self.assertEqual(response.context['cl'].result_count, 1)
+        with self.assertNumQueries(self.FILTERED_CHANGELIST_QUERIES):
+            response = self.client.get(self.changelist_url(AttendanceRecord), {'q': 'ma3'})
+        self.assertEqual([record.subject.code for record in response.context['cl'].result_list], ['MA3'])
+
+    def test_subject_filter_takes_an_id(self):
+        subject = Subject.objects.get()
+        response = self.client.get(self.changelist_url(AttendanceRecord), {'subject': subject.pk})
+        self.assertEqual(response.context['cl'].result_count, 1)
+        self.assertContains(response, f'name="subject" value="{subject.pk}"')
+        response = self.client.get(self.changelist_url(AttendanceRecord), {'subject': 'maths'})
+        self.assertRedirects(response, self.changelist_url(AttendanceRecord) + '?e=1', fetch_redirect_response=False)
+
+    def test_subject_autocomplete_query_count(self):
+        self.add_students(4)
+        params = {'app_label': 'attendance', 'model_name': 'attendancerecord', 'field_name': 'subject', 'term': 'math'}
+        with self.assertNumQueries(4): # login session, user, page of subjects with their sessions, count
+            results = self.client.get(reverse('admin:autocomplete'), params).json()['results']
+        self.assertEqual(len(results), 5)
+        self.assertIn('Session', results[0]['text'])
+
+    def test_large_unfiltered_table_is_estimated_from_highest_id(self):
+        self.add_students(2)
+        AttendanceRecord.objects.filter(pk=AttendanceRecord.objects.order_by('pk').values('pk')[:1]).delete()
+        with mock.patch('attendance.admin.ESTIMATED_COUNT_THRESHOLD', 0), CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.changelist_url(AttendanceRecord))
+        self.assertEqual(response.context['cl'].result_count, AttendanceRecord.objects.order_by('-pk').values_list('pk', flat=True)[0])
+        self.assertFalse(any('COUNT(' in query['sql'] for query in queries.captured_queries))
+
+    def test_record_list_is_read_in_date_order(self):
+        records = self.client.get(self.changelist_url(AttendanceRecord)).context['cl'].queryset
+        self.assertEqual([problem for kind, problem in plan_problems(plan_details(records)) if kind == TEMP_SORT], [])
+
+    def test_searches_use_indexes(self):
+        request = RequestFactory().get('/')
+        request.user = User.objects.get(username='admin')
+        for model, model_admin in admin.site._registry.items():
+            if model._meta.app_label != 'attendance' or not model_admin.search_fields:
+                continue
+            queryset, _ = model_admin.get_search_results(request, model_admin.get_queryset(request), 'ma')
+            with self.subTest(model=model.__name__):
+                self.assertEqual([problem for kind, problem in plan_problems(plan_details(queryset)) if kind == FULL_SCAN], [])
+
+class HolidayBulkFormTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('student', password='pw')
+        self.other = User.objects.create_user('other', password='pw')
+        self.other_session = AcademicSession.objects.create(user=self.other, name='Theirs', start_date=date(2025, 1, 1), end_date=date(2025, 6, 30))
+
+    def create_sessions(self, count):
+        return AcademicSession.objects.bulk_create(
+            AcademicSession(user=self.user, name=f'Term {i}', start_date=date(2000 + i, 1, 1), end_date=date(2000 + i, 6, 30))
+            for i in range(count)
+        )
+
+    def test_choices_are_scoped_to_the_user(self):
+        mine = self.create_sessions(2)
+        form = HolidayBulkForm(user=self.user)
+        self.assertNotIsInstance(form.fields['session'].widget, LazyModelSelect)
+        self.assertEqual({session.pk for session in form.fields['session'].queryset}, {session.pk for session in mine})
+
+        data = {'session': self.other_session.pk, 'holiday_dates_text': '2025-01-26'}
+        form = HolidayBulkForm(data, user=self.user)
+        self.assertFalse(form.is_valid())
+        self.assertIn('session', form.errors)
+
+    def test_large_accounts_render_only_the_selected_session(self):
+        sessions = self.create_sessions(SESSION_SELECT_SEARCH_THRESHOLD + 50)
+        selected = sessions[10]
+        form = HolidayBulkForm(initial={'session': selected.pk}, user=self.user)
+        self.assertIsInstance(form.fields['session'].widget, LazyModelSelect)
+        with CaptureQueriesContext(connection) as queries:
+            html = str(form['session'])
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(html.count('<option'), 2) # the empty choice and the selected session
+        self.assertIn(f'value="{selected.pk}" selected', html)
+
+        data = {'session': selected.pk, 'holiday_dates_text': '2010-01-26'}
+        self.assertTrue(HolidayBulkForm(data, user=self.user).is_valid())
+        data['session'] = self.other_session.pk
+        self.assertFalse(HolidayBulkForm(data, user=self.user).is_valid())
+
+    def test_session_search_is_paginated_and_scoped(self):
+        self.create_sessions(30)
+        self.client.force_login(self.user)
+        first = self.client.get(reverse('session_search')).json()
+        self.assertEqual((len(first['results']), first['has_more']), (20, True))
+        self.assertEqual(first['results'][0]['text'], 'Term 29 (2029-2029)')
+        second = self.client.get(reverse('session_search'), {'page': 2}).json()
+        self.assertEqual((len(second['results']), second['has_more']), (10, False))
+
+        found = self.client.get(reverse('session_search'), {'q': 'term 1'}).json()
+        self.assertEqual(len(found['results']), 11)
+        self.assertEqual(self.client.get(reverse('session_search'), {'q': 'Theirs'}).json()['results'], [])
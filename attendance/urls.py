@@ -1,6 +1,6 @@
 # attendance/urls.py
 from django.urls import path
-from . import views
+from . import async_views, views
 
 urlpatterns = [
     path('', views.dashboard_view, name='dashboard'),
@@ -9,14 +9,22 @@ urlpatterns = [
     path('session/add/', views.add_academic_session, name='add_academic_session'),
     path('session/update/<int:pk>/', views.update_academic_session, name='update_academic_session'),
     path('sessions/', views.academic_session_list, name='academic_session_list'),
+    path('sessions/search/', views.session_search, name='session_search'),
+    path('session/<int:session_pk>/summary/', views.session_summary, name='session_summary'),
+    path('session/<int:session_pk>/what-if/', views.what_if, name='what_if'),
 
     # Subject URLs
     path('session/<int:session_pk>/subject/add/', views.add_subject, name='add_subject'),
     path('subject/<int:pk>/', views.subject_detail, name='subject_detail'),
+    path('subject/<int:pk>/history/', views.subject_history, name='subject_history'),
     path('subject/update/<int:pk>/', views.update_subject, name='update_subject'),
 
     # Attendance Record URLs
     path('subject/<int:subject_pk>/attendance/add/', views.add_attendance, name='add_attendance'),
+    path('attendance/batch/', views.attendance_batch, name='attendance_batch'),
+    path('session/<int:session_pk>/attendance/import/', views.import_attendance, name='import_attendance'),
+    path('session/<int:session_pk>/attendance/export/', views.export_attendance, name='export_attendance'),
+    path('attendance/export/', views.export_attendance, name='export_all_attendance'),
 
     # Exam Date URLs
     path('session/<int:session_pk>/examdate/add/', views.add_exam_date, name='add_exam_date'),
@@ -27,6 +35,21 @@ urlpatterns = [
     # ADD THIS NEW URL PATTERN FOR UPLOADING HOLIDAYS PER SESSION
     path('session/<int:session_id>/upload_holidays/', views.upload_holidays, name='upload_holidays'),
 
+    # Background jobs (imports)
+    path('jobs/<int:pk>/', views.job_detail, name='job_detail'),
+    path('jobs/<int:pk>/progress/', views.job_progress, name='job_progress'),
+
+    # Monitoring (staff only)
+    path('stats/eligibility-cache/', views.eligibility_cache_stats, name='eligibility_cache_stats'),
+    path('metrics', views.metrics, name='metrics'),
+
     # --- ADD THIS LINE FOR THE SIGNUP/REGISTER PAGE ---
     path('signup/', views.signup, name='signup'), # Ensure this matches your view and template link
-]
\ No newline at end of file
+]
+
+# Native async versions of the read-heavy views, put in front of the URLs above under ASGI
+async_urlpatterns = [
+    path('', async_views.dashboard_view, name='dashboard'),
+    path('sessions/', async_views.academic_session_list, name='academic_session_list'),
+    path('subject/<int:pk>/', async_views.subject_detail, name='subject_detail'),
+]
@@ -0,0 +1,184 @@
+# attendance/view_benchmarks.py
+# Drives the main views through the test client on synthetic data, measuring wall time, SQL queries
+# and peak memory per view, and compares the numbers against a stored baseline.
+# Run it with `python manage.py benchmark_views`.
+import asyncio
+import json
+import statistics
+import time
+import tracemalloc
+from datetime import date, timedelta
+from pathlib import Path
+
+from asgiref.sync import async_to_sync
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, reset_queries, transaction
+from django.test import AsyncClient, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .eligibility_cache import get_cache as get_eligibility_cache
+from .models import AcademicSession, Subject
+from .synthetic import generate_dataset
+
+BASELINE_PATH = Path(__file__).with_name('view_benchmark_baseline.json')
+
+# The URLconfs serving the read-heavy views sync (each request hops to the thread pool under ASGI) and natively async
+ASGI_URLCONFS = {'sync': 'attendance_eligibility_project.urls', 'async': 'attendance_eligibility_project.asgi_urls'}
+
+# Dataset the views are measured on: the measured user is one of many, with a long current session
+DATASET = {'users': 50, 'sessions_per_user': 3, 'subjects_per_session': 8, 'days': 150, 'holidays_per_session': 10, 'exams_per_session': 4}
+
+# A run is a regression if it uses more queries than the baseline, or is this many times slower / bigger
+DEFAULT_TIME_TOLERANCE = 1.5
+DEFAULT_MEMORY_TOLERANCE = 1.25
+# Differences below these are noise, whatever the ratio
+TIME_FLOOR_MS = 2.0
+MEMORY_FLOOR_KB = 256
+
+
+def scenarios(user):
+    """Returns {name: (method, url, data)} for the views being measured, as `user` would call them."""
+    session = AcademicSession.objects.get(user=user, is_current=True)
+    subject = Subject.objects.filter(session=session).order_by('name').first()
+    today = date.today()
+    holiday_lines = [(today + timedelta(days=offset)).strftime('%d/%m/%Y') + f',Break day {offset}' for offset in range(1, 31)]
+    return {
+        'dashboard': ('get', reverse('dashboard'), None),
+        'subject_detail': ('get', reverse('subject_detail', args=[subject.pk]), None),
+        'upload_holidays': ('post', reverse('upload_holidays', args=[session.pk]), lambda: {
+            'csv_file': SimpleUploadedFile('holidays.csv', '\n'.join(['date,name'] + holiday_lines).encode()),
+        }),
+        'bulk_add_holidays': ('post', reverse('bulk_add_holidays'), lambda: {
+            'session': session.pk,
+            'holiday_dates_text': '\n'.join(f'{today + timedelta(days=offset)} - Break day {offset}' for offset in range(1, 31)),
+        }),
+        'add_attendance': ('post', reverse('add_attendance', args=[subject.pk]), lambda: {
+            'date': today.isoformat(), 'classes_conducted': 2, 'classes_attended': 1,
+        }),
+    }
+
+
+def _request(client, method, url, data):
+    """
+    Makes one request. Writes are made inside a rolled-back transaction, so every repetition
+    sees the same data.
+    """
+    get_eligibility_cache().clear() # measure the full computation, not a cache hit
+    if method == 'get':
+        response = client.get(url)
+    else:
+        with transaction.atomic():
+            response = client.post(url, data())
+            transaction.set_rollback(True)
+    if response.status_code >= 400:
+        raise RuntimeError(f"{method.upper()} {url} returned {response.status_code}")
+    return response
+
+
+def measure_views(repeat=7):
+    """
+    Generates the dataset, then returns {view: {'wall_ms', 'queries', 'peak_kb'}}: the median wall time
+    over `repeat` requests, the query count of one request and its peak traced memory. Memory is traced
+    in a separate request, as tracing slows everything down. Expects a throwaway database.
+    """
+    generate_dataset(**DATASET)
+    user = AcademicSession.objects.filter(is_current=True).order_by('user_id').first().user
+    client = Client()
+    client.force_login(user)
+
+    results = {}
+    for name, (method, url, data) in scenarios(user).items():
+        _request(client, method, url, data) # warm up
+        times = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            _request(client, method, url, data)
+            times.append(time.perf_counter() - started)
+        # Requests reset the query log as they start, so start the capture from an empty log
+        reset_queries()
+        with CaptureQueriesContext(connection) as queries:
+            _request(client, method, url, data)
+        tracemalloc.start()
+        try:
+            _request(client, method, url, data)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        # The wrapping transaction is the harness's, not the view's
+        view_queries = [query for query in queries.captured_queries if query['sql'] not in ('BEGIN', 'ROLLBACK')]
+        results[name] = {'wall_ms': statistics.median(times) * 1e3, 'queries': len(view_queries), 'peak_kb': peak / 1024}
+    return results
+
+
+def compare_to_baseline(results, baseline, time_tolerance=DEFAULT_TIME_TOLERANCE, memory_tolerance=DEFAULT_MEMORY_TOLERANCE):
+    """Returns a message for each view that regressed against `baseline`; views missing from it are skipped."""
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if current['queries'] > base['queries']:
+            regressions.append(f"{name}: {current['queries']} queries, baseline {base['queries']}")
+        if current['wall_ms'] > base['wall_ms'] * time_tolerance and current['wall_ms'] - base['wall_ms'] > TIME_FLOOR_MS:
+            regressions.append(f"{name}: {current['wall_ms']:.1f} ms, baseline {base['wall_ms']:.1f} ms")
+        if current['peak_kb'] > base['peak_kb'] * memory_tolerance and current['peak_kb'] - base['peak_kb'] > MEMORY_FLOOR_KB:
+            regressions.append(f"{name}: peak {current['peak_kb']:.0f} KB, baseline {base['peak_kb']:.0f} KB")
+    return regressions
+
+
+def load_baseline(path=BASELINE_PATH):
+    return json.loads(Path(path).read_text())['views']
+
+
+def save_baseline(results, path=BASELINE_PATH):
+    data = {'dataset': DATASET, 'views': {name: {key: round(value, 2) for key, value in numbers.items()} for name, numbers in results.items()}}
+    Path(path).write_text(json.dumps(data, indent=2, sort_keys=True) + '\n')
+
+
+async def _drive_clients(user, urls, clients, requests_per_client):
+    """Runs `clients` concurrent AsyncClients, each requesting `urls` in turn; returns (elapsed s, latencies s)."""
+    async def run(client, offset):
+        latencies = []
+        for n in range(requests_per_client):
+            url = urls[(offset + n) % len(urls)]
+            started = time.perf_counter()
+            response = await client.get(url)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                raise RuntimeError(f"GET {url} returned {response.status_code}")
+        return latencies
+
+    async_clients = [AsyncClient() for _ in range(clients)]
+    for client in async_clients:
+        await client.aforce_login(user)
+    started = time.perf_counter()
+    latencies = await asyncio.gather(*(run(client, offset) for offset, client in enumerate(async_clients)))
+    return time.perf_counter() - started, [latency for client_latencies in latencies for latency in client_latencies]
+
+
+def measure_asgi_load(clients=(1, 10, 50), requests_per_client=20):
+    """
+    Generates the dataset, then drives dashboard, subject_detail and academic_session_list through the
+    ASGI handler with each number of concurrent clients, once per ASGI_URLCONFS entry. Returns
+    {mode: {clients: {'requests_per_s', 'p50_ms', 'p95_ms'}}}. Expects a throwaway database.
+    """
+    generate_dataset(**DATASET)
+    user = AcademicSession.objects.filter(is_current=True).order_by('user_id').first().user
+    subject = Subject.objects.filter(session__user=user, session__is_current=True).order_by('name').first()
+    urls = [reverse('dashboard'), reverse('subject_detail', args=[subject.pk]), reverse('academic_session_list')]
+
+    results = {}
+    for mode, urlconf in ASGI_URLCONFS.items():
+        results[mode] = {}
+        with override_settings(ROOT_URLCONF=urlconf):
+            async_to_sync(_drive_clients)(user, urls, 1, len(urls)) # warm up
+            for count in clients:
+                elapsed, latencies = async_to_sync(_drive_clients)(user, urls, count, requests_per_client)
+                latencies.sort()
+                results[mode][count] = {
+                    'requests_per_s': len(latencies) / elapsed,
+                    'p50_ms': latencies[len(latencies) // 2] * 1e3,
+                    'p95_ms': latencies[int(len(latencies) * 0.95)] * 1e3,
+                }
+    return results
@@ -1,41 +1,47 @@
 # attendance/views.py
-import csv
-from io import TextIOWrapper # Used to correctly read the uploaded file
+import hmac
+import json
+from functools import wraps
+
+import numpy as np
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_POST
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
 from django.contrib.auth import login # <-- Add this import if you want to auto-login users after signup
+from django.template.defaultfilters import filesizeformat
 from django.urls import reverse
-from .forms import AcademicSessionForm, SubjectForm, ExamDateForm, AttendanceRecordForm, HolidayBulkForm, HolidayUploadForm, SignUpForm
-from .models import AcademicSession, Subject, AttendanceRecord, ExamDate, Holiday
+from .conditional import conditional_on_session_data
+from .db_routers import read_only_view
+from .eligibility import project_eligibility_batch, project_totals_batch, to_basis_points, what_if_curves
+from .eligibility_cache import get_cached_eligibility, get_stats as get_eligibility_cache_stats
+from .exporters import (
+    EXPORT_RECORDS, EXPORT_SUMMARY, RECORD_COLUMNS, SUMMARY_COLUMNS, csv_chunks, json_chunks, record_rows, summary_rows,
+)
+from .forms import AcademicSessionForm, SubjectForm, ExamDateForm, AttendanceRecordForm, AttendanceImportForm, HolidayBulkForm, HolidayUploadForm, SignUpForm
+from .importers import ENTRY_CREATED, ENTRY_ERROR, ENTRY_UPDATED, MAX_BATCH_ENTRIES, upsert_attendance_entries
+from .jobs import JOB_ATTENDANCE_CSV, JOB_HOLIDAYS_CSV, JOB_HOLIDAYS_TEXT, enqueue, get_job_status, max_upload_size, spool_upload
+from .metrics import get_recorder, render_prometheus
+from .models import AcademicSession, Subject, AttendanceRecord, ExamDate, Holiday, MonthlyAttendance, WeeklyAttendance
+from django.db.models import Sum
 from django.db import IntegrityError
 from django.contrib import messages # For displaying messages to the user
-from datetime import timedelta, datetime # <-- This import is correct for datetime.strptime()
+from datetime import date, timedelta, datetime # <-- This import is correct for datetime.strptime()
+from decimal import Decimal, InvalidOperation
 
-# Helper function: get_working_days_count (Keep this as is, it's still useful for defining periods)
-def get_working_days_count(start_date, end_date, holidays):
-    """
-    Calculates the number of working days (Mon-Fri + 1st/3rd Sat if applicable)
-    between start_date and end_date (inclusive).
-    """
-    if start_date > end_date:
-        return 0
+# --- Dashboard View (Home Page) ---
+def current_session_stamp(user):
+    return AcademicSession.objects.filter(user=user, is_current=True).values_list('data_modified_at', flat=True)
 
-    count = 0
-    current_date = start_date
-    
-    while current_date <= end_date:
-        if 0 <= current_date.weekday() <= 4: # Monday (0) to Friday (4)
-            if current_date not in holidays:
-                count += 1
-        elif current_date.weekday() == 5: # Saturday (5)
-            if (current_date.day - 1) // 7 in [0, 2]: # 1st or 3rd Saturday
-                if current_date not in holidays:
-                    count += 1
-        current_date += timedelta(days=1)
-    return count
+def subject_session_stamp(user, pk):
+    return Subject.objects.filter(pk=pk, session__user=user).values_list('session__data_modified_at', flat=True)
 
-# --- Dashboard View (Home Page) ---
 @login_required
+@read_only_view
+@conditional_on_session_data(current_session_stamp)
 def dashboard_view(request):
     current_session = None
     try:
@@ -44,15 +50,32 @@ def dashboard_view(request):
         messages.info(request, "Please set up your current academic session to get started.")
         return redirect('add_academic_session')
 
-    subjects = Subject.objects.filter(session=current_session).order_by('name')
-    # We will add more calculations here later for attendance status
+    subjects = list(Subject.objects.filter(session=current_session).order_by('name'))
+    exam_dates = list(ExamDate.objects.filter(session=current_session).order_by('start_date'))
+    context = _dashboard_context(current_session, subjects, exam_dates)
+    return render(request, 'attendance/dashboard.html', context)
 
-    context = {
+def _dashboard_context(current_session, subjects, exam_dates):
+    # Eligibility of every subject against every upcoming exam, from one shared calendar and the
+    # subjects' running totals, so the query count does not grow with the number of subjects
+    calendar = current_session.get_calendar()
+    today = datetime.today().date()
+    upcoming_exams = [exam for exam in exam_dates if exam.start_date > today]
+    cached_eligibility = get_cached_eligibility(
+        current_session, subjects, today, lambda missing: project_eligibility_batch(missing, current_session, exam_dates, calendar, today)
+    )
+    subject_eligibility = [
+        (subject, [eligibility_info[exam.exam_type] for exam in upcoming_exams])
+        for subject, eligibility_info in zip(subjects, cached_eligibility)
+    ]
+    return {
         'current_session': current_session,
         'subjects': subjects,
-        'exam_dates': ExamDate.objects.filter(session=current_session).order_by('start_date'),
+        'exam_dates': exam_dates,
+        'upcoming_exams': upcoming_exams,
+        'subject_eligibility': subject_eligibility,
+        'holiday_count': current_session.calendar.holiday_count,
     }
-    return render(request, 'attendance/dashboard.html', context)
 
 # --- Academic Session Views ---
 @login_required
@@ -97,10 +120,139 @@ def update_academic_session(request, pk):
     return render(request, 'attendance/academic_session_form.html', {'form': form, 'session': session})
 
 @login_required
+@read_only_view
 def academic_session_list(request):
     sessions = AcademicSession.objects.filter(user=request.user).order_by('-start_date')
     return render(request, 'attendance/academic_session_list.html', {'sessions': sessions})
 
+SESSION_SEARCH_PAGE_SIZE = 20
+
+@login_required
+def session_search(request):
+    """
+    JSON search over the user's sessions by name, for session selectors too long to render in full.
+    Pages are fetched one row over the page size to tell whether there are more, without a COUNT.
+    """
+    query = request.GET.get('q', '').strip()
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        page = 1
+
+    sessions = AcademicSession.objects.filter(user=request.user).order_by('-start_date', '-id')
+    if query:
+        sessions = sessions.filter(name__icontains=query)
+    offset = (page - 1) * SESSION_SEARCH_PAGE_SIZE
+    rows = list(sessions[offset:offset + SESSION_SEARCH_PAGE_SIZE + 1])
+    return JsonResponse({
+        'results': [{'id': session.pk, 'text': str(session)} for session in rows[:SESSION_SEARCH_PAGE_SIZE]],
+        'page': page,
+        'has_more': len(rows) > SESSION_SEARCH_PAGE_SIZE,
+    })
+
+@login_required
+@read_only_view
+def session_summary(request, session_pk):
+    """
+    Monthly attendance per subject and weekly attendance over all subjects, read from the rollup
+    tables: the rows read grow with the number of weeks and months, not with the number of records.
+    """
+    session = get_object_or_404(AcademicSession, pk=session_pk, user=request.user)
+    subjects = list(Subject.objects.filter(session=session).order_by('name'))
+
+    by_subject = {}
+    for subject_id, month, conducted, attended in MonthlyAttendance.objects.filter(subject__session=session).values_list(
+        'subject_id', 'period_start', 'classes_conducted', 'classes_attended',
+    ):
+        by_subject.setdefault(subject_id, {})[month] = MonthlyAttendance(classes_conducted=conducted, classes_attended=attended)
+    months = sorted({month for months in by_subject.values() for month in months})
+    subject_months = [(subject, [by_subject.get(subject.pk, {}).get(month) for month in months]) for subject in subjects]
+
+    weeks = [
+        WeeklyAttendance(period_start=row['period_start'], classes_conducted=row['conducted'], classes_attended=row['attended'])
+        for row in WeeklyAttendance.objects.filter(subject__session=session).order_by('period_start').values('period_start').annotate(
+            conducted=Sum('classes_conducted'), attended=Sum('classes_attended'),
+        )
+    ]
+
+    context = {
+        'session': session,
+        'months': months,
+        'subject_months': subject_months,
+        'weeks': weeks,
+    }
+    return render(request, 'attendance/session_summary.html', context)
+
+MAX_WHAT_IF_TARGETS = 10
+
+@login_required
+@read_only_view
+def what_if(request, session_pk):
+    """
+    JSON what-if curves for the session's subjects (or ?subject=id) against each upcoming exam: the
+    attendance percentage at the exam and whether it is eligible, for every number of the remaining
+    classes missed, from 0 to all of them. With ?target=80&target=85.5, also the most classes that can
+    be missed while staying at or above each target percentage (null where it can't be reached).
+    Every subject and exam is evaluated in one vectorized call, from one read of the totals and calendar.
+    """
+    session = get_object_or_404(AcademicSession, pk=session_pk, user=request.user)
+    raw_targets = request.GET.getlist('target')
+    if len(raw_targets) > MAX_WHAT_IF_TARGETS:
+        return JsonResponse({'error': f"At most {MAX_WHAT_IF_TARGETS} targets per request."}, status=400)
+    try:
+        targets = [Decimal(value) for value in raw_targets]
+        if not all(target.is_finite() for target in targets): # 'nan' and 'inf' parse, but aren't percentages
+            raise InvalidOperation
+        targets = [target.quantize(Decimal('0.01')) for target in targets]
+    except InvalidOperation:
+        return JsonResponse({'error': "Targets must be percentages, e.g. target=80."}, status=400)
+    if any(not 0 <= target <= 100 for target in targets):
+        return JsonResponse({'error': "Targets must be between 0 and 100."}, status=400)
+
+    subjects = Subject.objects.filter(session=session).order_by('name')
+    if request.GET.get('subject'):
+        try:
+            subjects = subjects.filter(pk=int(request.GET['subject']))
+        except ValueError:
+            return JsonResponse({'error': "Invalid subject."}, status=400)
+    subjects = list(subjects)
+    today = datetime.today().date()
+    exams = list(ExamDate.objects.filter(session=session, start_date__gt=today).order_by('start_date'))
+
+    results = [{
+        'id': subject.pk, 'name': subject.name, 'code': subject.code,
+        'minimum_attendance_percentage': str(subject.minimum_attendance_percentage),
+        'total_conducted': subject.total_conducted, 'total_attended': subject.total_attended, 'exams': [],
+    } for subject in subjects]
+    if subjects and exams:
+        totals = project_totals_batch(subjects, session, exams, session.get_calendar(), today)
+        curves = what_if_curves(
+            totals.total_conducted, totals.total_attended, totals.minimum_basis_points, totals.projected_classes,
+            [to_basis_points(target) for target in targets],
+        )
+        # Convert to plain Python values once, rather than per element
+        projected = np.broadcast_to(totals.projected_classes, curves.max_misses.shape).tolist()
+        remaining, limit, target_limit = curves.classes_remaining.tolist(), curves.max_misses.tolist(), curves.target_max_misses.tolist()
+        # NaN, where a subject has no classes by the exam, isn't valid JSON; it goes out as null
+        percentage = np.round(curves.percentage, 2).astype(object)
+        percentage[np.isnan(curves.percentage)] = None
+        percentage, eligible = percentage.tolist(), curves.eligible.tolist()
+        for row, result in enumerate(results):
+            for col, exam in enumerate(exams):
+                points = remaining[row][col] + 1
+                result['exams'].append({
+                    'exam_type': exam.exam_type,
+                    'start_date': exam.start_date.isoformat(),
+                    'total_projected_classes': projected[row][col],
+                    'classes_remaining': remaining[row][col],
+                    'max_misses': limit[row][col] if limit[row][col] >= 0 else None,
+                    'targets': {str(target): misses if misses >= 0 else None for target, misses in zip(targets, target_limit[row][col])},
+                    # Entry m is the outcome of missing m of the remaining classes and attending the rest
+                    'percentage': percentage[row][col][:points],
+                    'eligible': eligible[row][col][:points],
+                })
+    return JsonResponse({'session': session.pk, 'today': today.isoformat(), 'subjects': results})
+
 # --- Subject Views ---
 @login_required
 def add_subject(request, session_pk):
@@ -136,166 +288,66 @@ def update_subject(request, pk):
     return render(request, 'attendance/subject_form.html', {'form': form, 'subject': subject})
 
 @login_required
+@read_only_view
+@conditional_on_session_data(subject_session_stamp)
 def subject_detail(request, pk):
-    subject = get_object_or_404(Subject, pk=pk, session__user=request.user)
-    session = subject.session
-    attendance_records = AttendanceRecord.objects.filter(subject=subject).order_by('date')
-
-    total_conducted = sum(rec.classes_conducted for rec in attendance_records)
-    total_attended = sum(rec.classes_attended for rec in attendance_records)
-
-    current_percentage = (total_attended / total_conducted * 100) if total_conducted > 0 else 0
+    subject = get_object_or_404(Subject.objects.select_related('session'), pk=pk, session__user=request.user)
+    # History is shown a page at a time; the summary and eligibility below use the running totals, not these rows
+    try:
+        before = parse_history_cursor(request.GET.get('before'))
+    except ValueError:
+        before = None
+    attendance_records, next_cursor = AttendanceRecord.objects.filter(subject=subject).history_page(before)
 
-    eligibility_info = {}
-    exam_dates = ExamDate.objects.filter(session=session).order_by('start_date')
+    today = datetime.today().date() # Get current datetime, then extract date part
+    context = _subject_detail_context(subject, attendance_records, next_cursor, _subject_eligibility(subject, today))
+    return render(request, 'attendance/subject_detail.html', context)
 
-    # Fetch all holidays for the current session once
-    session_holidays = set(Holiday.objects.filter(session=session).values_list('date', flat=True))
+def _subject_eligibility(subject, today):
+    session = subject.session
 
-    today = datetime.today().date() # Get current datetime, then extract date part
+    def compute_eligibility(subjects):
+        exam_dates = ExamDate.objects.filter(session=session).order_by('start_date')
+        # Working days are read from the session's compiled calendar (rebuilt only when holidays or session dates change)
+        calendar = session.get_calendar()
+        return project_eligibility_batch(subjects, session, exam_dates, calendar, today)
 
-    # Define a minimum threshold for relying on observed historical data
-    # If fewer than this many classes have been conducted, fall back to theoretical model
-    MIN_CLASSES_FOR_HISTORICAL_PROJECTION = 5 # Adjust this number as needed (e.g., 10 or 15)
-
-    for exam in exam_dates:
-        # 0. Handle Exam Past scenario first
-        if exam.start_date <= today:
-            eligibility_info[exam.exam_type] = {
-                'status': 'Exam Past',
-                'detail': 'This exam date has already passed.',
-                'total_projected_classes': total_conducted, 
-                'projected_attended': total_attended,
-                'projected_percentage': current_percentage,
-                'classes_remaining_to_be_conducted': 0,
-                'min_required_classes': 0,
-                'classes_to_attend_for_eligibility': 0,
-                'classes_can_miss': 0,
-            }
-            continue
-
-        # Define the end date for total projections (day before exam starts)
-        projection_end_date = exam.start_date - timedelta(days=1)
-
-        # Handle edge case where session start date is after the projection end date
-        if projection_end_date < session.start_date:
-            total_projected_classes_until_exam = 0
-            projection_method_detail = "Exam date before session start."
-        else:
-            # Calculate total working days from session start to exam date
-            total_working_days_to_exam_end_date = get_working_days_count(session.start_date, projection_end_date, session_holidays)
-
-            # Calculate working days elapsed from session start to today (inclusive)
-            working_days_elapsed_till_today = get_working_days_count(session.start_date, today, session_holidays)
-
-            # --- NEW PROJECTION LOGIC: Prioritize historical rate ---
-            if total_conducted >= MIN_CLASSES_FOR_HISTORICAL_PROJECTION and working_days_elapsed_till_today > 0:
-                # Calculate actual classes conducted per working day based on history
-                actual_classes_per_working_day = total_conducted / working_days_elapsed_till_today
-                
-                # Project this rate over the total duration until the exam
-                total_projected_classes_until_exam = actual_classes_per_working_day * total_working_days_to_exam_end_date
-                total_projected_classes_until_exam = round(total_projected_classes_until_exam)
-                projection_method_detail = "Based on observed historical class rate."
-            else:
-                # Fallback to the theoretical method if not enough history or no classes yet
-                # This AVERAGE_WORKING_DAYS_PER_WEEK is only used if historical data isn't sufficient
-                AVERAGE_WORKING_DAYS_PER_WEEK = 5.5 
-                total_projected_classes_until_exam = (total_working_days_to_exam_end_date / AVERAGE_WORKING_DAYS_PER_WEEK) * subject.classes_per_week
-                total_projected_classes_until_exam = round(total_projected_classes_until_exam)
-                projection_method_detail = "Based on theoretical schedule (insufficient historical data)."
-
-        # IMPORTANT: Ensure projected total is at least what's already conducted
-        # This prevents scenarios where the projection model might estimate fewer classes than have already happened.
-        total_projected_classes_until_exam = max(total_projected_classes_until_exam, total_conducted)
-        
-        # If no classes are projected (or somehow became 0 after max)
-        if total_projected_classes_until_exam <= 0:
-            eligibility_info[exam.exam_type] = {
-                'status': 'Not Applicable',
-                'detail': 'Cannot project eligibility as no effective class days are expected before this exam date or subject has no classes.',
-                'total_projected_classes': 0,
-                'classes_remaining_to_be_conducted': 0,
-                'min_required_classes': 0,
-                'classes_to_attend_for_eligibility': 0,
-                'classes_can_miss': 0,
-                'current_percentage': current_percentage,
-                'projected_percentage_if_all_attended': 0,
-            }
-            continue
-
-        # Calculate Classes Remaining to be Conducted (consistent with total projected)
-        classes_remaining_to_be_conducted = max(0, total_projected_classes_until_exam - total_conducted)
-        
-        # Calculate Minimum Required Classes based on Total Projected
-        min_required_classes = (subject.minimum_attendance_percentage / 100) * total_projected_classes_until_exam
-        min_required_classes = round(min_required_classes)
-
-        # Projected percentage if ALL remaining classes are attended
-        projected_attended_if_all_attended = total_attended + classes_remaining_to_be_conducted
-        projected_percentage_if_all_attended = (projected_attended_if_all_attended / total_projected_classes_until_exam * 100) if total_projected_classes_until_exam > 0 else 0
-
-        status = ''
-        detail = ''
-        classes_to_attend_for_eligibility = 0
-        classes_can_miss = 0
-
-        # Determine Eligibility Status, Detail, and Classes to Attend/Miss
-        if projected_percentage_if_all_attended < subject.minimum_attendance_percentage:
-            status = 'Ineligible'
-            detail = f"You cannot reach {subject.minimum_attendance_percentage:.2f}% attendance for this exam, even if you attend all {classes_remaining_to_be_conducted} remaining classes. Your max possible attendance will be {projected_percentage_if_all_attended:.2f}%."
-            classes_to_attend_for_eligibility = classes_remaining_to_be_conducted 
-            classes_can_miss = 0
-        else:
-            classes_needed = max(0, min_required_classes - total_attended)
-
-            if classes_needed > 0: # Needs Attention: requires more classes to reach minimum
-                status = 'Needs Attention'
-                classes_to_attend_for_eligibility = classes_needed
-                classes_can_miss = classes_remaining_to_be_conducted - classes_needed # Classes you can miss = Remaining classes - Classes needed to attend
-                detail = f"You must attend at least {classes_needed} more classes to reach {subject.minimum_attendance_percentage:.2f}% eligibility. You can miss up to {classes_can_miss} more classes."
-                
-            else: # Good: Already met or exceeded minimum required attendance
-                status = 'Good'
-                classes_to_attend_for_eligibility = 0
-
-                max_overall_misses_allowed = total_projected_classes_until_exam - min_required_classes
-                classes_already_missed = total_conducted - total_attended
-                
-                classes_can_miss = max(0, max_overall_misses_allowed - classes_already_missed)
-                classes_can_miss = min(classes_can_miss, classes_remaining_to_be_conducted) # Cap by actual remaining classes
-
-                if classes_can_miss == 0 and classes_remaining_to_be_conducted > 0:
-                    status = 'Good (No Misses Left)'
-                    detail = f"You are eligible, but you cannot miss any more of the remaining {classes_remaining_to_be_conducted} classes to maintain {subject.minimum_attendance_percentage:.2f}% eligibility for this exam."
-                elif classes_can_miss == 0 and classes_remaining_to_be_conducted == 0:
-                    status = 'Good (All Classes Done)'
-                    detail = f"You are eligible. All projected classes for this exam are completed."
-                else:
-                    detail = f"You can afford to miss up to {classes_can_miss} more classes and still be eligible for this exam (reaching at least {subject.minimum_attendance_percentage:.2f}%)."
-        
-        # Store all calculated info for the current exam, including projection method detail
-        eligibility_info[exam.exam_type] = {
-            'status': status,
-            'detail': detail + (f" (Projection: {projection_method_detail})" if projection_method_detail else ""),
-            'total_projected_classes': total_projected_classes_until_exam,
-            'classes_remaining_to_be_conducted': classes_remaining_to_be_conducted,
-            'min_required_classes': min_required_classes,
-            'classes_to_attend_for_eligibility': classes_to_attend_for_eligibility,
-            'classes_can_miss': classes_can_miss,
-            'current_percentage': current_percentage,
-            'projected_percentage_if_all_attended': projected_percentage_if_all_attended,
-        }
+    # Cached until anything in the session changes (or the day does)
+    return get_cached_eligibility(session, [subject], today, compute_eligibility)[0]
 
-    context = {
+def _subject_detail_context(subject, attendance_records, next_cursor, eligibility_info):
+    return {
         'subject': subject,
         'attendance_records': attendance_records,
-        'total_conducted': total_conducted,
-        'total_attended': total_attended,
-        'current_percentage': current_percentage,
+        'next_cursor': format_history_cursor(next_cursor),
+        # Running totals are maintained on the subject by every attendance write
+        'total_conducted': subject.total_conducted,
+        'total_attended': subject.total_attended,
+        'current_percentage': subject.current_percentage,
         'eligibility_info': eligibility_info,
     }
-    return render(request, 'attendance/subject_detail.html', context)
+
+def format_history_cursor(cursor):
+    """Encodes a (date, id) history cursor as 'YYYY-MM-DD.id' for URLs."""
+    return f"{cursor[0].isoformat()}.{cursor[1]}" if cursor else None
+
+def parse_history_cursor(value):
+    """Decodes a cursor from format_history_cursor(); None for no cursor, ValueError if malformed."""
+    if not value:
+        return None
+    record_date, _, record_id = value.partition('.')
+    return date.fromisoformat(record_date), int(record_id)
+
+@login_required
+def subject_history(request, pk):
+    """JSON page of a subject's attendance history, for the 'Load more' button on subject_detail."""
+    subject = get_object_or_404(Subject.objects.only('id'), pk=pk, session__user=request.user)
+    try:
+        before = parse_history_cursor(request.GET.get('before'))
+    except ValueError:
+        return JsonResponse({'error': "Invalid 'before' cursor."}, status=400)
+    rows, next_cursor = AttendanceRecord.objects.filter(subject=subject).history_page(before)
+    return JsonResponse({'records': rows, 'next': format_history_cursor(next_cursor)})
 
 @login_required
 def upload_holidays(request, session_id):
@@ -304,72 +356,13 @@ def upload_holidays(request, session_id):
     
     if request.method == 'POST':
         form = HolidayUploadForm(request.POST, request.FILES)
-        if form.is_valid():
-            # Use TextIOWrapper to read the uploaded file as text
-            csv_file = TextIOWrapper(form.cleaned_data['csv_file'].file, encoding='utf-8')
-            reader = csv.reader(csv_file)
-            header_skipped = False
-            holidays_added_count = 0
-            errors = []
-
-            for row_num, row in enumerate(reader):
-                # Skip header row (first row) if present
-                if row_num == 0 and not row[0].strip().replace('-', '').replace('/', '').isdigit(): # Simple heuristic: if first cell isn't numeric-looking, assume header
-                    header_skipped = True
-                    continue
-
-                if not row or not row[0].strip(): # Skip empty rows or rows with empty first column
-                    continue
-
-                try:
-                    date_str = row[0].strip()
-                    holiday_name = row[1].strip() if len(row) > 1 else '' # Optional name
-
-                    # Attempt to parse various date formats
-                    holiday_date = None
-                    # Ordered from most specific/least ambiguous to more common
-                    for fmt in ('%Y-%m-%d', '%d-%m-%Y', '%m/%d/%Y', '%d/%m/%Y', '%Y/%m/%d'): 
-                        try:
-                            holiday_date = datetime.strptime(date_str, fmt).date()
-                            break # Found a format, break the loop
-                        except ValueError:
-                            continue # Try next format
-                    
-                    if holiday_date is None:
-                        errors.append(f"Row {row_num + 1}: Invalid date format '{date_str}'. Please use YYYY-MM-DD, DD-MM-YYYY, MM/DD/YYYY, DD/MM/YYYY, or YYYY/MM/DD.")
-                        continue # Skip to next row
-
-                    # Ensure holiday date is within session bounds (optional, but good practice)
-                    if not (session.start_date <= holiday_date <= session.end_date):
-                        errors.append(f"Row {row_num + 1}: Holiday date {holiday_date} is outside the session dates ({session.start_date} to {session.end_date}).")
-                        continue # Skip to next row
-
-                    # Create or get the holiday - IntegrityError handles unique_together
-                    Holiday.objects.create(
-                        session=session,
-                        date=holiday_date,
-                        name=holiday_name
-                    )
-                    holidays_added_count += 1
-
-                except IntegrityError: # Catches unique_together constraint violation (duplicate date for session)
-                    messages.warning(request, f"Holiday on {date_str} already exists for this session. Skipping row {row_num + 1}.")
-                except IndexError: # Catches rows with not enough columns (e.g., just an empty row or a row with only a date and no name)
-                    errors.append(f"Row {row_num + 1}: Malformed row. Expected at least a date column. Skipping.")
-                except Exception as e:
-                    # Catch any other unexpected errors during row processing
-                    errors.append(f"Row {row_num + 1}: An unexpected error occurred: {e}")
-
-            if holidays_added_count > 0:
-                messages.success(request, f"Successfully added {holidays_added_count} holidays to session '{session.name}'.")
-            if errors:
-                for error in errors:
-                    messages.error(request, error)
-            
-            return redirect('academic_session_list') # Redirect back to the list of sessions
-        else:
-            # If form is not valid (e.g., no file selected)
-            messages.error(request, "Please correct the errors in the form.")
+        upload = spool_csv_upload(form) if form.is_valid() else None
+        if upload is not None:
+            # The import runs as a background job; its page shows the progress
+            job = enqueue(request.user, JOB_HOLIDAYS_CSV, session=session, upload=upload)
+            return redirect('job_detail', pk=job.pk)
+        # If form is not valid (e.g., no file selected)
+        messages.error(request, "Please correct the errors in the form.")
     else:
         # For GET requests, show an empty form
         form = HolidayUploadForm()
@@ -401,6 +394,99 @@ def add_attendance(request, subject_pk):
     context = {'form': form, 'subject': subject}
     return render(request, 'attendance/add_attendance.html', context)
 
+def json_login_required(view):
+    """Like login_required, for JSON APIs: anonymous requests get a 401 JSON error, not a redirect to the login page."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': f"Log in first, at {reverse('login')}."}, status=401)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+@json_login_required
+@require_POST
+def attendance_batch(request):
+    """
+    JSON API for marking many attendance entries in one request. Takes
+    {"entries": [{"subject": id, "date": "YYYY-MM-DD", "conducted": n, "attended": n}, ...]},
+    creating or overwriting the record of each (subject, date), and returns a result per entry
+    plus the new totals of every subject written to. Invalid entries don't stop the valid ones.
+
+    Clients authenticate as the site's pages do, with a login session. Apps and kiosks GET the
+    login page for the csrftoken cookie and POST their credentials to it with that token as
+    csrfmiddlewaretoken. Then they send the cookies they were given with each call, plus the
+    token in an X-CSRFToken header (and, over HTTPS, an Origin or Referer header naming this site).
+    """
+    try:
+        entries = json.loads(request.body)['entries']
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'error': 'Expected a JSON object with an "entries" list.'}, status=400)
+    if not isinstance(entries, list):
+        return JsonResponse({'error': '"entries" must be a list.'}, status=400)
+    if len(entries) > MAX_BATCH_ENTRIES:
+        return JsonResponse({'error': f"At most {MAX_BATCH_ENTRIES} entries per request."}, status=400)
+
+    results, totals = upsert_attendance_entries(request.user, entries)
+    counts = dict.fromkeys((ENTRY_CREATED, ENTRY_UPDATED, ENTRY_ERROR), 0)
+    for result in results:
+        counts[result['status']] += 1
+    return JsonResponse({
+        'results': results,
+        **counts,
+        'subjects': [
+            {
+                'id': subject_id, 'total_conducted': conducted, 'total_attended': attended,
+                'percentage': round(attended / conducted * 100, 2) if conducted else 0,
+            }
+            for subject_id, (conducted, attended) in sorted(totals.items())
+        ],
+    })
+
+@login_required
+def import_attendance(request, session_pk):
+    session = get_object_or_404(AcademicSession, pk=session_pk, user=request.user)
+    if request.method == 'POST':
+        form = AttendanceImportForm(request.POST, request.FILES)
+        upload = spool_csv_upload(form) if form.is_valid() else None
+        if upload is not None:
+            job = enqueue(request.user, JOB_ATTENDANCE_CSV, session=session, upload=upload, mode=form.cleaned_data['mode'])
+            return redirect('job_detail', pk=job.pk)
+        messages.error(request, "Please correct the errors in the form.")
+    else:
+        form = AttendanceImportForm()
+    context = {'form': form, 'session': session}
+    return render(request, 'attendance/import_attendance.html', context)
+
+EXPORT_CONTENT_TYPES = {'csv': 'text/csv; charset=utf-8', 'json': 'application/json'}
+
+@login_required
+def export_attendance(request, session_pk=None):
+    """
+    Streams one session's attendance (or all the user's sessions, without session_pk) as a download.
+    ?kind=records (default) gives every record; ?kind=summary gives each subject's totals and its
+    eligibility for each upcoming exam. ?format=csv (default) or json.
+    """
+    export_format = request.GET.get('format', 'csv')
+    kind = request.GET.get('kind', EXPORT_RECORDS)
+    if export_format not in EXPORT_CONTENT_TYPES or kind not in (EXPORT_RECORDS, EXPORT_SUMMARY):
+        return JsonResponse({'error': "Expected format=csv|json and kind=records|summary."}, status=400)
+
+    if session_pk is None:
+        sessions = list(AcademicSession.objects.filter(user=request.user).order_by('-start_date', '-id'))
+        filename = f'attendance-all-{kind}.{export_format}'
+    else:
+        sessions = [get_object_or_404(AcademicSession, pk=session_pk, user=request.user)]
+        filename = f'attendance-session-{session_pk}-{kind}.{export_format}'
+
+    if kind == EXPORT_RECORDS:
+        columns, rows = RECORD_COLUMNS, record_rows(sessions)
+    else:
+        columns, rows = SUMMARY_COLUMNS, summary_rows(sessions, datetime.today().date())
+    chunks = csv_chunks(columns, rows) if export_format == 'csv' else json_chunks(kind, columns, rows)
+    response = StreamingHttpResponse(chunks, content_type=EXPORT_CONTENT_TYPES[export_format])
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
 # --- Exam Date Views ---
 @login_required
 def add_exam_date(request, session_pk):
@@ -426,55 +512,70 @@ def add_exam_date(request, session_pk):
 @login_required
 def bulk_add_holidays(request):
     if request.method == 'POST':
-        form = HolidayBulkForm(request.POST)
+        form = HolidayBulkForm(request.POST, user=request.user)
         if form.is_valid():
-            session = form.cleaned_data['session']
-            holiday_dates_text = form.cleaned_data.get('holiday_dates_text')
-            
-            holidays_added_count = 0
-            errors = []
-
-            # Process text input
-            if holiday_dates_text:
-                for line in holiday_dates_text.splitlines():
-                    line = line.strip()
-                    if not line:
-                        continue
-                    
-                    try:
-                        parts = line.split(' - ', 1) # Split only on the first ' - '
-                        date_str = parts[0].strip()
-                        holiday_name = parts[1].strip() if len(parts) > 1 else "Holiday" # Default name if not provided
-                        
-                        # CORRECTED LINE HERE:
-                        holiday_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-                        
-                        Holiday.objects.create(session=session, name=holiday_name, date=holiday_date)
-                        holidays_added_count += 1
-                    except ValueError:
-                        errors.append(f"Invalid date format or entry: '{line}'. Please use YYYY-MM-DD.")
-                    except IntegrityError:
-                        errors.append(f"Holiday on {date_str} already exists for session '{session.name}'.")
-                    except Exception as e:
-                        errors.append(f"Error processing line '{line}': {e}")
-            
-            # (Optional: Add logic here to process CSV file if you include holiday_csv_file field)
-
-            if holidays_added_count > 0:
-                messages.success(request, f"Successfully added {holidays_added_count} holidays to session '{session.name}'.")
-            if errors:
-                for error_msg in errors:
-                    messages.error(request, error_msg)
-            
-            if holidays_added_count > 0 and not errors:
-                return redirect('dashboard') # Redirect to dashboard after successful bulk add
-            
+            job = enqueue(request.user, JOB_HOLIDAYS_TEXT, form.cleaned_data.get('holiday_dates_text') or '', session=form.cleaned_data['session'])
+            return redirect('job_detail', pk=job.pk)
     else:
-        form = HolidayBulkForm(initial={'session': AcademicSession.objects.filter(user=request.user, is_current=True).first()})
+        form = HolidayBulkForm(initial={'session': AcademicSession.objects.filter(user=request.user, is_current=True).first()}, user=request.user)
     
     context = {'form': form}
     return render(request, 'attendance/bulk_add_holidays.html', context)
 
+# --- Background Job Views ---
+def spool_csv_upload(form):
+    """
+    Spools the form's uploaded csv_file for a job to read and returns the copy's path, or None
+    after adding a form error if it is larger than JOBS_MAX_UPLOAD_SIZE or isn't UTF-8.
+    """
+    csv_file = form.cleaned_data['csv_file']
+    if csv_file.size > max_upload_size():
+        form.add_error('csv_file', f"The file must be at most {filesizeformat(max_upload_size())}.")
+        return None
+    try:
+        return spool_upload(csv_file)
+    except UnicodeDecodeError:
+        form.add_error('csv_file', "The file must be UTF-8 encoded text.")
+        return None
+
+@login_required
+def job_detail(request, pk):
+    job = get_job_status(request.user, pk)
+    if job is None:
+        raise Http404("No such job.")
+    context = {'job': job, 'progress_url': reverse('job_progress', args=[pk])}
+    return render(request, 'attendance/job_detail.html', context)
+
+@login_required
+@never_cache
+@read_only_view
+def job_progress(request, pk):
+    """A job's status, rows processed, counts and errors so far, as JSON, for its page to poll."""
+    job = get_job_status(request.user, pk)
+    if job is None:
+        return JsonResponse({'error': "No such job."}, status=404)
+    return JsonResponse(job)
+
+# --- Monitoring Views ---
+@staff_member_required
+def eligibility_cache_stats(request):
+    return JsonResponse(get_eligibility_cache_stats())
+
+def is_metrics_scraper(request):
+    """Whether the request carries the bearer METRICS_TOKEN or comes from one of METRICS_ALLOWED_IPS."""
+    token = settings.METRICS_TOKEN
+    if token and hmac.compare_digest(request.headers.get('Authorization', '').encode(), f'Bearer {token}'.encode()):
+        return True
+    return request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS
+
+def metrics(request):
+    """Request metrics of all worker processes, in Prometheus text format, for scrapers and staff."""
+    if not (request.user.is_staff or is_metrics_scraper(request)):
+        return HttpResponseForbidden()
+    recorder = get_recorder()
+    recorder.flush()
+    return HttpResponse(render_prometheus(recorder.store.read()), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 # --- User Authentication Views ---
 def signup(request):
     if request.method == 'POST':
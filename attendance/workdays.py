@@ -0,0 +1,281 @@
+# attendance/workdays.py
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from calendar import monthrange
+from datetime import date, timedelta
+from typing import NamedTuple
+
+SATURDAY = 5
+
+
+class WorkdayRules(NamedTuple):
+    """
+    Which days count as working days, as two bitmasks:
+    - weekdays: bit n set means weekday n (Mon=0 ... Sun=6) is always a working day.
+    - saturday_weeks: bit n set means the (n+1)th Saturday of the month is a working day.
+    """
+    weekdays: int = 0b0011111 # Monday to Friday
+    saturday_weeks: int = 0b00101 # 1st and 3rd Saturday
+
+
+DEFAULT_RULES = WorkdayRules()
+
+
+def is_working_day(day, rules=DEFAULT_RULES):
+    """
+    True if `day` is a working day under `rules` (holidays are not considered).
+    """
+    weekday = day.weekday()
+    if rules.weekdays >> weekday & 1:
+        return True
+    return weekday == SATURDAY and bool(rules.saturday_weeks >> ((day.day - 1) // 7) & 1)
+
+
+def _weekdays_in_range(start_date, end_date, weekday_mask):
+    """
+    Counts the days whose weekday is in `weekday_mask` between start_date and end_date (inclusive)
+    without walking the days.
+    """
+    full_weeks, extra_days = divmod((end_date - start_date).days + 1, 7)
+    count = full_weeks * bin(weekday_mask).count('1')
+    # The leftover days form one partial week starting on start_date's weekday.
+    first_weekday = start_date.weekday()
+    for offset in range(extra_days):
+        if weekday_mask >> ((first_weekday + offset) % 7) & 1:
+            count += 1
+    return count
+
+
+def _working_saturdays_in_range(start_date, end_date, saturday_weeks):
+    """
+    Counts the Saturdays selected by `saturday_weeks` between start_date and end_date (inclusive).
+    Every month has exactly one Saturday in each of its first four weeks, so only the
+    first and last month need their Saturdays located (plus every month for a 5th-Saturday rule).
+    """
+    weeks = [week for week in range(5) if saturday_weeks >> week & 1]
+
+    def in_month(year, month, lo=start_date, hi=end_date):
+        first_saturday = 1 + (5 - date(year, month, 1).weekday()) % 7
+        days_in_month = monthrange(year, month)[1]
+        count = 0
+        for week in weeks:
+            day = first_saturday + 7 * week
+            if day <= days_in_month and lo <= date(year, month, day) <= hi:
+                count += 1
+        return count
+
+    first_month = start_date.year * 12 + start_date.month - 1
+    last_month = end_date.year * 12 + end_date.month - 1
+    if first_month == last_month:
+        return in_month(start_date.year, start_date.month)
+
+    count = in_month(start_date.year, start_date.month) + in_month(end_date.year, end_date.month)
+    if 4 in weeks:
+        # Fifth Saturdays only exist in some months, so whole months are checked one by one.
+        for month_index in range(first_month + 1, last_month):
+            year, month = divmod(month_index, 12)
+            count += in_month(year, month + 1, date.min, date.max)
+    else:
+        count += (last_month - first_month - 1) * len(weeks)
+    return count
+
+
+def get_working_days_count(start_date, end_date, holidays, rules=DEFAULT_RULES):
+    """
+    Calculates the number of working days under `rules` (by default Mon-Fri + 1st/3rd Sat)
+    between start_date and end_date (inclusive).
+
+    `holidays` is any iterable of dates, in any order.
+    Only holidays inside the range that fall on a working day are subtracted.
+    """
+    if start_date > end_date:
+        return 0
+
+    count = _weekdays_in_range(start_date, end_date, rules.weekdays)
+    if not rules.weekdays >> SATURDAY & 1:
+        count += _working_saturdays_in_range(start_date, end_date, rules.saturday_weeks)
+
+    # The bisects below need them in order; Timsort is linear on an already sorted list
+    holidays = sorted(holidays)
+    lo = bisect_left(holidays, start_date)
+    hi = bisect_right(holidays, end_date)
+    previous = None
+    for holiday in holidays[lo:hi]:
+        if holiday != previous and is_working_day(holiday, rules):
+            count -= 1
+        previous = holiday
+    return count
+
+
+def get_working_days_count_by_loop(start_date, end_date, holidays):
+    """
+    Day-by-day reference implementation, kept for equivalence tests and benchmarks.
+    """
+    if start_date > end_date:
+        return 0
+
+    count = 0
+    current_date = start_date
+    while current_date <= end_date:
+        if 0 <= current_date.weekday() <= 4: # Monday (0) to Friday (4)
+            if current_date not in holidays:
+                count += 1
+        elif current_date.weekday() == 5: # Saturday (5)
+            if (current_date.day - 1) // 7 in [0, 2]: # 1st or 3rd Saturday
+                if current_date not in holidays:
+                    count += 1
+        current_date += timedelta(days=1)
+    return count
+
+
+# --- Compiled Calendar ---
+# Day flags stored in CompiledCalendar.day_flags
+NON_WORKING_DAY = 0
+WORKING_DAY = 1
+HOLIDAY = 2 # A working day cancelled by a holiday
+
+
+def _pack(values):
+    """Serializes an array('I') as little-endian bytes."""
+    if sys.byteorder == 'big':
+        values = array('I', values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _unpack(data):
+    values = array('I')
+    values.frombytes(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+def working_weekdays_in_range(start_date, end_date, rules=DEFAULT_RULES):
+    """
+    Counts the working days under `rules` between start_date and end_date (inclusive) per
+    weekday, holidays not considered. Returns 7 counts, Monday first.
+    """
+    if start_date > end_date:
+        return [0] * 7
+    counts = [_weekdays_in_range(start_date, end_date, 1 << weekday) if rules.weekdays >> weekday & 1 else 0 for weekday in range(7)]
+    if not rules.weekdays >> SATURDAY & 1:
+        counts[SATURDAY] = _working_saturdays_in_range(start_date, end_date, rules.saturday_weeks)
+    return counts
+
+
+class CompiledCalendar:
+    """
+    A precomputed working-day calendar for one date range: one flag per day plus
+    cumulative working-day prefix sums, in total and per weekday, so counting working
+    days between two dates is two array lookups. Dates outside the range fall back to
+    the arithmetic counters, which are exact there because every holiday lies inside
+    the compiled range.
+    """
+
+    def __init__(self, start_date, day_flags, prefix, rules=DEFAULT_RULES, weekday_prefix=None):
+        self.start_date = start_date
+        self.end_date = start_date + timedelta(days=len(day_flags) - 1)
+        self.day_flags = day_flags
+        self.prefix = prefix # prefix[i] = working days in [start_date, start_date + i)
+        # weekday_prefix[7 * i + w] = working days falling on weekday w in [start_date, start_date + i)
+        self.weekday_prefix = weekday_prefix
+        self.rules = rules
+
+    @classmethod
+    def compile(cls, start_date, end_date, holidays, rules=DEFAULT_RULES):
+        """
+        Builds the calendar for [start_date, end_date], widened to cover every holiday. A range
+        ending before it starts compiles to an empty calendar, which counts by arithmetic alone.
+        """
+        holidays = set(holidays)
+        if holidays:
+            start_date = min(start_date, min(holidays))
+            end_date = max(end_date, max(holidays))
+
+        day_count = max((end_date - start_date).days + 1, 0)
+        day_flags = bytearray(day_count)
+        prefix = array('I', [0]) * (day_count + 1)
+        weekday_prefix = array('I', [0]) * (7 * (day_count + 1))
+        running = 0
+        by_weekday = [0] * 7
+        day = start_date
+        for index in range(day_count):
+            if is_working_day(day, rules):
+                if day in holidays:
+                    day_flags[index] = HOLIDAY
+                else:
+                    day_flags[index] = WORKING_DAY
+                    running += 1
+                    by_weekday[day.weekday()] += 1
+            prefix[index + 1] = running
+            weekday_prefix[7 * (index + 1):7 * (index + 2)] = array('I', by_weekday)
+            day += timedelta(days=1)
+        return cls(start_date, bytes(day_flags), prefix, rules, weekday_prefix)
+
+    @classmethod
+    def from_bytes(cls, start_date, day_flags, prefix, rules=DEFAULT_RULES, weekday_prefix=b''):
+        return cls(start_date, bytes(day_flags), _unpack(bytes(prefix)), rules, _unpack(bytes(weekday_prefix)) if weekday_prefix else None)
+
+    def prefix_bytes(self):
+        return _pack(self.prefix)
+
+    def weekday_prefix_bytes(self):
+        return _pack(self.weekday_prefix)
+
+    def _working_days_before(self, day):
+        """Working days from start_date up to (but excluding) `day`, clamped to the range."""
+        index = (day - self.start_date).days
+        return self.prefix[min(max(index, 0), len(self.day_flags))]
+
+    def working_days(self, start_date, end_date):
+        """
+        Number of working days between start_date and end_date (inclusive).
+        """
+        if start_date > end_date:
+            return 0
+
+        count = 0
+        # Portions outside the compiled range have no holidays.
+        if start_date < self.start_date:
+            count += get_working_days_count(start_date, min(end_date, self.start_date - timedelta(days=1)), [], self.rules)
+        if end_date > self.end_date:
+            count += get_working_days_count(max(start_date, self.end_date + timedelta(days=1)), end_date, [], self.rules)
+
+        inner_start = max(start_date, self.start_date)
+        inner_end = min(end_date, self.end_date)
+        if inner_start <= inner_end:
+            count += self._working_days_before(inner_end + timedelta(days=1)) - self._working_days_before(inner_start)
+        return count
+
+    def _weekday_counts_before(self, day):
+        """Working days per weekday from start_date up to (but excluding) `day`, clamped to the range."""
+        index = min(max((day - self.start_date).days, 0), len(self.day_flags))
+        return self.weekday_prefix[7 * index:7 * index + 7]
+
+    def working_days_by_weekday(self, start_date, end_date):
+        """
+        Number of working days between start_date and end_date (inclusive) falling on each
+        weekday. Returns 7 counts, Monday first.
+        """
+        if start_date > end_date:
+            return [0] * 7
+
+        counts = [0] * 7
+        # Portions outside the compiled range have no holidays.
+        outside = []
+        if start_date < self.start_date:
+            outside.append((start_date, min(end_date, self.start_date - timedelta(days=1))))
+        if end_date > self.end_date:
+            outside.append((max(start_date, self.end_date + timedelta(days=1)), end_date))
+        for outside_start, outside_end in outside:
+            counts = [count + extra for count, extra in zip(counts, working_weekdays_in_range(outside_start, outside_end, self.rules))]
+
+        inner_start = max(start_date, self.start_date)
+        inner_end = min(end_date, self.end_date)
+        if inner_start <= inner_end:
+            after = self._weekday_counts_before(inner_end + timedelta(days=1))
+            before = self._weekday_counts_before(inner_start)
+            counts = [count + a - b for count, a, b in zip(counts, after, before)]
+        return counts
@@ -12,5 +12,12 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'attendance_eligibility_project.settings')
+# Serve the native async views; set ATTENDANCE_ASYNC_VIEWS=0 to run the sync ones in the thread pool instead
+os.environ.setdefault('ATTENDANCE_ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
+
+# Imported only once Django is set up, which the line above does
+from attendance.jobs import start_runner  # noqa: E402
+
+start_runner()
@@ -0,0 +1,12 @@
+# attendance_eligibility_project/asgi_urls.py
+# The URLconf under ASGI: the same URLs, with the async versions of the read-heavy views taking
+# precedence over their sync counterparts. Selected in settings.py by ATTENDANCE_ASYNC_VIEWS.
+from django.urls import include, path
+
+from attendance.urls import async_urlpatterns
+from attendance_eligibility_project.urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path('', include(async_urlpatterns)),
+    *sync_urlpatterns,
+]
@@ -0,0 +1,58 @@
+# attendance_eligibility_project/database.py
+# The production SQLite profile, selected in settings.py with ATTENDANCE_DB_PROFILE=production.
+
+# Applied to every new connection. WAL lets readers run alongside the single writer; with it,
+# synchronous=NORMAL only fsyncs at checkpoints and can lose the last commits on power loss but
+# never corrupts the database.
+SQLITE_PRODUCTION_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA cache_size=-65536', # 64 MiB page cache per connection
+    'PRAGMA mmap_size=268435456', # read through up to 256 MiB of memory-mapped file
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA foreign_keys=ON',
+)
+
+# Seconds a connection waits for the write lock before raising "database is locked"
+SQLITE_BUSY_TIMEOUT = 20
+# Seconds a connection is kept open for reuse by later requests of the same worker
+CONN_MAX_AGE = 600
+
+# Must match attendance.db_routers.READ_DATABASE_ALIAS
+READ_DATABASE_ALIAS = 'read'
+
+
+def sqlite_production_databases(path):
+    """
+    Returns DATABASES for the SQLite file at `path`: a 'default' connection for writes and a
+    query-only READ_DATABASE_ALIAS connection to the same file for read-only views.
+
+    Writes begin their transactions IMMEDIATE, taking the write lock up front. A deferred
+    transaction that reads and then writes can't wait for the lock without deadlocking another
+    writer, so SQLite fails it at once with "database is locked" whatever the busy timeout.
+    """
+    common = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path,
+        'CONN_MAX_AGE': CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
+    }
+    return {
+        'default': {
+            **common,
+            'OPTIONS': {
+                'timeout': SQLITE_BUSY_TIMEOUT,
+                'transaction_mode': 'IMMEDIATE',
+                'init_command': ';'.join(SQLITE_PRODUCTION_PRAGMAS),
+            },
+        },
+        READ_DATABASE_ALIAS: {
+            **common,
+            'OPTIONS': {
+                'timeout': SQLITE_BUSY_TIMEOUT,
+                'init_command': ';'.join(SQLITE_PRODUCTION_PRAGMAS + ('PRAGMA query_only=ON',)),
+            },
+            # The same file as 'default', so tests use the default test database for it
+            'TEST': {'MIRROR': 'default'},
+        },
+    }
@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from attendance_eligibility_project.database import sqlite_production_databases
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -42,6 +45,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'attendance.metrics.MetricsMiddleware', # first, so it times the whole stack
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -53,6 +57,11 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'attendance_eligibility_project.urls'
 
+# Serve the async versions of the read-heavy views (attendance/async_views.py); asgi.py turns this on
+ASYNC_VIEWS = os.environ.get('ATTENDANCE_ASYNC_VIEWS', '0') == '1'
+if ASYNC_VIEWS:
+    ROOT_URLCONF = 'attendance_eligibility_project.asgi_urls'
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -81,6 +90,71 @@ DATABASES = {
     }
 }
 
+# ATTENDANCE_DB_PROFILE=production switches SQLite to WAL with tuned pragmas, a busy timeout and
+# persistent connections, and routes read-only views to a query-only read connection.
+DB_PROFILE = os.environ.get('ATTENDANCE_DB_PROFILE', 'development')
+if DB_PROFILE == 'production':
+    DATABASES = sqlite_production_databases(BASE_DIR / 'db.sqlite3')
+    DATABASE_ROUTERS = ['attendance.db_routers.ReadRoutingRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Per-subject eligibility results (attendance/eligibility_cache.py). Bounded: once MAX_ENTRIES
+    # is reached, 1/CULL_FREQUENCY of the entries are evicted. Entries are keyed by the session's
+    # data_modified_at, so a per-process cache never serves a result another process has made stale.
+    'eligibility': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'eligibility',
+        'TIMEOUT': 60 * 60 * 24,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+            'CULL_FREQUENCY': 4,
+        },
+    },
+    # Progress of running background jobs (JOBS_CACHE_ALIAS). On disk, so every process on the host shares it.
+    'jobs': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'job_progress',
+    },
+}
+
+ELIGIBILITY_CACHE_ALIAS = 'eligibility'
+
+
+# Background jobs (attendance/jobs.py), such as imports
+# 'thread' runs them on JOBS_THREADS threads of each web process, which also take up the jobs
+# already queued when the process starts; 'worker' leaves them to `python manage.py run_jobs`
+# processes; 'inline' runs them in the request.
+JOBS_RUNNER = os.environ.get('ATTENDANCE_JOBS_RUNNER', 'thread')
+JOBS_THREADS = 1
+# Running jobs report their progress through this cache. Whatever the runner, a progress poll may be
+# served by another process than the one running the job, so it must be shared by all processes.
+JOBS_CACHE_ALIAS = 'jobs'
+# Uploads are spooled here until their job finishes; the web and run_jobs processes must all see it
+JOBS_UPLOAD_DIR = BASE_DIR / 'job_uploads'
+# Larger uploads are refused; limit request bodies in the web server too, as Django reads them whole first
+JOBS_MAX_UPLOAD_SIZE = 20 * 1024 * 1024
+# A job running this many seconds in a process on another host, which can't be checked, is taken to have lost it
+JOBS_STALE_AFTER = 15 * 60
+
+
+# Request metrics (attendance/metrics.py), served at /metrics
+# Every worker process on the host adds its counts into this file at most every METRICS_FLUSH_INTERVAL seconds.
+METRICS_STORE_PATH = BASE_DIR / 'metrics.sqlite3'
+METRICS_FLUSH_INTERVAL = 1.0
+# Clients allowed to scrape /metrics without logging in as staff: those sending the header
+# "Authorization: Bearer <METRICS_TOKEN>" (when it is set), and those connecting from METRICS_ALLOWED_IPS.
+# The addresses are REMOTE_ADDR, the address of the connecting peer: behind a reverse proxy on the
+# same host every client connects from 127.0.0.1, so list addresses only where clients connect directly.
+METRICS_TOKEN = os.environ.get('ATTENDANCE_METRICS_TOKEN', '')
+METRICS_ALLOWED_IPS = []
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
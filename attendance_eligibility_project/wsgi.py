@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'attendance_eligibility_project.settings')
 
 application = get_wsgi_application()
+
+# Imported only once Django is set up, which the line above does
+from attendance.jobs import start_runner  # noqa: E402
+
+start_runner()